@@ -1,10 +1,17 @@
 from importlib import import_module
 
 from collections import OrderedDict
+import gc
 import importlib
+from itertools import chain
+import sys
+import threading
+import weakref
 
 __author__ = 'alfred'
 
+_MISSING = object()
+
 
 class DirtyLoaderException(Exception):
     pass
@@ -18,12 +25,262 @@ class NoRegisteredError(DirtyLoaderException):
     pass
 
 
+class ModuleRegistry:
+
+    """
+    Ordered and indexed registry of modules. Each entry has a key (canonical module name on loaders, namespace
+    on namespace loaders) and a registered module (string or module object). Modules are also indexed by their
+    canonical name, so strings and module objects for same module are same entry.
+
+    Entries are kept in order on blocks of at most ``2 * block_size`` entries, and each key is indexed by its
+    block. Checking a key takes constant time. Inserting at an index and removing an entry take
+    O(block_size + n / block_size) time: they find a block, and then they copy that block and list of
+    blocks. Blocks and list of blocks are never modified once they are published, so entries could be
+    iterated without locks while registry changes. Changes are serialized by an internal lock.
+    """
+
+    block_size = 256
+    """Number of entries of each block when they are created."""
+
+    def __init__(self, items=()):
+        """
+        ModuleRegistry initialitzer.
+
+        :param items: Key and module pairs.
+        :type items: iterable
+        """
+        self.version = 0
+        self._lock = threading.Lock()
+        self.reset(items)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __getitem__(self, key):
+        return self._entries[key]
+
+    def get(self, key, default=None):
+        return self._entries.get(key, default)
+
+    def get_module_keys(self, module):
+        """
+        Returns keys of entries of a module.
+
+        :param module: String or module object.
+        :rtype: list
+        """
+        return list(self._keys_by_module.get(get_module_name(module), ()))
+
+    def has_module(self, module):
+        """
+        Checks whether a module is registered, by its canonical name. It takes constant time.
+
+        :param module: String or module object.
+        :rtype: bool
+        """
+        return get_module_name(module) in self._keys_by_module
+
+    def keys(self):
+        """
+        Returns ordered keys. Returned view is not modified when registry changes.
+
+        :rtype: iterable
+        """
+        return _BlocksView(self._blocks[1])
+
+    def values(self):
+        """
+        Returns ordered modules. Returned view is not modified when registry changes.
+
+        :rtype: iterable
+        """
+        return _BlocksView(self._blocks[2])
+
+    def items(self):
+        """
+        Returns ordered key and module pairs.
+
+        :rtype: list
+        """
+        _, key_blocks, module_blocks = self._blocks
+        return list(zip(_BlocksView(key_blocks), _BlocksView(module_blocks)))
+
+    def reset(self, items):
+        """
+        Replaces every entry. Repeated keys are skipped.
+
+        :param items: Key and module pairs.
+        :type items: iterable
+        """
+        entries = {}
+        for key, module in items:
+            entries.setdefault(key, module)
+
+        with self._lock:
+            self._entries = entries
+            self._keys_by_module = {}
+            for key, module in entries.items():
+                self._keys_by_module.setdefault(get_module_name(module), []).append(key)
+
+            keys = list(entries)
+            self._block_ids = 0
+            self._positions = {}
+            ids, key_blocks, module_blocks = [], [], []
+            self._block_of = {}
+            for i in range(0, len(keys), self.block_size):
+                block = tuple(keys[i:i + self.block_size])
+                block_id = self._new_block(block)
+                ids.append(block_id)
+                key_blocks.append(block)
+                module_blocks.append(tuple(entries[key] for key in block))
+            self._publish(ids, key_blocks, module_blocks)
+            self.version += 1
+
+    def add(self, key, module, idx=-1):
+        """
+        Adds an entry. It does not check whether key is already registered.
+
+        :param key: Entry key.
+        :param module: String or module object.
+        :param idx: Position of new entry. By default it is appended.
+        :type idx: int
+        """
+        with self._lock:
+            ids, key_blocks, module_blocks = self._blocks
+            ids, key_blocks, module_blocks = list(ids), list(key_blocks), list(module_blocks)
+
+            if not ids:
+                b, i = 0, 0
+                ids.append(self._new_block(()))
+                key_blocks.append(())
+                module_blocks.append(())
+            elif idx < 0 or idx >= len(self._entries):
+                b = len(ids) - 1
+                i = len(key_blocks[b])
+                if i >= self.block_size:
+                    # Appended entries start a new block, so blocks are not split.
+                    b, i = b + 1, 0
+                    ids.append(self._new_block(()))
+                    key_blocks.append(())
+                    module_blocks.append(())
+            else:
+                b, i = self._locate(key_blocks, idx)
+
+            keys = key_blocks[b][:i] + (key,) + key_blocks[b][i:]
+            modules = module_blocks[b][:i] + (module,) + module_blocks[b][i:]
+            self._block_of[key] = ids[b]
+            if len(keys) > 2 * self.block_size:
+                half = len(keys) // 2
+                block_id = self._new_block(keys[half:])
+                ids[b + 1:b + 1] = [block_id]
+                key_blocks[b:b + 1] = [keys[:half], keys[half:]]
+                module_blocks[b:b + 1] = [modules[:half], modules[half:]]
+            else:
+                key_blocks[b] = keys
+                module_blocks[b] = modules
+
+            self._entries[key] = module
+            self._keys_by_module.setdefault(get_module_name(module), []).append(key)
+            self._publish(ids, key_blocks, module_blocks)
+            self.version += 1
+
+    def remove(self, key):
+        """
+        Removes an entry.
+
+        :param key: Entry key.
+        :raises KeyError: If key is not registered.
+        """
+        with self._lock:
+            module = self._entries.pop(key)
+            name = get_module_name(module)
+            keys = self._keys_by_module[name]
+            keys.remove(key)
+            if not keys:
+                del self._keys_by_module[name]
+
+            ids, key_blocks, module_blocks = self._blocks
+            ids, key_blocks, module_blocks = list(ids), list(key_blocks), list(module_blocks)
+            b = self._positions[self._block_of.pop(key)]
+            i = key_blocks[b].index(key)
+            key_blocks[b] = key_blocks[b][:i] + key_blocks[b][i + 1:]
+            module_blocks[b] = module_blocks[b][:i] + module_blocks[b][i + 1:]
+
+            if len(key_blocks[b]) < self.block_size // 4 and len(ids) > 1:
+                # Small blocks are merged with a neighbour, so number of blocks stays proportional to entries.
+                b = b - 1 if b == len(ids) - 1 else b
+                merged = key_blocks[b] + key_blocks[b + 1]
+                if len(merged) <= 2 * self.block_size:
+                    for merged_key in key_blocks[b + 1]:
+                        self._block_of[merged_key] = ids[b]
+                    del ids[b + 1]
+                    key_blocks[b:b + 2] = [merged]
+                    module_blocks[b:b + 2] = [module_blocks[b] + module_blocks[b + 1]]
+            if not key_blocks[b]:
+                del ids[b], key_blocks[b], module_blocks[b]
+
+            self._publish(ids, key_blocks, module_blocks)
+            self.version += 1
+
+    def _new_block(self, keys):
+        self._block_ids += 1
+        for key in keys:
+            self._block_of[key] = self._block_ids
+        return self._block_ids
+
+    def _publish(self, ids, key_blocks, module_blocks):
+        if len(ids) != len(self._positions):
+            # Blocks were added or removed.
+            self._positions = {block_id: b for b, block_id in enumerate(ids)}
+        self._blocks = (ids, key_blocks, module_blocks)
+
+    @staticmethod
+    def _locate(key_blocks, idx):
+        for b, block in enumerate(key_blocks):
+            if idx < len(block):
+                return b, idx
+            idx -= len(block)
+        return len(key_blocks) - 1, len(key_blocks[-1])
+
+
+class _BlocksView:
+
+    """
+    Iterable view of entries kept on blocks.
+    """
+
+    __slots__ = ('_blocks',)
+
+    def __init__(self, blocks):
+        self._blocks = blocks
+
+    def __iter__(self):
+        return chain.from_iterable(self._blocks)
+
+    def __len__(self):
+        return sum(map(len, self._blocks))
+
+
 class Loader:
 
     """
     Loader is a class loader. You must register python modules where to look for classes.
     First modules registered has preference in front last ones, but you could indicate index where
     you want insert new module.
+
+    Loaders could be shared between threads, including free-threaded Python builds. Registration methods
+    are serialized by a per-loader lock, and lookups read ordered snapshots of registry without locks.
+    Modules are kept on a :class:`ModuleRegistry`, so registration methods take O(√n) time. Strings and
+    module objects for same module are same registry entry.
+
+    List of modules given on initialization is copied, so later changes on it are not seen by loader.
+    Registration methods must be used instead.
     """
 
     def __init__(self, modules=None, factories=None):
@@ -34,8 +291,11 @@ class Loader:
         :type modules: list
         """
 
-        self._modules = modules or []
+        self._modules = ModuleRegistry((get_module_name(module), module) for module in modules or ())
         self._factories = factories or {}
+        self._imported_modules = set()
+        self._submodule_names = {}
+        self._write_lock = threading.RLock()
 
     def register_module(self, module, idx=-1):
         """
@@ -47,13 +307,13 @@ class Loader:
         :type idx: int
         """
 
-        if module in self._modules:
-            raise AlreadyRegisteredError("Module '{0}' is already registered on loader.".format(module))
+        with self._write_lock:
+            name = get_module_name(module)
+            if name in self._modules:
+                raise AlreadyRegisteredError("Module '{0}' is already registered on loader.".format(module))
 
-        if idx < 0:
-            self._modules.append(module)
-        else:
-            self._modules.insert(idx, module)
+            self._modules.add(name, module, idx)
+            self.invalidate_submodule_names(name)
 
     def unregister_module(self, module):
         """
@@ -63,10 +323,13 @@ class Loader:
         :type module: str
         """
 
-        if module not in self._modules:
-            raise NoRegisteredError("Module '{0}' is not registered on loader.".format(module))
+        with self._write_lock:
+            name = get_module_name(module)
+            if name not in self._modules:
+                raise NoRegisteredError("Module '{0}' is not registered on loader.".format(module))
 
-        self._modules.remove(module)
+            self._modules.remove(name)
+            self.invalidate_submodule_names(name)
 
     def get_registered_modules(self):
         """
@@ -76,7 +339,21 @@ class Loader:
         :rtype: list
         """
 
-        return self._modules.copy()
+        return list(self._modules.values())
+
+    def _get_registry(self):
+        """
+        Returns registry of modules.
+
+        :rtype: ModuleRegistry
+        """
+        return self._modules
+
+    def _get_registry_version(self):
+        """
+        Returns version of registry. It changes when modules are registered or unregistered.
+        """
+        return self._modules.version
 
     def load_class(self, classname):
         """
@@ -88,19 +365,77 @@ class Loader:
         :rtype: type
         """
 
+        modules_count = len(sys.modules)
+        try:
+            return self._lookup(classname)[1]
+        finally:
+            self._track_imports(modules_count)
+
+    def _track_imports(self, modules_count):
+        # New modules are appended to sys.modules, so they are the last ones.
+        if len(sys.modules) > modules_count:
+            self._imported_modules.update(list(sys.modules)[modules_count:])
+
+    def _lookup(self, classname):
+        """
+        Looks for a class in each module registered.
+
+        :return: Tuple of name of module where class was found and class object.
+        :rtype: tuple
+        """
         module_list = self._get_module_list()
 
         for module in module_list:
+            if not self._may_export(module, classname):
+                continue
             try:
-                return import_class(classname, module.__name__)
+                return module.__name__, import_class(classname, module.__name__)
             except (AttributeError, ImportError):
                 pass
 
         raise ImportError("Class '{0}' could not be loaded.".format(classname))
 
+    def invalidate_submodule_names(self, module=None):
+        """
+        Forgets listed submodule names of a registered package, or of every package if it is None. They are
+        listed again on next dotted lookup. They are forgotten when a package is registered, unregistered or
+        reloaded, but not when submodules are added to an unchanged package.
+
+        :param module: Module name or object.
+        :type module: str
+        """
+        if module is None:
+            self._submodule_names = {}
+        else:
+            self._submodule_names.pop(get_module_name(module), None)
+
+    def _may_export(self, module, classname):
+        """
+        Checks whether a module could export a class name, in order to skip modules which do not.
+        Submodule names of each package are listed once, until it is reloaded (it gets a new spec).
+        """
+        submodule_names = None
+        if '.' in classname:
+            spec = getattr(module, '__spec__', None)
+            listed = self._submodule_names.get(module.__name__)
+            if listed is None or listed[0] is not spec:
+                listed = self._submodule_names[module.__name__] = (spec, get_submodule_names(module))
+            submodule_names = listed[1]
+        return may_export(module, classname, submodule_names)
+
+    def _get_registered_list(self):
+        """
+        Returns registered modules (strings or module objects) in looking up order. Returned list must not
+        be modified.
+        """
+        return self._modules.values()
+
     def _get_module_list(self):
-        return [importlib.import_module(name) if isinstance(name, str) else name
-                for name in self._modules]
+        """
+        Returns an iterator of registered module objects in looking up order. Modules are imported
+        while iterating, so modules after the one where a class is found are not imported.
+        """
+        return map(import_registered_module, self._get_registered_list())
 
     def factory(self, classname, *args, **kwargs):
         """
@@ -115,7 +450,29 @@ class Loader:
 
         klass = self.load_class(classname)
 
-        return self.get_factory_by_class(klass)(*args, **kwargs)
+        return self._call_factory(klass, self.get_factory_by_class(klass), args, kwargs)
+
+    async def afactory(self, classname, *args, **kwargs):
+        """
+        Async version of ``factory``. If class factory is an async factory, it is awaited.
+
+        :param classname: Class name you want to create an instance.
+        :type classname: str
+        :return: An instance of classname
+        :rtype: object
+        """
+        klass = self.load_class(classname)
+        factory = self.get_factory_by_class(klass)
+        obj = self._call_factory(klass, factory, args, kwargs)
+        if is_async_factory(factory):
+            obj = await obj
+        return obj
+
+    def _call_factory(self, klass, factory, args, kwargs):
+        """
+        Builds an object using class factory, once both are resolved.
+        """
+        return factory(*args, **kwargs)
 
     def get_factory_by_class(self, klass):
         """
@@ -126,25 +483,70 @@ class Loader:
         :return: Class factory
         :rtype: callable
         """
-        for check, factory in self._factories.items():
-            if klass is check:
-                return factory(self, klass)
-        for check, factory in self._factories.items():
-            if issubclass(klass, check):
-                return factory(self, klass)
-        return klass
+        factory = find_factory(self._factories, klass)
+        if factory is None:
+            return klass
+        return self._build_factory(factory, klass)
+
+    def _build_factory(self, factory, klass):
+        return factory(self, klass)
 
     def register_factory(self, klass, factory):
-        self._factories[klass] = factory
+        with self._write_lock:
+            factories = self._factories.copy()
+            factories[klass] = factory
+            self._factories = factories
 
     def unregister_factory(self, klass):
-        del self._factories[klass]
+        with self._write_lock:
+            factories = self._factories.copy()
+            del factories[klass]
+            self._factories = factories
+
+    def freeze(self, classnames=tuple()):
+        """
+        Returns an immutable snapshot of loader. Public names of every registered module are resolved
+        in advance, so lookups are plain dictionary reads.
+
+        :param classnames: Extra class names to resolve in advance (for example, dotted ones).
+        :type classnames: iterable
+        :return: Frozen loader
+        :rtype: FrozenLoader
+        """
+        modules = tuple(self._get_module_list())
+        classes = {}
+        for module in reversed(modules):
+            classes.update(get_public_names(module))
+
+        for classname in classnames:
+            classes[classname] = self.load_class(classname)
+
+        return FrozenLoader(modules=modules, factories=self._factories, classes=classes)
+
+    def memory_report(self):
+        """
+        Returns an approximate memory report of loader. Sizes are in bytes.
+
+        * ``imported_modules``: Dict with modules imported because of loader lookups as key and their
+          approximate size as value.
+        * ``imported_modules_size``: Approximate size of all of them.
+
+        :rtype: dict
+        """
+        modules = {}
+        for name in sorted(self._imported_modules.copy()):
+            module = sys.modules.get(name)
+            if module is not None:
+                modules[name] = get_approximate_size(module)
+
+        return {'imported_modules': modules,
+                'imported_modules_size': sum(modules.values())}
 
 
 class ReversedMixin:
 
-    def _get_module_list(self):
-        return reversed(super(ReversedMixin, self)._get_module_list())
+    def _get_registered_list(self):
+        return list(super(ReversedMixin, self)._get_registered_list())[::-1]
 
 
 class LoaderReversed(ReversedMixin, Loader):
@@ -159,22 +561,76 @@ class LoaderReversed(ReversedMixin, Loader):
 
 class CacheLoaderMixin:
 
-    def __init__(self, *args, **kwargs):
+    """
+    Mixin to cache looked up classes and factories.
+
+    Using ``weak_cache=True``, classes are cached using weak references and factories receive a weak proxy of
+    loader, so there are no reference cycles and unused classes (and their modules) could be garbage-collected.
+    Custom factory instances keep a reference to their class, so classes with a custom factory are freed when
+    factories cache is invalidated.
+
+    Cache is revalidated lazily. It is flushed when registry version changes, and cached classes are dropped
+    when they are no longer bound on their modules nor where they were loaded from (see :func:`is_current`),
+    for example after module is reloaded or removed from ``sys.modules``.
+    """
+
+    def __init__(self, *args, weak_cache=False, **kwargs):
         super(CacheLoaderMixin, self).__init__(*args, **kwargs)
-        self._cache = {}
-        self._cache_factories = {}
+        self._weak_cache = weak_cache
+        if weak_cache:
+            self._weak_self = weakref.proxy(self)
+        self.invalidate_cache()
+        self.invalidate_cache_factories()
 
     def invalidate_cache(self):
         """
         Invalidate class cache.
         """
-        self._cache = {}
+        version = self._get_registry_version()
+        self._cache = weakref.WeakValueDictionary() if self._weak_cache else {}
+        self._cache_origins = {}
+        self._cache_version = version
+
+    def _get_cache(self, classname):
+        """
+        Returns a cached class. Cache is flushed if registry changed, and stale entries are dropped.
+
+        :raises KeyError: If class is not cached or cached one is stale.
+        """
+        if self._cache_version != self._get_registry_version():
+            self.invalidate_cache()
+        klass = self._cache[classname]
+        if not is_current(klass, *self._cache_origins.get(classname, (None, None))):
+            self._cache.pop(classname, None)
+            raise KeyError(classname)
+        return klass
 
     def invalidate_cache_factories(self):
         """
         Invalidate factories cache.
         """
-        self._cache_factories = {}
+        self._cache_factories = weakref.WeakKeyDictionary() if self._weak_cache else {}
+
+    def _store_cache(self, classname, klass, cache=None):
+        """
+        Stores a class on cache. Lookups must pass cache they started with, so results of lookups which were
+        running while cache was invalidated are stored on discarded cache.
+        """
+        try:
+            (self._cache if cache is None else cache)[classname] = klass
+        except TypeError:
+            # Weak cache could not store objects which do not support weak references.
+            pass
+
+    def _lookup(self, classname):
+        module_name, klass = super(CacheLoaderMixin, self)._lookup(classname)
+        self._cache_origins[classname] = get_origin(module_name, classname)
+        return module_name, klass
+
+    def _build_factory(self, factory, klass):
+        if self._weak_cache:
+            return factory(self._weak_self, klass)
+        return super(CacheLoaderMixin, self)._build_factory(factory, klass)
 
     def register_module(self, *args, **kwargs):
         super(CacheLoaderMixin, self).register_module(*args, **kwargs)
@@ -187,27 +643,32 @@ class CacheLoaderMixin:
     def load_class(self, classname, avoid_cache=False, *args, **kwargs):
         if not avoid_cache:
             try:
-                return self._cache[classname]
+                return self._get_cache(classname)
             except KeyError:
                 pass
 
+        cache = self._cache
         result = super(CacheLoaderMixin, self).load_class(classname, *args, **kwargs)
 
         if not avoid_cache:
-            self._cache[classname] = result
+            self._store_cache(classname, result, cache)
         return result
 
     def get_factory_by_class(self, klass, avoid_cache=False):
         if not avoid_cache:
             try:
-                return self._cache_factories[klass]
+                factory = self._cache_factories[klass]
             except KeyError:
                 pass
+            else:
+                return klass if factory is None else factory
 
+        cache_factories = self._cache_factories
         result = super(CacheLoaderMixin, self).get_factory_by_class(klass)
 
         if not avoid_cache:
-            self._cache_factories[klass] = result
+            # On weak cache, class itself is not stored as value in order to not keep it alive.
+            cache_factories[klass] = None if self._weak_cache and result is klass else result
         return result
 
     def register_factory(self, klass, factory):
@@ -218,6 +679,64 @@ class CacheLoaderMixin:
         super(CacheLoaderMixin, self).unregister_factory(klass)
         self.invalidate_cache_factories()
 
+    def memory_report(self):
+        """
+        Returns an approximate memory report of loader, including caches. Sizes are in bytes.
+
+        * ``cache_entries``: Number of classes cached.
+        * ``cache_size``: Approximate size of classes cache.
+        * ``factory_cache_entries``: Number of factories cached.
+        * ``factory_cache_size``: Approximate size of factories cache.
+
+        :rtype: dict
+        """
+        report = super(CacheLoaderMixin, self).memory_report()
+
+        cache = dict(self._cache)
+        cache_factories = dict(self._cache_factories)
+
+        report.update({'cache_entries': len(cache),
+                       'cache_size': sys.getsizeof(cache) + get_approximate_size(*cache.values()),
+                       'factory_cache_entries': len(cache_factories),
+                       'factory_cache_size': sys.getsizeof(cache_factories) +
+                       get_approximate_size(*(factory for factory in cache_factories.values()
+                                              if factory is not None and not isinstance(factory, type)))})
+        return report
+
+    def preload_for_fork(self, classnames=tuple(), freeze_gc=True):
+        """
+        Warms up loader before forking worker processes (gunicorn, uWSGI, etc). It imports every registered
+        module, resolves classes and their factories, and moves all objects tracked by garbage collector
+        to permanent generation, so memory pages remain shared between workers. It should be called just
+        before forking.
+
+        Garbage collector is disabled while modules are imported, so no collection frees memory between
+        objects which will be shared, and it is frozen at the end (no collection is forced).
+
+        :param classnames: Class names to resolve and cache.
+        :type classnames: iterable
+        :param freeze_gc: Whether to freeze garbage collector objects. It requires Python 3.7 or newer.
+        :type freeze_gc: bool
+        """
+        freeze_gc = freeze_gc and hasattr(gc, 'freeze')
+        gc_enabled = gc.isenabled()
+        if freeze_gc:
+            gc.disable()
+
+        try:
+            list(self._get_module_list())
+
+            for classname in classnames:
+                klass = self.load_class(classname)
+                if isinstance(klass, type):
+                    self.get_factory_by_class(klass)
+
+            if freeze_gc:
+                gc.freeze()
+        finally:
+            if freeze_gc and gc_enabled:
+                gc.enable()
+
 
 class LoaderCached(CacheLoaderMixin, Loader):
 
@@ -246,6 +765,12 @@ class LoaderNamespace(Loader):
     """
     LoaderNamespace is a class loader. You must register python modules with a namespace tag where
     to look for classes. First namespace registered has preference in front last ones.
+
+    Namespaces could be nested using dots (``org.team``). When a class is not found on a namespace, it is
+    looked for on its registered ancestors (``org``), from nearest to farthest. Modules of each namespace
+    and its ancestors are kept on a table, which is rebuilt when registry changes.
+
+    As on :class:`Loader`, dictionary of namespaces given on initialization is copied.
     """
 
     def __init__(self, namespaces=None, factories=None):
@@ -256,8 +781,13 @@ class LoaderNamespace(Loader):
             Modules can be strings or module objects
         :type namespaces: OrderedDict
         """
-        self._namespaces = namespaces or OrderedDict()
+        self._namespaces = ModuleRegistry((namespaces or OrderedDict()).items())
         self._factories = factories or {}
+        self._imported_modules = set()
+        self._submodule_names = {}
+        self._write_lock = threading.RLock()
+        self._namespace_table = {}
+        self._namespace_table_version = None
 
     def register_module(self, module, namespace=None):
         """
@@ -281,10 +811,12 @@ class LoaderNamespace(Loader):
         :param module: must be a string or a module object to register.
         :type module: str
         """
-        if namespace in self._namespaces:
-            raise AlreadyRegisteredError("Namespace '{0}' is already registered on loader.".format(namespace))
+        with self._write_lock:
+            if namespace in self._namespaces:
+                raise AlreadyRegisteredError("Namespace '{0}' is already registered on loader.".format(namespace))
 
-        self._namespaces[namespace] = module
+            self._namespaces.add(namespace, module)
+            self.invalidate_submodule_names(module)
 
     def unregister_module(self, module):
         """
@@ -293,11 +825,12 @@ class LoaderNamespace(Loader):
         :param module: must be a string or a module object to unregistered
         :type module: str
         """
-        if module not in self._namespaces.values():
-            raise NoRegisteredError("Module '{0}' is not registered on loader.".format(module))
+        with self._write_lock:
+            namespaces = self._namespaces.get_module_keys(module)
+            if not namespaces:
+                raise NoRegisteredError("Module '{0}' is not registered on loader.".format(module))
 
-        for ns, mod in list(self._namespaces.items()):
-            if mod == module:
+            for ns in namespaces:
                 self.unregister_namespace(ns)
 
     def unregister_namespace(self, namespace):
@@ -307,10 +840,12 @@ class LoaderNamespace(Loader):
         :param namespace: Namespace tag.
         :type namespace: str
         """
-        if namespace not in self._namespaces:
-            raise NoRegisteredError("Namespace '{0}' is not registered on loader.".format(namespace))
+        with self._write_lock:
+            if namespace not in self._namespaces:
+                raise NoRegisteredError("Namespace '{0}' is not registered on loader.".format(namespace))
 
-        del self._namespaces[namespace]
+            self.invalidate_submodule_names(self._namespaces[namespace])
+            self._namespaces.remove(namespace)
 
     def get_registered_modules(self):
         """
@@ -319,7 +854,7 @@ class LoaderNamespace(Loader):
         :return: list of registered modules.
         :rtype: list
         """
-        return self._namespaces.values()
+        return list(self._namespaces.values())
 
     def get_registered_namespaces(self):
         """
@@ -328,7 +863,13 @@ class LoaderNamespace(Loader):
         :return: Dict with namespaces as key and modules as value.
         :rtype: OrderedDict
         """
-        return OrderedDict(self._namespaces)
+        return OrderedDict(self._namespaces.items())
+
+    def _get_registry(self):
+        return self._namespaces
+
+    def _get_registry_version(self):
+        return self._namespaces.version
 
     def load_class(self, classname, namespace=None):
         """
@@ -346,21 +887,90 @@ class LoaderNamespace(Loader):
             namespace, classname = classname.split(':', 1)
             return self.load_class(classname, namespace)
         if namespace:
-            if namespace not in self._namespaces:
-                raise NoRegisteredError("Namespace '{0}' is not registered on loader.".format(namespace))
+            modules_count = len(sys.modules)
             try:
-                module = importlib.import_module(self._namespaces[namespace]) \
-                    if isinstance(self._namespaces[namespace], str) else self._namespaces[namespace]
-
-                return import_class(classname, module.__name__)
-            except (AttributeError, ImportError):
-                raise ImportError("Class '{0}' could not be loaded from namespace '{1}'.".format(classname,
-                                                                                                 namespace))
+                return self._lookup_namespace(classname, namespace)[1]
+            finally:
+                self._track_imports(modules_count)
         return super(LoaderNamespace, self).load_class(classname)
 
-    def _get_module_list(self):
-        return [importlib.import_module(name) if isinstance(name, str) else name
-                for name in self._namespaces.values()]
+    def _lookup_namespace(self, classname, namespace):
+        """
+        Looks for a class in modules of a namespace and its registered ancestors.
+
+        :return: Tuple of name of module where class was found and class object.
+        :rtype: tuple
+        """
+        try:
+            for module in self._get_namespace_modules(namespace):
+                try:
+                    return module.__name__, get_class(module, classname)
+                except (AttributeError, ImportError):
+                    pass
+        except ImportError:
+            pass
+        raise ImportError("Class '{0}' could not be loaded from namespace '{1}'.".format(classname, namespace))
+
+    def _get_namespace_modules(self, namespace):
+        """
+        Returns module objects of a namespace and its registered ancestors, from nearest to farthest.
+        Modules are imported once and kept on namespace table until registry changes, or until a module
+        registered by name is replaced on ``sys.modules`` (for example, when it is removed and imported again).
+
+        :raises NoRegisteredError: If namespace is not registered.
+        """
+        version = self._get_registry_version()
+        if self._namespace_table_version != version:
+            self._namespace_table = {}
+            self._namespace_table_version = version
+
+        table = self._namespace_table
+        try:
+            modules, imported = table[namespace]
+        except KeyError:
+            pass
+        else:
+            if all(sys.modules.get(name) is module for name, module in imported):
+                return modules
+
+        namespaces = self._namespaces
+        if namespace not in namespaces:
+            raise NoRegisteredError("Namespace '{0}' is not registered on loader.".format(namespace))
+
+        registered = [namespaces[ns] for ns in get_namespace_chain(namespace, namespaces)]
+        modules = tuple(import_registered_module(module) for module in registered)
+        imported = tuple((name, module) for name, module in zip(registered, modules) if isinstance(name, str))
+        table[namespace] = (modules, imported)
+        return modules
+
+    def _get_registered_list(self):
+        return self._namespaces.values()
+
+    def freeze(self, classnames=tuple()):
+        """
+        Returns an immutable snapshot of loader. Public names of every registered module are resolved
+        in advance, with and without namespace, so lookups are plain dictionary reads.
+
+        :param classnames: Extra class names to resolve in advance (for example, dotted ones).
+        :type classnames: iterable
+        :return: Frozen loader
+        :rtype: FrozenLoader
+        """
+        modules = tuple(self._get_module_list())
+        namespaces = OrderedDict((ns, import_registered_module(module)) for ns, module in self._namespaces.items())
+        classes = {}
+        for module in reversed(modules):
+            classes.update(get_public_names(module))
+
+        for ns in namespaces:
+            for ancestor in reversed(get_namespace_chain(ns, namespaces)):
+                classes.update(('{0}:{1}'.format(ns, name), value)
+                               for name, value in get_public_names(namespaces[ancestor]).items())
+
+        for classname in classnames:
+            classes[classname] = self.load_class(classname)
+
+        return FrozenLoader(modules=modules, namespaces=namespaces, factories=self._factories, classes=classes)
 
 
 class LoaderNamespaceReversed(ReversedMixin, LoaderNamespace):
@@ -374,6 +984,11 @@ class LoaderNamespaceReversed(ReversedMixin, LoaderNamespace):
 
 class CacheLoaderNamespaceMixin(CacheLoaderMixin):
 
+    def _lookup_namespace(self, classname, namespace):
+        module_name, klass = super(CacheLoaderNamespaceMixin, self)._lookup_namespace(classname, namespace)
+        self._cache_origins['{0}:{1}'.format(namespace, classname)] = get_origin(module_name, classname)
+        return module_name, klass
+
     def register_namespace(self, *args, **kwargs):
         super(CacheLoaderNamespaceMixin, self).register_namespace(*args, **kwargs)
         self.invalidate_cache()
@@ -385,15 +1000,16 @@ class CacheLoaderNamespaceMixin(CacheLoaderMixin):
     def load_class(self, classname, namespace=None, avoid_cache=False):
         if namespace is None and not avoid_cache:
             try:
-                return self._cache[classname]
+                return self._get_cache(classname)
             except KeyError:
                 pass
+        cache = self._cache
         result = super(CacheLoaderNamespaceMixin, self).load_class(classname,
                                                                    namespace=namespace,
                                                                    avoid_cache=True)
 
         if namespace is None and not avoid_cache:
-            self._cache[classname] = result
+            self._store_cache(classname, result, cache)
 
         return result
 
@@ -420,6 +1036,693 @@ class LoaderNamespaceReversedCached(CacheLoaderNamespaceMixin, LoaderNamespaceRe
     pass
 
 
+class AdaptiveOrderMixin:
+
+    """
+    Mixin to look for classes in modules which found most of them before. In order to return same class
+    as declared preference order, when a class is found only modules with more preference are checked.
+    Those checks are cheap for simple class names, because they only look at module attributes.
+
+    Hit counts are not locked, so some concurrent hits could be lost. They are only used to sort modules.
+    Modules are sorted again only when ranking is recomputed (each ``adapt_interval`` lookups) or registry
+    changes.
+    """
+
+    adapt_interval = 100
+
+    def __init__(self, *args, **kwargs):
+        super(AdaptiveOrderMixin, self).__init__(*args, **kwargs)
+        self._module_hits = {}
+        self._ranking = {}
+        self._lookups = 0
+        self._order = None
+
+    def get_module_hits(self):
+        """
+        Returns number of classes found on each module.
+
+        :return: Dict with module name as key and number of hits as value.
+        :rtype: dict
+        """
+        return dict(self._module_hits)
+
+    def _get_order(self):
+        """
+        Returns registered modules and their indexes sorted by ranking. They are sorted again only when
+        ranking or registry change.
+        """
+        version = self._get_registry_version()
+        ranking = self._ranking
+        order = self._order
+        if order is None or order[0] != version or order[1] is not ranking:
+            registered_list = list(self._get_registered_list())
+            names = [get_module_name(module) for module in registered_list]
+            indexes = sorted(range(len(names)), key=lambda i: ranking.get(names[i], len(ranking)))
+            order = self._order = (version, ranking, registered_list, indexes)
+        return order[2], order[3]
+
+    def _lookup(self, classname):
+        self._lookups += 1
+        if self._lookups % self.adapt_interval == 0:
+            hits = dict(self._module_hits)
+            self._ranking = {name: rank for rank, name in enumerate(sorted(hits, key=hits.get, reverse=True))}
+
+        registered_list, indexes = self._get_order()
+        module_list = [None] * len(registered_list)
+
+        def get_module(idx):
+            if module_list[idx] is None:
+                module_list[idx] = import_registered_module(registered_list[idx])
+            return module_list[idx]
+
+        missed = set()
+        for idx in indexes:
+            module = get_module(idx)
+            if not self._may_export(module, classname):
+                missed.add(idx)
+                continue
+            try:
+                klass = import_class(classname, module.__name__)
+            except (AttributeError, ImportError):
+                missed.add(idx)
+                continue
+
+            for shadow_idx in range(idx):
+                if shadow_idx in missed:
+                    continue
+                shadow = get_module(shadow_idx)
+                if not self._may_export(shadow, classname):
+                    continue
+                try:
+                    klass = import_class(classname, shadow.__name__)
+                except (AttributeError, ImportError):
+                    continue
+                module = shadow
+                break
+
+            self._module_hits[module.__name__] = self._module_hits.get(module.__name__, 0) + 1
+            return module.__name__, klass
+
+        raise ImportError("Class '{0}' could not be loaded.".format(classname))
+
+
+class LoaderAdaptive(AdaptiveOrderMixin, Loader):
+
+    """
+    A version of Loader which looks for classes first in modules which found most of them before.
+    Returned classes are same as Loader ones.
+    """
+    pass
+
+
+class LoaderNamespaceAdaptive(AdaptiveOrderMixin, LoaderNamespace):
+
+    """
+    A version of LoaderNamespace which looks for classes first in modules which found most of them before.
+    Returned classes are same as LoaderNamespace ones.
+    """
+    pass
+
+
+class MemoizeFactoryMixin:
+
+    """
+    Mixin to memoize instances built using ``factory`` method. Instances built from same class and same
+    parameters (compared in a canonical form, including nested dictionaries and lists) are built once and
+    reused. Least recently used instances are evicted when there are more than ``memoize_maxsize``.
+
+    It should only be used for immutable objects, so classes are not memoized unless they are enabled (with
+    their subclasses) using ``set_memoization``, or ``memoize_default`` is True. Instances built using
+    unhashable parameters are not memoized. Memoized instances are forgotten when factories change.
+    """
+
+    def __init__(self, *args, memoize_maxsize=128, memoize_default=False, **kwargs):
+        super(MemoizeFactoryMixin, self).__init__(*args, **kwargs)
+        self.memoize_maxsize = memoize_maxsize
+        self.memoize_default = memoize_default
+        self._memoize_classes = {}
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def set_memoization(self, klass, enabled=True):
+        """
+        Enables or disables memoization for a class and its subclasses.
+
+        :param klass: Class type
+        :type klass: type
+        :param enabled: Whether to memoize instances of class.
+        :type enabled: bool
+        """
+        with self._write_lock:
+            memoize_classes = self._memoize_classes.copy()
+            memoize_classes[klass] = enabled
+            self._memoize_classes = memoize_classes
+        self.invalidate_memo()
+
+    def invalidate_memo(self):
+        """
+        Forgets memoized instances.
+        """
+        with self._memo_lock:
+            self._memo = OrderedDict()
+
+    def register_factory(self, klass, factory):
+        super(MemoizeFactoryMixin, self).register_factory(klass, factory)
+        self.invalidate_memo()
+
+    def unregister_factory(self, klass):
+        super(MemoizeFactoryMixin, self).unregister_factory(klass)
+        self.invalidate_memo()
+
+    def is_memoized(self, klass):
+        """
+        Returns whether instances of a class are memoized.
+
+        :rtype: bool
+        """
+        enabled = find_factory(self._memoize_classes, klass) if isinstance(klass, type) else None
+        return self.memoize_default if enabled is None else enabled
+
+    def _call_factory(self, klass, factory, args, kwargs):
+        if not self.is_memoized(klass) or is_async_factory(factory):
+            # Coroutines could be awaited only once.
+            return factory(*args, **kwargs)
+
+        try:
+            key = (klass, make_params_key(*args, **kwargs))
+        except TypeError:
+            return factory(*args, **kwargs)
+
+        with self._memo_lock:
+            try:
+                obj = self._memo[key]
+            except KeyError:
+                pass
+            else:
+                self._memo.move_to_end(key)
+                return obj
+
+        obj = factory(*args, **kwargs)
+
+        with self._memo_lock:
+            self._memo[key] = obj
+            while len(self._memo) > self.memoize_maxsize:
+                self._memo.popitem(last=False)
+        return obj
+
+
+class LoaderMemoized(MemoizeFactoryMixin, CacheLoaderMixin, Loader):
+
+    """
+    A version of LoaderCached which memoizes instances built using same parameters.
+    """
+    pass
+
+
+class LoaderNamespaceMemoized(MemoizeFactoryMixin, CacheLoaderNamespaceMixin, LoaderNamespace):
+
+    """
+    A version of LoaderNamespaceCached which memoizes instances built using same parameters.
+    """
+    pass
+
+
+class FrozenLoader:
+
+    """
+    FrozenLoader is an immutable snapshot of a loader, built using ``freeze()`` method of any loader.
+    It has no registration methods, no cache bookkeeping and no locks, so it is safe to share it between
+    threads. In order to refresh it, build a new snapshot and replace the old one.
+
+    Classes resolved in advance and their factories are looked up in plain dictionaries. Other class names
+    are resolved looking for them in frozen modules, but results are not stored.
+    """
+
+    __slots__ = ('_modules', '_namespaces', '_factories', '_classes', '_class_factories')
+
+    def __init__(self, modules=tuple(), namespaces=None, factories=None, classes=None):
+        """
+        FrozenLoader initialitzer.
+
+        :param modules: Module objects, sorted by preference.
+        :type modules: tuple
+        :param namespaces: Dict of namespace as key and module object as value.
+        :type namespaces: OrderedDict
+        :param factories: Dict of class as key and factory as value.
+        :type factories: dict
+        :param classes: Resolution table. Dict of class name as key and class as value.
+        :type classes: dict
+        """
+        set_attr = super(FrozenLoader, self).__setattr__
+        set_attr('_modules', tuple(modules))
+        set_attr('_namespaces', OrderedDict(namespaces or ()))
+        set_attr('_factories', dict(factories or {}))
+        set_attr('_classes', dict(classes or {}))
+
+        class_factories = {}
+        for klass in self._classes.values():
+            if isinstance(klass, type) and klass not in class_factories:
+                factory = find_factory(self._factories, klass)
+                class_factories[klass] = klass if factory is None else factory(self, klass)
+        set_attr('_class_factories', class_factories)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenLoader is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("FrozenLoader is immutable.")
+
+    def get_registered_modules(self):
+        """
+        Return frozen modules.
+
+        :return: list of module objects.
+        :rtype: list
+        """
+        return list(self._modules)
+
+    def get_registered_namespaces(self):
+        """
+        Return frozen namespaces.
+
+        :return: Dict with namespaces as key and module objects as value.
+        :rtype: OrderedDict
+        """
+        return OrderedDict(self._namespaces)
+
+    def load_class(self, classname, namespace=None):
+        """
+        Loads a class from resolution table. If it is not there, it looks for it in each frozen module.
+
+        :param classname: Class name you want to load.
+        :type classname: str
+        :param namespace: Specific namespace where to look for class.
+        :type namespace: str
+        :return: Class object
+        :rtype: type
+        """
+        if namespace:
+            classname = '{0}:{1}'.format(namespace, classname)
+
+        try:
+            return self._classes[classname]
+        except KeyError:
+            pass
+
+        if ':' in classname:
+            namespace, classname = classname.split(':', 1)
+            if namespace not in self._namespaces:
+                raise NoRegisteredError("Namespace '{0}' is not registered on loader.".format(namespace))
+            for ns in get_namespace_chain(namespace, self._namespaces):
+                try:
+                    return get_class(self._namespaces[ns], classname)
+                except (AttributeError, ImportError):
+                    pass
+            raise ImportError("Class '{0}' could not be loaded from namespace '{1}'.".format(classname, namespace))
+
+        for module in self._modules:
+            if not may_export(module, classname):
+                continue
+            try:
+                return import_class(classname, module.__name__)
+            except (AttributeError, ImportError):
+                pass
+
+        raise ImportError("Class '{0}' could not be loaded.".format(classname))
+
+    def factory(self, classname, *args, **kwargs):
+        """
+        Creates an instance of class. You can add needed params to instance the class.
+
+        :param classname: Class name you want to create an instance.
+        :type classname: str
+        :return: An instance of classname
+        :rtype: object
+        """
+        return self.get_factory_by_class(self.load_class(classname))(*args, **kwargs)
+
+    async def afactory(self, classname, *args, **kwargs):
+        """
+        Async version of ``factory``. If class factory is an async factory, it is awaited.
+        """
+        factory = self.get_factory_by_class(self.load_class(classname))
+        obj = factory(*args, **kwargs)
+        if is_async_factory(factory):
+            obj = await obj
+        return obj
+
+    def get_factory_by_class(self, klass):
+        """
+        Returns a custom factory for class. By default it will return the class itself.
+
+        :param klass: Class type
+        :type klass: type
+        :return: Class factory
+        :rtype: callable
+        """
+        try:
+            return self._class_factories[klass]
+        except KeyError:
+            pass
+
+        factory = find_factory(self._factories, klass)
+        if factory is None:
+            return klass
+        return factory(self, klass)
+
+    def freeze(self, classnames=tuple()):
+        """
+        Frozen loaders are already immutable, so it returns itself when no extra class names are requested.
+        """
+        if not classnames:
+            return self
+        classes = dict(self._classes)
+        for classname in classnames:
+            classes[classname] = self.load_class(classname)
+        return FrozenLoader(modules=self._modules, namespaces=self._namespaces,
+                            factories=self._factories, classes=classes)
+
+
+class ResolutionRecorder:
+
+    """
+    Records classes loaded by a loader while it is active. It must be used as a context manager.
+
+    **Example**:
+
+    .. code-block:: python
+
+        with ResolutionRecorder(loader) as recorder:
+            loader.factory('logging:Logger', name='foo', handlers=['logging:NullHandler'])
+
+        recorder.resolutions  # {'logging:Logger': Logger, 'logging:NullHandler': NullHandler}
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.resolutions = OrderedDict()
+
+    def __enter__(self):
+        load_class = self.loader.load_class
+
+        def recorded_load_class(classname, *args, **kwargs):
+            klass = load_class(classname, *args, **kwargs)
+            namespace = args[0] if args else kwargs.get('namespace')
+            if isinstance(namespace, str) and namespace:
+                classname = '{0}:{1}'.format(namespace, classname)
+            self.resolutions.setdefault(classname, klass)
+            return klass
+
+        self._saved = set_instance_attrs(self.loader, load_class=recorded_load_class)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        restore_instance_attrs(self.loader, self._saved)
+
+
+def set_instance_attrs(obj, **attrs):
+    """
+    Sets instance attributes of an object, usually wrappers of loader methods. Previous instance attributes
+    (for example, wrappers set by an outer tracer or recorder) are returned, so they could be restored using
+    :func:`restore_instance_attrs`. It allows to nest wrappers.
+
+    :param obj: Object to patch.
+    :param attrs: Attributes to set.
+    :return: Previous instance attributes.
+    :rtype: dict
+    """
+    saved = {name: vars(obj).get(name, _MISSING) for name in attrs}
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    return saved
+
+
+def restore_instance_attrs(obj, saved):
+    """
+    Restores instance attributes saved by :func:`set_instance_attrs`. Attributes which were not instance
+    attributes are removed, so class attributes are used again.
+
+    :param obj: Patched object.
+    :param saved: Previous instance attributes.
+    :type saved: dict
+    """
+    for name, value in saved.items():
+        if value is _MISSING:
+            vars(obj).pop(name, None)
+        else:
+            setattr(obj, name, value)
+
+
+def find_factory(factories, klass):
+    """
+    Looks for the factory registered for a class. Exact matches have preference over subclass matches.
+
+    :param factories: Dict of class as key and factory as value.
+    :type factories: dict
+    :param klass: Class type
+    :type klass: type
+    :return: Factory or None if there is no factory for class.
+    """
+    for check, factory in factories.items():
+        if klass is check:
+            return factory
+    for check, factory in factories.items():
+        if issubclass(klass, check):
+            return factory
+    return None
+
+
+def may_export(module, classname, submodule_names=None):
+    """
+    Checks whether a module could export a class name. It only looks at module attributes and, for dotted
+    names, at submodule names. Modules with ``__getattr__`` are always considered.
+
+    :param module: Module object
+    :param classname: Class name
+    :type classname: str
+    :param submodule_names: Names of submodules of module. None means they are unknown.
+    :type submodule_names: frozenset
+    :rtype: bool
+    """
+    attrs = vars(module)
+    if '__getattr__' in attrs:
+        return True
+    head = classname.split('.', 1)[0]
+    if head in attrs:
+        return True
+    if head == classname:
+        return False
+    return submodule_names is None or head in submodule_names
+
+
+def get_submodule_names(module):
+    """
+    Returns names of submodules of a package.
+
+    :param module: Module object
+    :return: Set of submodule names. None if module is not a package or they could not be listed.
+    :rtype: frozenset
+    """
+    path = getattr(module, '__path__', None)
+    if path is None:
+        return frozenset()
+
+    import pkgutil
+    try:
+        names = frozenset(name for _, name, _ in pkgutil.iter_modules(path))
+    except Exception:
+        return None
+    # Custom importers could not support listing modules.
+    return names or None
+
+
+def get_public_names(module):
+    """
+    Returns public attributes of a module.
+
+    :param module: Module object
+    :return: Dict with attribute name as key and attribute as value.
+    :rtype: dict
+    """
+    return {name: value for name, value in vars(module).items() if not name.startswith('_')}
+
+
+def get_approximate_size(*objs):
+    """
+    Returns approximate size of objects in bytes. Each object is counted once. Classes and instances include
+    their attributes dictionary and its values. Modules include their attributes dictionary and classes and
+    functions defined on them.
+
+    :rtype: int
+    """
+    seen = set()
+    size = 0
+
+    def add(obj):
+        nonlocal size
+        if id(obj) in seen:
+            return False
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        return True
+
+    for obj in objs:
+        if not add(obj):
+            continue
+        if isinstance(obj, type(sys)):
+            attrs = vars(obj)
+            add(attrs)
+            for value in attrs.values():
+                if getattr(value, '__module__', None) == obj.__name__ and add(value) and isinstance(value, type):
+                    add(value.__dict__)
+                    list(map(add, value.__dict__.values()))
+        elif hasattr(obj, '__dict__'):
+            add(obj.__dict__)
+            list(map(add, vars(obj).values()))
+
+    return size
+
+
+def make_hashable(value):
+    """
+    Returns a hashable and canonical representation of a value. Dictionaries, lists, tuples and sets are
+    converted recursively, and types are kept in order to not mix up equal values of different types
+    (for example, ``1`` and ``True``).
+
+    :raises TypeError: If value could not be hashed.
+    """
+    if isinstance(value, dict):
+        return dict, tuple(sorted(((make_hashable(key), make_hashable(item)) for key, item in value.items()),
+                                  key=repr))
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(make_hashable(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return type(value), frozenset(make_hashable(item) for item in value)
+    hash(value)
+    return type(value), value
+
+
+def is_current(obj, module_name=None, attr=None):
+    """
+    Checks whether an object is still bound on its module, using its ``__module__`` and ``__qualname__``,
+    or on module attribute where it was loaded from, if it is given (so classes bound to another name, like
+    ``Point = namedtuple('P', ...)``, are checked too). It is false when module was reloaded and name is bound
+    to a new object, or when module was removed or replaced on ``sys.modules``. Objects which could not be
+    checked (local classes, instances, etc) are considered current.
+
+    :param obj: Object to check.
+    :param module_name: Name of module where object was loaded from.
+    :type module_name: str
+    :param attr: Name of module attribute where object was loaded from.
+    :type attr: str
+    :rtype: bool
+    """
+    if module_name is not None and getattr(sys.modules.get(module_name), attr, None) is obj:
+        return True
+    try:
+        module_name = obj.__module__
+        qualname = obj.__qualname__
+    except AttributeError:
+        return True
+    if not isinstance(module_name, str) or not isinstance(qualname, str) or '<' in qualname:
+        return True
+
+    value = sys.modules.get(module_name)
+    for attr in qualname.split('.'):
+        value = getattr(value, attr, None)
+    return value is obj
+
+
+def get_origin(module_name, classpath):
+    """
+    Returns name of module and name of attribute where a class path is loaded from, when it is looked for
+    in a registered module.
+
+    :param module_name: Registered module name.
+    :type module_name: str
+    :param classpath: Class path, relative to registered module.
+    :type classpath: str
+    :rtype: tuple
+    """
+    if '.' not in classpath:
+        return module_name, classpath
+    path, attr = classpath.rsplit('.', 1)
+    if not path.startswith('.'):
+        return '{0}.{1}'.format(module_name, path), attr
+
+    from importlib.util import resolve_name
+    return resolve_name(path, module_name), attr
+
+
+def make_params_key(*args, **kwargs):
+    """
+    Returns a hashable and canonical representation of call parameters.
+
+    :raises TypeError: If some parameter could not be hashed.
+    """
+    return make_hashable(args), make_hashable(kwargs)
+
+
+def is_async_factory(factory):
+    """
+    Returns whether a factory is async, so objects it returns must be awaited. Classes are never async
+    factories, even if their instances are async callables. Objects returned by sync factories are never
+    awaited, even if they are awaitable.
+
+    :rtype: bool
+    """
+    if isinstance(factory, type):
+        return False
+
+    # It is imported lazily, because importing it is slow.
+    import inspect
+    return inspect.iscoroutinefunction(factory) or inspect.iscoroutinefunction(getattr(factory, '__call__', None))
+
+
+def get_module_name(module):
+    """
+    Returns canonical name of a registered module (string or module object).
+
+    :rtype: str
+    """
+    return module if isinstance(module, str) else module.__name__
+
+
+def import_registered_module(module):
+    """
+    Returns module object of a registered module, importing it if it is a string.
+    """
+    return importlib.import_module(module) if isinstance(module, str) else module
+
+
+def get_namespace_chain(namespace, namespaces):
+    """
+    Returns a namespace and its registered ancestors, from nearest to farthest. Ancestors of ``org.team.app``
+    are ``org.team`` and ``org``.
+
+    :param namespace: Namespace tag.
+    :type namespace: str
+    :param namespaces: Registered namespaces.
+    :type namespaces: dict
+    :rtype: list
+    """
+    chain = [namespace]
+    while '.' in namespace:
+        namespace = namespace.rsplit('.', 1)[0]
+        if namespace in namespaces:
+            chain.append(namespace)
+    return chain
+
+
+def get_class(module, classpath):
+    """
+    Returns a class from an already imported module. Dotted class paths are imported relative to module.
+    """
+    if '.' in classpath:
+        return import_class(classpath, module.__name__)
+    return getattr(module, classpath)
+
+
 def import_class(classpath, package=None):
     """
     Load and return a class
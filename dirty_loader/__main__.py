@@ -0,0 +1,128 @@
+"""
+Command line tools.
+
+.. code-block:: bash
+
+    $ python -m dirty_loader profile -m myapp.plugins -m myapp.core --logging --instantiate config.yaml
+    $ python -m dirty_loader benchmark -m myapp.plugins --cached --threads 1,2,4,8 SomeClass OtherClass
+    $ python -m dirty_loader validate -m myapp.plugins --cached --jobs 8 tenants/*.yaml
+"""
+import argparse
+import sys
+from functools import partial
+
+from . import Loader, LoaderCached, LoaderNamespace, LoaderNamespaceCached, LoaderNamespaceReversed, \
+    LoaderNamespaceReversedCached, LoaderReversed, LoaderReversedCached
+from .config import iter_descriptors, load_config
+
+LOADERS = {(False, False, False): Loader,
+           (False, False, True): LoaderCached,
+           (False, True, False): LoaderReversed,
+           (False, True, True): LoaderReversedCached,
+           (True, False, False): LoaderNamespace,
+           (True, False, True): LoaderNamespaceCached,
+           (True, True, False): LoaderNamespaceReversed,
+           (True, True, True): LoaderNamespaceReversedCached}
+
+
+def add_registry_arguments(parser):
+    parser.add_argument('-m', '--module', action='append', default=[], dest='modules',
+                        help='Module to register. It could be used several times.')
+    parser.add_argument('-n', '--namespace', action='append', default=[], dest='namespaces',
+                        metavar='NAMESPACE=MODULE',
+                        help='Namespace to register. It could be used several times.')
+    parser.add_argument('--reversed', action='store_true', help='Use a reversed loader.')
+    parser.add_argument('--cached', action='store_true', help='Use a cached loader.')
+    parser.add_argument('--logging', action='store_true', help='Register logging factories.')
+
+
+def build_loader(args):
+    """
+    Builds a loader from command line arguments.
+    """
+    loader = LOADERS[(bool(args.namespaces), args.reversed, args.cached)]()
+    for namespace in args.namespaces:
+        namespace, _, module = namespace.partition('=')
+        loader.register_namespace(namespace, module or namespace)
+    for module in args.modules:
+        loader.register_module(module)
+
+    if args.logging:
+        from .logging_factories import register_logging_factories
+        register_logging_factories(loader)
+
+    return loader
+
+
+def profile(args):
+    from .profiler import ResolutionProfiler
+
+    loader = build_loader(args)
+    profiler = ResolutionProfiler(loader)
+    profiler.profile_imports()
+    for path in args.configs:
+        profiler.profile_descriptors((('{0}:{1}'.format(path, name), desc)
+                                      for name, desc in iter_descriptors(load_config(path))),
+                                     instantiate=args.instantiate)
+
+    sys.stdout.write(profiler.report(top=args.top))
+    return 1 if profiler.errors else 0
+
+
+def benchmark(args):
+    from .profiler import benchmark_threads, format_benchmark
+
+    loader = build_loader(args)
+    thread_counts = [int(count) for count in args.threads.split(',')]
+    results = benchmark_threads(loader, args.classnames, thread_counts=thread_counts, lookups=args.lookups)
+
+    sys.stdout.write(format_benchmark(results))
+    return 0
+
+
+def validate(args):
+    from .validation import format_validation, is_valid, validate_files
+
+    # Only registry arguments are sent to worker processes.
+    registry_args = argparse.Namespace(modules=args.modules, namespaces=args.namespaces, reversed=args.reversed,
+                                       cached=args.cached, logging=args.logging)
+    reports = validate_files(partial(build_loader, registry_args), args.configs, processes=args.jobs)
+
+    sys.stdout.write(format_validation(reports, errors_only=args.errors_only))
+    return 0 if all(is_valid(report) for report in reports) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m dirty_loader')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    profile_parser = subparsers.add_parser('profile', help='Profile resolution of configuration files.')
+    add_registry_arguments(profile_parser)
+    profile_parser.add_argument('--instantiate', action='store_true', help='Build objects, too.')
+    profile_parser.add_argument('--top', type=int, default=None, help='Entries to show on each section.')
+    profile_parser.add_argument('configs', nargs='+', metavar='CONFIG', help='JSON or YAML configuration file.')
+    profile_parser.set_defaults(func=profile)
+
+    benchmark_parser = subparsers.add_parser('benchmark', help='Measure lookup throughput using several threads.')
+    add_registry_arguments(benchmark_parser)
+    benchmark_parser.add_argument('--threads', default='1,2,4,8',
+                                  help='Comma separated number of threads of each run. By default: 1,2,4,8.')
+    benchmark_parser.add_argument('--lookups', type=int, default=100000, help='Number of lookups of each run.')
+    benchmark_parser.add_argument('classnames', nargs='+', metavar='CLASSNAME', help='Class name to look for.')
+    benchmark_parser.set_defaults(func=benchmark)
+
+    validate_parser = subparsers.add_parser('validate', help='Validate configuration files without building objects.')
+    add_registry_arguments(validate_parser)
+    validate_parser.add_argument('-j', '--jobs', type=int, default=None,
+                                 help='Number of worker processes. By default, number of CPUs.')
+    validate_parser.add_argument('--errors-only', action='store_true', help='Show only items with errors.')
+    validate_parser.add_argument('configs', nargs='+', metavar='CONFIG', help='JSON or YAML configuration file.')
+    validate_parser.set_defaults(func=validate)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Plugin archives. A plugin archive is a zip file with plugin modules and an index of public names exported by
+each one, which is built when archive is built. Archives are registered on loaders as a single module whose
+attributes are resolved through index, so only module which exports a requested name is imported (using
+``zipimport``). So, there is no need to look for classes on every plugin module, and plugin files are read
+from one archive.
+
+Archive modules are loaded by a ``zipimport.zipimporter`` of archive, not through ``sys.path``, so modules
+with same name elsewhere never shadow them.
+"""
+import ast
+import json
+import os
+import re
+import sys
+import threading
+import types
+import zipfile
+import zipimport
+from importlib.util import module_from_spec
+
+
+INDEX_NAME = 'dirty_loader_index.json'
+
+# Archive modules are checked, executed and added to sys.modules while it is held, so threads importing same
+# module get same module object. It is reentrant, because parent packages and archive modules imported while a
+# module is executed are imported by same thread.
+_import_lock = threading.RLock()
+
+
+def get_exported_names(source):
+    """
+    Returns public names exported by a module, parsing its source. If module defines ``__all__`` as a literal,
+    it is used. Otherwise, public names bound at module level are returned (classes, functions, assignments
+    and imports).
+
+    :param source: Python source.
+    :type source: str or bytes
+    :rtype: list
+    """
+    tree = ast.parse(source)
+    names = []
+
+    def add(name):
+        if not name.startswith('_') and name not in names:
+            names.append(name)
+
+    for node in tree.body:
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            add(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                if not isinstance(target, ast.Name):
+                    continue
+                if target.id == '__all__' and node.value is not None:
+                    try:
+                        return list(ast.literal_eval(node.value))
+                    except ValueError:
+                        pass
+                add(target.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name != '*':
+                    add(alias.asname or alias.name.split('.')[0])
+
+    return names
+
+
+def build_archive(path, source_dir, compression=zipfile.ZIP_DEFLATED):
+    """
+    Builds a plugin archive from a directory of python modules and packages.
+
+    :param path: Archive path.
+    :type path: str
+    :param source_dir: Directory where top level modules and packages live.
+    :type source_dir: str
+    :param compression: Zip compression method.
+    :type compression: int
+    :return: Index. Dict with module name as key and list of exported names as value.
+    :rtype: dict
+    """
+    index = {}
+    with zipfile.ZipFile(path, 'w', compression=compression) as archive:
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+            for filename in sorted(files):
+                if not filename.endswith('.py'):
+                    continue
+                file_path = os.path.join(root, filename)
+                arcname = os.path.relpath(file_path, source_dir).replace(os.sep, '/')
+
+                parts = arcname[:-3].split('/')
+                if parts[-1] == '__init__':
+                    parts.pop()
+                module_name = '.'.join(parts)
+
+                with open(file_path, 'rb') as f:
+                    source = f.read()
+                archive.writestr(arcname, source)
+                index[module_name] = get_exported_names(source)
+
+        archive.writestr(INDEX_NAME, json.dumps({'modules': index}, indent=1, sort_keys=True))
+
+    return index
+
+
+class PluginArchive:
+
+    """
+    Plugin archive. Its index is read once, when it is opened.
+    """
+
+    def __init__(self, path):
+        """
+        PluginArchive initialitzer.
+
+        :param path: Archive path.
+        :type path: str
+        """
+        self.path = os.path.abspath(path)
+        with zipfile.ZipFile(self.path) as archive:
+            self.index = json.loads(archive.read(INDEX_NAME).decode('utf-8'))['modules']
+
+        self._names = {}
+        for module_name in sorted(self.index, key=lambda name: (name.count('.'), name)):
+            for name in self.index[module_name]:
+                self._names.setdefault(name, module_name)
+
+    def get_module_name(self, name):
+        """
+        Returns name of module which exports a name. Top level modules have preference.
+
+        :param name: Exported name.
+        :type name: str
+        :return: Module name or None if name is not exported by any module.
+        :rtype: str
+        """
+        return self._names.get(name)
+
+    def install(self):
+        """
+        Adds archive to import paths, after other paths. It is not needed by loaders, but it allows to import
+        archive modules which are not imported yet using ``import`` statement.
+        """
+        if self.path not in sys.path:
+            sys.path.append(self.path)
+
+    def import_module(self, module_name):
+        """
+        Imports a module from archive using ``zipimport``. Its parent packages are imported first. It is thread
+        safe: a module is only executed once, and every thread gets same module object.
+
+        :param module_name: Module name.
+        :type module_name: str
+        :rtype: module
+        :raises ImportError: If module is not in archive, or a module with same name, not loaded from archive,
+            was already imported.
+        """
+        with _import_lock:
+            return self._import_module(module_name)
+
+    def _import_module(self, module_name):
+        module = sys.modules.get(module_name)
+        if module is not None:
+            if not (getattr(module, '__file__', None) or '').startswith(self.path + os.sep):
+                raise ImportError("Module '{0}' was already imported from outside of archive "
+                                  "'{1}'.".format(module_name, self.path), name=module_name)
+            return module
+
+        parent, _, child = module_name.rpartition('.')
+        if parent:
+            self._import_module(parent)
+        importer = zipimport.zipimporter(os.path.join(self.path, *parent.split('.')) if parent else self.path)
+
+        if hasattr(importer, 'find_spec'):
+            spec = importer.find_spec(module_name)
+            if spec is None:
+                raise ImportError("No module named '{0}' in archive '{1}'.".format(module_name, self.path),
+                                  name=module_name)
+            module = module_from_spec(spec)
+            sys.modules[module_name] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                sys.modules.pop(module_name, None)
+                raise
+        else:
+            # Python < 3.10
+            module = importer.load_module(module_name)
+
+        if parent:
+            setattr(sys.modules[parent], child, module)
+        return module
+
+    def make_module(self, name=None, install=True):
+        """
+        Builds a module whose attributes are resolved through index and loaded from archive modules on first
+        access.
+
+        :param name: Module name. By default, it is built from archive file name.
+        :type name: str
+        :param install: Whether to add module to ``sys.modules``, in order to allow loaders to import it.
+        :type install: bool
+        :rtype: module
+        """
+        if name is None:
+            stem = os.path.splitext(os.path.basename(self.path))[0]
+            name = 'dirty_loader_archive_{0}'.format(re.sub(r'\W', '_', stem))
+
+        module = types.ModuleType(name, "Plugin archive {0}.".format(self.path))
+        module.__plugin_archive__ = self
+
+        def __getattr__(attr):
+            module_name = self.get_module_name(attr)
+            if module_name is None:
+                raise AttributeError("module '{0}' has no attribute '{1}'".format(name, attr))
+            value = getattr(self.import_module(module_name), attr)
+            setattr(module, attr, value)
+            return value
+
+        module.__getattr__ = __getattr__
+
+        if install:
+            sys.modules[name] = module
+
+        return module
+
+
+def register_archive(loader, path, namespace=None, idx=-1):
+    """
+    Registers a plugin archive on a loader. On namespace loaders, it is registered using a namespace tag.
+
+    **Example**:
+
+    .. code-block:: python
+
+        build_archive('plugins.zip', 'src/plugins')
+
+        register_archive(loader, 'plugins.zip')
+        loader.load_class('SomePlugin')
+
+    :param loader: Loader where you want to register archive.
+    :param path: Archive path.
+    :type path: str
+    :param namespace: Namespace tag. By default, archive module name.
+    :type namespace: str
+    :param idx: Position where archive is inserted. By default it is inserted at the end.
+    :type idx: int
+    :return: Archive module.
+    :rtype: module
+    """
+    module = PluginArchive(path).make_module(install=False)
+
+    if hasattr(loader, 'register_namespace'):
+        loader.register_namespace(namespace or module.__name__, module)
+    else:
+        loader.register_module(module, idx)
+
+    sys.modules[module.__name__] = module
+    return module
@@ -0,0 +1,224 @@
+"""
+Ahead-of-time code generation. It resolves classes of a set of descriptors using a loader, without building
+them, and generates a plain python module which builds same objects using direct imports and constructor calls.
+Objects built by custom factories are built calling factories directly, with a frozen loader which only knows
+classes resolved from descriptors, including nested ones.
+"""
+import ast
+import importlib
+import keyword
+import types
+
+from . import DirtyLoaderException, NoRegisteredError, ResolutionRecorder, find_factory
+from .factories import copy_instance_params
+
+HEADER = '''"""
+Generated by dirty_loader.codegen. Do not edit.
+"""
+'''
+
+
+class CodegenError(DirtyLoaderException):
+    pass
+
+
+class ModuleGenerator:
+
+    """
+    Generates a python module which builds objects described by descriptors.
+    """
+
+    def __init__(self, loader, descriptors):
+        """
+        ModuleGenerator initialitzer.
+
+        :param loader: Loader used to resolve classes.
+        :param descriptors: Dict with variable name as key and descriptor as value. Descriptors use same
+            formats accepted by :func:`dirty_loader.factories.instance_params`.
+        :type descriptors: dict
+        """
+        self.loader = loader
+        self.descriptors = descriptors
+        self._imports = []
+        self._aliases = {}
+        self._modules = {}
+
+    def generate(self):
+        """
+        Generates module source.
+
+        :return: Python source.
+        :rtype: str
+        """
+        self._imports = []
+        self._aliases = {}
+        self._modules = {}
+
+        items = []
+        with ResolutionRecorder(self.loader) as recorder:
+            for name, desc in self.descriptors.items():
+                if not name.isidentifier() or keyword.iskeyword(name):
+                    raise CodegenError("Name '{0}' is not a valid identifier.".format(name))
+                classname, params = copy_instance_params(desc)
+                items.append((name, self.loader.load_class(classname), params))
+            classnames = set(recorder.resolutions)
+            self._resolve_nested(params for _, _, params in items)
+
+        resolutions = {classname: klass for classname, klass in recorder.resolutions.items()
+                       if classname in classnames or callable(klass)}
+        factories = {check: factory for check, factory in self.loader._factories.items()
+                     if any(isinstance(klass, type) and issubclass(klass, check) for klass in resolutions.values())}
+
+        lines = ['RESOLUTIONS = {']
+        lines.extend('    {0}: {1},'.format(repr(classname), self._alias(klass))
+                     for classname, klass in resolutions.items())
+        lines.append('}')
+        lines.append('')
+        lines.append('_loader = FrozenLoader(factories={')
+        lines.extend('    {0}: {1},'.format(self._alias(check), self._alias(factory))
+                     for check, factory in factories.items())
+        lines.append('}, classes=RESOLUTIONS)')
+        lines.append('')
+
+        for name, klass, params in items:
+            factory = find_factory(factories, klass) if isinstance(klass, type) else None
+            if factory is None:
+                call = self._alias(klass)
+            else:
+                call = '{0}(_loader, {1})'.format(self._alias(factory), self._alias(klass))
+            lines.append('{0} = {1}({2})'.format(name, call, self._render_params(params)))
+
+        header = [HEADER, 'from dirty_loader import FrozenLoader']
+        header.extend(self._imports)
+        header.append('')
+        header.extend('{0} = {1}'.format(alias, path) for alias, path in self._aliases.values())
+        header.append('')
+
+        return '\n'.join(header + lines) + '\n'
+
+    def _resolve_nested(self, values):
+        """
+        Resolves classes of descriptors nested on parameters, without building them, so frozen loader knows
+        them. Factories decide which parameters are descriptors, so every string and dictionary is tried:
+        values which are not resolved by loader are literal parameters.
+        """
+        for value in values:
+            if isinstance(value, list):
+                self._resolve_nested(value)
+                continue
+            if isinstance(value, dict):
+                self._resolve_nested(value.values())
+                if not value:
+                    continue
+                value = copy_instance_params(value)[0]
+            if not isinstance(value, str):
+                continue
+            try:
+                self.loader.load_class(value)
+            except (ImportError, NoRegisteredError):
+                pass
+
+    def _alias(self, obj):
+        try:
+            return self._aliases[id(obj)][0]
+        except KeyError:
+            pass
+
+        module_name = getattr(obj, '__module__', None)
+        qualname = getattr(obj, '__qualname__', None)
+        if not module_name or not qualname or '<' in qualname:
+            raise CodegenError("Object '{0!r}' could not be imported.".format(obj))
+
+        value = importlib.import_module(module_name)
+        for attr in qualname.split('.'):
+            value = getattr(value, attr, None)
+        if value is not obj:
+            raise CodegenError("Object '{0!r}' could not be imported from '{1}'.".format(obj, module_name))
+
+        try:
+            module_alias = self._modules[module_name]
+        except KeyError:
+            module_alias = self._modules[module_name] = '_module_{0}'.format(len(self._modules))
+            self._imports.append('import {0} as {1}'.format(module_name, module_alias))
+
+        alias = '_{0}_{1}'.format('class' if isinstance(obj, type) else 'object', len(self._aliases))
+        self._aliases[id(obj)] = (alias, '{0}.{1}'.format(module_alias, qualname))
+        return alias
+
+    def _render_params(self, params):
+        result = []
+        for key, value in params.items():
+            source = repr(value)
+            try:
+                valid = ast.literal_eval(source) == value
+            except (ValueError, SyntaxError):
+                valid = False
+            if not valid:
+                raise CodegenError("Parameter '{0}' could not be rendered as a literal.".format(key))
+            result.append('{0}={1}'.format(key, source))
+        return ', '.join(result)
+
+
+def generate_module(loader, descriptors, verify=True):
+    """
+    Generates a python module which builds objects described by descriptors. Objects are only built once,
+    when generated module is verified.
+
+    :param loader: Loader used to resolve classes.
+    :param descriptors: Dict with variable name as key and descriptor as value.
+    :type descriptors: dict
+    :param verify: Whether to execute generated module and check it against loader.
+    :type verify: bool
+    :return: Python source.
+    :rtype: str
+    """
+    source = ModuleGenerator(loader, descriptors).generate()
+
+    if verify:
+        module = types.ModuleType('dirty_loader_generated')
+        exec(compile(source, '<dirty_loader_generated>', 'exec'), vars(module))
+        errors = verify_module(module, loader, descriptors)
+        if errors:
+            raise CodegenError("Generated module does not match loader: {0}".format('; '.join(errors)))
+
+    return source
+
+
+def verify_module(module, loader, descriptors):
+    """
+    Checks a generated module against what loader would resolve. Objects are not built again: each object of
+    module must be an instance of class loader resolves for its descriptor.
+
+    :param module: Generated module.
+    :param loader: Loader
+    :param descriptors: Dict with variable name as key and descriptor as value.
+    :type descriptors: dict
+    :return: List of errors. It is empty when module matches loader.
+    :rtype: list
+    """
+    errors = []
+    for classname, klass in module.RESOLUTIONS.items():
+        try:
+            expected = loader.load_class(classname)
+        except ImportError:
+            errors.append("Class '{0}' could not be loaded.".format(classname))
+            continue
+        if expected is not klass:
+            errors.append("Class '{0}' is resolved to {1!r} instead of {2!r}.".format(classname, expected, klass))
+
+    for name, desc in descriptors.items():
+        classname, _ = copy_instance_params(desc)
+        try:
+            expected = loader.load_class(classname)
+        except ImportError:
+            errors.append("Class '{0}' could not be loaded.".format(classname))
+            continue
+        try:
+            obj = getattr(module, name)
+        except AttributeError:
+            errors.append("Object '{0}' is not defined.".format(name))
+            continue
+        if isinstance(expected, type) and not isinstance(obj, expected):
+            errors.append("Object '{0}' is an instance of {1!r} instead of {2!r}.".format(name, type(obj), expected))
+
+    return errors
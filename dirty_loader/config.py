@@ -0,0 +1,42 @@
+"""
+Configuration files helpers. Configuration files could be JSON or YAML (it requires ``PyYAML`` package) and
+they must contain a dictionary of named descriptors or a list of descriptors.
+"""
+import json
+import os
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def load_config(path):
+    """
+    Loads a configuration file. Format is chosen using file extension.
+
+    :param path: File path.
+    :type path: str
+    :return: Configuration data.
+    """
+    with open(path) as f:
+        if os.path.splitext(path)[1].lower() in ('.yml', '.yaml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ConfigError("PyYAML package is required in order to load '{0}'.".format(path))
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def iter_descriptors(config):
+    """
+    Iterates over descriptors of configuration data.
+
+    :param config: Dictionary of named descriptors or list of descriptors.
+    :return: Iterator of descriptor path and descriptor pairs.
+    """
+    if isinstance(config, dict):
+        return iter(config.items())
+    if isinstance(config, list):
+        return (('[{0}]'.format(idx), desc) for idx, desc in enumerate(config))
+    raise ConfigError("Configuration must be a dictionary or a list of descriptors.")
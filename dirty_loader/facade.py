@@ -0,0 +1,47 @@
+"""
+Lazy facade modules. Attributes of a facade module are resolved through a loader on first access
+(PEP 562), so nothing is imported until it is used.
+"""
+import sys
+import types
+
+
+def make_facade_module(loader, name, install=True):
+    """
+    Builds a module whose attributes are loaded from a loader on first access and then kept on module.
+
+    **Example**:
+
+    .. code-block:: python
+
+        make_facade_module(loader, 'plugins')
+
+        from plugins import SomeClass
+
+    :param loader: Loader used to resolve attributes.
+    :param name: Module name.
+    :type name: str
+    :param install: Whether to add module to ``sys.modules``, in order to allow importing it.
+    :type install: bool
+    :return: Facade module.
+    :rtype: module
+    """
+    module = types.ModuleType(name, "Lazy facade of {0}.".format(type(loader).__name__))
+    module.__loader_facade__ = loader
+
+    def __getattr__(attr):
+        if attr.startswith('__'):
+            raise AttributeError("module '{0}' has no attribute '{1}'".format(name, attr))
+        try:
+            value = loader.load_class(attr)
+        except ImportError:
+            raise AttributeError("module '{0}' has no attribute '{1}'".format(name, attr))
+        setattr(module, attr, value)
+        return value
+
+    module.__getattr__ = __getattr__
+
+    if install:
+        sys.modules[name] = module
+
+    return module
@@ -1,4 +1,13 @@
-import logging
+"""
+Factories base classes. Logging factories live on :mod:`dirty_loader.logging_factories`, so logging package is
+only imported when they are used. They are still available from this module.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from . import make_params_key
 
 
 def instance_params(desc):
@@ -17,11 +26,45 @@ def instance_params(desc):
     return klass, params
 
 
+def copy_descriptor(desc):
+    """
+    Copies dictionaries and lists of a descriptor, at any depth, so it could be consumed by factories without
+    modifying original one. Other values (for example, already built objects) are kept by reference.
+    """
+    if isinstance(desc, dict):
+        return {key: copy_descriptor(value) for key, value in desc.items()}
+    if isinstance(desc, list):
+        return [copy_descriptor(item) for item in desc]
+    return desc
+
+
+def copy_instance_params(desc):
+    """
+    Returns class name and parameters of a descriptor, like :func:`instance_params`, without modifying
+    descriptor. Parameters are copied using :func:`copy_descriptor`.
+
+    :rtype: tuple
+    """
+    return instance_params(copy_descriptor(desc))
+
+
+def get_item_path(path, key):
+    """
+    Returns descriptor path of an item of a list (``handlers[3]``) or of a dictionary (``filters.name``).
+    """
+    if isinstance(key, int):
+        return '{0}[{1}]'.format(path or '', key)
+    return '{0}.{1}'.format(path, key) if path else str(key)
+
+
 class BaseFactory:
     """
     Base class factory. It should be used in order to implement specific ones.
     """
 
+    concurrency = 10
+    """Maximum number of sibling items built at same time by async methods."""
+
     def __init__(self, loader, klass):
         self.loader = loader
         self.klass = klass
@@ -29,70 +72,235 @@ class BaseFactory:
     def __call__(self, *args, **kwargs):
         return self.klass(*args, **kwargs)
 
-    def load_item(self, item, allowed_classes=tuple()):
+    def load_item(self, item, allowed_classes=tuple(), path=None):
+        """
+        Builds an item from its descriptor, unless it is already an instance of allowed classes.
+
+        :param path: Descriptor path of item relative to object being built (``formatter``, ``handlers[3]``).
+            It is only used when loader is traced (see :mod:`dirty_loader.tracing`).
+        :type path: str
+        """
         if isinstance(item, allowed_classes):
             return item
         klass, params = instance_params(item)
-        return self.loader.factory(klass, **params)
+        tracer = getattr(self.loader, 'tracer', None)
+        if tracer is None:
+            return self.loader.factory(klass, **params)
+        with tracer.span('load_item', path=path, classname=klass):
+            return self.loader.factory(klass, **params)
 
-    def iter_loaded_item_list(self, item_list, allowed_classes=tuple()):
+    def iter_loaded_item_list(self, item_list, allowed_classes=tuple(), path=None):
         try:
-            for item in item_list:
-                yield self.load_item(item, allowed_classes)
+            for i, item in enumerate(item_list):
+                yield self.load_item(item, allowed_classes, path=get_item_path(path, i))
         except TypeError:
             pass
 
-    def iter_loaded_named_item_list(self, item_list, allowed_classes=tuple()):
+    def iter_loaded_named_item_list(self, item_list, allowed_classes=tuple(), path=None):
         try:
             for name, item in item_list.items():
-                yield name, self.load_item(item, allowed_classes)
+                yield name, self.load_item(item, allowed_classes, path=get_item_path(path, name))
         except AttributeError:
             pass
 
+    async def aload_item(self, item, allowed_classes=tuple(), path=None):
+        """
+        Async version of ``load_item``. Async factories are awaited.
+        """
+        if isinstance(item, allowed_classes):
+            return item
+        klass, params = instance_params(item)
+        tracer = getattr(self.loader, 'tracer', None)
+        if tracer is None:
+            return await self.loader.afactory(klass, **params)
+        with tracer.span('load_item', path=path, classname=klass):
+            return await self.loader.afactory(klass, **params)
 
-class BaseLoggingFactory(BaseFactory):
+    async def aload_item_list(self, item_list, allowed_classes=tuple(), path=None):
+        """
+        Async version of ``iter_loaded_item_list``. Items are built concurrently, but no more than
+        ``concurrency`` at same time.
 
-    def add_filters(self, obj, filters):
-        list(map(obj.addFilter, self.iter_loaded_item_list(filters, logging.Filter)))
+        :return: List of built items, in same order.
+        :rtype: list
+        """
+        try:
+            items = list(item_list)
+        except TypeError:
+            return []
+        return await self._gather([self.aload_item(item, allowed_classes, path=get_item_path(path, i))
+                                   for i, item in enumerate(items)])
 
+    async def aload_named_item_list(self, item_list, allowed_classes=tuple(), path=None):
+        """
+        Async version of ``iter_loaded_named_item_list``. Items are built concurrently, but no more than
+        ``concurrency`` at same time.
 
-class LoggerFactory(BaseLoggingFactory):
-    """
-    Logger factory.
-    """
+        :return: Dict of built items.
+        :rtype: dict
+        """
+        try:
+            items = list(item_list.items())
+        except AttributeError:
+            return {}
+        results = await self._gather([self.aload_item(item, allowed_classes, path=get_item_path(path, name))
+                                      for name, item in items])
+        return {name: result for (name, _), result in zip(items, results)}
+
+    async def _gather(self, coros):
+        import asyncio
 
-    def __call__(self, name, propagate=True, level=logging.DEBUG, handlers=None, filters=None):
-        logger = logging.getLogger(name)
-        logger.propagate = propagate
-        logger.setLevel(level)
+        semaphore = asyncio.Semaphore(self.concurrency)
 
-        list(map(logger.addHandler, self.iter_loaded_item_list(handlers, logging.Handler)))
-        self.add_filters(logger, filters)
+        async def run(coro):
+            async with semaphore:
+                return await coro
 
-        return logger
+        return await asyncio.gather(*[run(coro) for coro in coros])
 
 
-class LoggingHandlerFactory(BaseLoggingFactory):
+class AsyncFactory(BaseFactory):
     """
-    Logger handle factory.
+    Base class for async factories. They must be used with ``afactory`` method of loaders, which awaits them.
+    It should be used in order to implement factories for classes which must do I/O on creation.
     """
 
-    def __call__(self, formatter=None, filters=None, *args, **kwargs):
-        handler = self.klass(*args, **kwargs)
+    async def __call__(self, *args, **kwargs):
+        return self.klass(*args, **kwargs)
+
 
-        if formatter:
-            handler.setFormatter(self.load_item(formatter, logging.Formatter))
+class PooledFactory(BaseFactory):
+    """
+    Factory which keeps a pool of idle instances, keyed by class and parameters. Instances are only pooled
+    when they are taken using ``acquire`` or ``take`` methods. They are referenced by pool until they are
+    released, so they must be always released. Plain factory calls (``loader.factory``, ``load_item``)
+    always build new instances which are never referenced by pool. Instances built using unhashable
+    parameters are not pooled.
 
-        self.add_filters(handler, filters)
+    Pool options are class attributes, so they could be set using ``configure`` class method:
 
-        return handler
+    .. code-block:: python
 
+        loader.register_factory(Parser, PooledFactory.configure(max_size=16, idle_timeout=60))
 
-def register_logging_factories(loader):
-    """
-    Registers default factories for logging standard package.
+        with loader.get_factory_by_class(Parser).acquire(grammar='foo') as parser:
+            parser.parse(data)
 
-    :param loader: Loader where you want register default logging factories
+    Pools live on factory instances, so they should be used with cached loaders.
     """
-    loader.register_factory(logging.Logger, LoggerFactory)
-    loader.register_factory(logging.Handler, LoggingHandlerFactory)
+
+    max_size = 8
+    """Maximum number of idle instances kept on pool."""
+
+    idle_timeout = None
+    """Seconds an instance could be idle before being evicted. None means forever."""
+
+    def __init__(self, *args, **kwargs):
+        super(PooledFactory, self).__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._idle = OrderedDict()
+        self._idle_by_key = {}
+        self._acquired = {}
+
+    @classmethod
+    def configure(cls, **options):
+        """
+        Returns a subclass with given pool options.
+
+        :rtype: type
+        """
+        return type(cls.__name__, (cls,), options)
+
+    def take(self, *args, **kwargs):
+        """
+        Takes an instance from pool: an idle one built using same parameters, or a new one. It must be
+        released using ``release`` method.
+        """
+        try:
+            key = (self.klass, make_params_key(*args, **kwargs))
+        except TypeError:
+            return self(*args, **kwargs)
+
+        with self._lock:
+            self._evict_expired()
+            idle_ids = self._idle_by_key.get(key)
+            if idle_ids:
+                obj_id, _ = idle_ids.popitem()
+                if not idle_ids:
+                    del self._idle_by_key[key]
+                _, obj, _ = self._idle.pop(obj_id)
+                self._acquired[obj_id] = (key, obj)
+                return obj
+
+        obj = self(*args, **kwargs)
+        with self._lock:
+            self._acquired[id(obj)] = (key, obj)
+        return obj
+
+    def release(self, obj):
+        """
+        Returns an instance to pool. Instances which were not taken from pool are ignored.
+        """
+        with self._lock:
+            try:
+                key, _ = self._acquired.pop(id(obj))
+            except KeyError:
+                return
+            self._idle[id(obj)] = (key, obj, time.monotonic())
+            self._idle_by_key.setdefault(key, OrderedDict())[id(obj)] = None
+            while len(self._idle) > self.max_size:
+                self._evict(next(iter(self._idle)))
+
+    @contextmanager
+    def acquire(self, *args, **kwargs):
+        """
+        Context manager which takes an instance from pool and releases it on exit.
+        """
+        obj = self.take(*args, **kwargs)
+        try:
+            yield obj
+        finally:
+            self.release(obj)
+
+    def get_idle_count(self):
+        """
+        Returns number of idle instances on pool.
+
+        :rtype: int
+        """
+        return len(self._idle)
+
+    def evict_idle(self):
+        """
+        Evicts instances idle for longer than ``idle_timeout``.
+        """
+        with self._lock:
+            self._evict_expired()
+
+    def _evict_expired(self):
+        if self.idle_timeout is None:
+            return
+        limit = time.monotonic() - self.idle_timeout
+        while self._idle:
+            obj_id = next(iter(self._idle))
+            if self._idle[obj_id][2] > limit:
+                break
+            self._evict(obj_id)
+
+    def _evict(self, obj_id):
+        key, _, _ = self._idle.pop(obj_id)
+        idle_ids = self._idle_by_key[key]
+        del idle_ids[obj_id]
+        if not idle_ids:
+            del self._idle_by_key[key]
+
+
+_LOGGING_NAMES = ('BoundedQueueHandler', 'stop_queue_listeners', 'BaseLoggingFactory', 'LoggerFactory',
+                  'LoggingHandlerFactory', 'register_logging_factories')
+
+
+def __getattr__(name):
+    if name in _LOGGING_NAMES:
+        from . import logging_factories
+        return getattr(logging_factories, name)
+    raise AttributeError("module '{0}' has no attribute '{1}'".format(__name__, name))
@@ -0,0 +1,197 @@
+"""
+Object graphs built from descriptor trees. A descriptor tree is a dictionary of named descriptors or a list of
+descriptors. Every object built by loader while building a tree, including nested items built by factories, is
+recorded along with the class it was resolved to and its canonical parameters, so graphs could be rebuilt
+incrementally when tree changes.
+"""
+from collections import OrderedDict
+from copy import copy
+
+from . import make_params_key
+from .factories import BaseFactory, copy_descriptor, copy_instance_params
+
+
+class GraphNode:
+
+    """
+    Object built while building a graph, along with objects built in order to build it.
+    """
+
+    __slots__ = ('key', 'obj', 'children')
+
+    def __init__(self, key, obj, children=None):
+        self.key = key
+        self.obj = obj
+        self.children = children or []
+
+    def iter_nodes(self):
+        """
+        Iterates over node and its descendants, in pre-order.
+        """
+        yield self
+        for child in self.children:
+            yield from child.iter_nodes()
+
+
+class _GraphLoader:
+
+    """
+    Wrapper of a loader used while a graph is built. Objects are built through graph, and factories are
+    bound to wrapper, so nested items they build are recorded too. Other attributes are taken from loader,
+    which is not modified.
+    """
+
+    def __init__(self, loader, build):
+        self._loader = loader
+        self._build = build
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def factory(self, classname, *args, **kwargs):
+        return self._build(classname, *args, **kwargs)
+
+    def get_factory_by_class(self, klass):
+        factory = self._loader.get_factory_by_class(klass)
+        if isinstance(factory, BaseFactory):
+            factory = copy(factory)
+            factory.loader = self
+        return factory
+
+
+class ObjectGraph:
+
+    """
+    Objects built from a descriptor tree.
+
+    **Example**:
+
+    .. code-block:: python
+
+        graph = ObjectGraph(loader, config)
+        graph.items['logger']
+
+        # After configuration reload
+        graph = graph.rebuild(new_config)
+
+    Loader is not modified while a graph is built, so it could be used by other threads meanwhile.
+    """
+
+    def __init__(self, loader, tree, previous=None):
+        """
+        ObjectGraph initialitzer. It builds the graph.
+
+        :param loader: Loader used to build objects.
+        :param tree: Dictionary of named descriptors or list of descriptors.
+        :param previous: Previous graph. Objects built from same class and parameters are reused from it.
+        :type previous: ObjectGraph
+        """
+        self.loader = loader
+        self.tree = copy_descriptor(tree)
+        self.built = 0
+        self.reused = 0
+
+        self._reusable = OrderedDict()
+        self._consumed = set()
+        if previous is not None:
+            for node in previous.iter_nodes():
+                if node.key is not None:
+                    self._reusable.setdefault(node.key, []).append(node)
+
+        self.nodes = self._build(tree, previous)
+        if isinstance(self.nodes, dict):
+            self.items = OrderedDict((name, node.obj) for name, node in self.nodes.items())
+        else:
+            self.items = [node.obj for node in self.nodes]
+
+        del self._reusable, self._consumed
+
+    def rebuild(self, tree):
+        """
+        Builds a new graph from a new descriptor tree. Objects whose class and parameters did not change are
+        reused, at any depth, so only changed subtrees are built again. Current graph is not modified.
+
+        :param tree: Dictionary of named descriptors or list of descriptors.
+        :rtype: ObjectGraph
+        """
+        return type(self)(self.loader, tree, previous=self)
+
+    def iter_nodes(self):
+        """
+        Iterates over all nodes of graph, in pre-order.
+        """
+        for node in (self.nodes.values() if isinstance(self.nodes, dict) else self.nodes):
+            yield from node.iter_nodes()
+
+    def _build(self, tree, previous):
+        old_nodes = {}
+        if isinstance(tree, dict):
+            items = list(tree.items())
+            if previous is not None and isinstance(previous.nodes, dict):
+                old_nodes = previous.nodes
+        else:
+            items = list(enumerate(tree))
+            if previous is not None and not isinstance(previous.nodes, dict):
+                old_nodes = dict(enumerate(previous.nodes))
+
+        nodes = {}
+
+        # Unchanged items are taken from their old position first, so objects nested in them
+        # could not be reused somewhere else.
+        for name, desc in items:
+            node = old_nodes.get(name)
+            if node is None or node.key is None:
+                continue
+            classname, params = copy_instance_params(desc)
+            if self._make_key(classname, **params) == node.key and self._consume(node):
+                nodes[name] = node
+
+        stack = [[]]
+
+        def build(classname, *args, **kwargs):
+            key = self._make_key(classname, *args, **kwargs)
+
+            for node in self._reusable.get(key, ()) if key is not None else ():
+                if self._consume(node):
+                    break
+            else:
+                stack.append([])
+                try:
+                    klass = key[0] if key is not None else loader.load_class(classname)
+                    obj = loader.get_factory_by_class(klass)(*args, **kwargs)
+                finally:
+                    children = stack.pop()
+                node = GraphNode(key, obj, children)
+                self.built += 1
+
+            stack[-1].append(node)
+            return node.obj
+
+        loader = _GraphLoader(self.loader, build)
+        for name, desc in items:
+            if name not in nodes:
+                classname, params = copy_instance_params(desc)
+                build(classname, **params)
+                nodes[name] = stack[0].pop()
+
+        if isinstance(tree, dict):
+            return OrderedDict((name, nodes[name]) for name, _ in items)
+        return [nodes[name] for name, _ in items]
+
+    def _make_key(self, classname, *args, **kwargs):
+        """
+        Returns resolved class and canonical parameters. It returns None when parameters are not hashable,
+        so object could not be reused.
+        """
+        try:
+            return self.loader.load_class(classname), make_params_key(*args, **kwargs)
+        except TypeError:
+            return None
+
+    def _consume(self, node):
+        nodes = list(node.iter_nodes())
+        if any(id(item) in self._consumed for item in nodes):
+            return False
+        self._consumed.update(id(item) for item in nodes)
+        self.reused += 1
+        return True
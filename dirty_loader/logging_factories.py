@@ -0,0 +1,168 @@
+"""
+Factories for logging standard package.
+"""
+import atexit
+import logging
+import logging.handlers
+from queue import Full, Queue
+
+from .factories import BaseFactory
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler with an overflow policy:
+
+    * ``block``: waits until there is room in queue.
+    * ``drop``: discards record.
+    * ``drop_count``: discards record and counts it in ``dropped`` attribute.
+
+    If it is built with a background listener, listener is stopped when handler is closed.
+    """
+
+    OVERFLOW_POLICIES = ('block', 'drop', 'drop_count')
+
+    def __init__(self, queue, overflow='block'):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError("Overflow policy '{0}' is not valid.".format(overflow))
+        super(BoundedQueueHandler, self).__init__(queue)
+        self.overflow = overflow
+        self.dropped = 0
+        self.listener = None
+        self._listening = False
+
+    def start_listener(self, *handlers):
+        """
+        Starts a background listener which writes queued records on handlers.
+
+        :param handlers: Handlers
+        :type handlers: logging.Handler
+        """
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._listening = True
+
+    def stop_listener(self):
+        """
+        Stops background listener, if it is running. Pending records are written before returning.
+        """
+        with self.lock:
+            listening, self._listening = self._listening, False
+        if listening:
+            self.listener.stop()
+
+    def close(self):
+        try:
+            _queue_listeners.remove(self)
+        except ValueError:
+            pass
+        self.stop_listener()
+        super(BoundedQueueHandler, self).close()
+
+    def enqueue(self, record):
+        if self.overflow == 'block':
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            if self.overflow == 'drop_count':
+                self.dropped += 1
+
+
+_queue_listeners = []
+
+
+def stop_queue_listeners():
+    """
+    Stops background listeners of queue handlers which must be flushed on shutdown. Pending records are
+    written before returning. It is called on interpreter exit.
+    """
+    while _queue_listeners:
+        try:
+            _queue_listeners.pop().stop_listener()
+        except IndexError:
+            # Handler was closed meanwhile.
+            break
+
+
+atexit.register(stop_queue_listeners)
+
+
+class BaseLoggingFactory(BaseFactory):
+
+    def add_filters(self, obj, filters):
+        list(map(obj.addFilter, self.iter_loaded_item_list(filters, logging.Filter, path='filters')))
+
+    def build_queue_handler(self, handler, async_queue):
+        """
+        Wraps a handler behind a queue handler. Records are written by a background listener thread, which
+        is stopped when queue handler is closed.
+
+        :param handler: Handler to wrap.
+        :type handler: logging.Handler
+        :param async_queue: Queue options: ``maxsize`` (0 means infinite), ``overflow`` (``block``, ``drop``
+            or ``drop_count``) and ``flush_on_shutdown``. ``True`` means default options.
+        :type async_queue: dict
+        :return: Queue handler. Its listener is available on ``listener`` attribute.
+        :rtype: BoundedQueueHandler
+        """
+        options = async_queue if isinstance(async_queue, dict) else {}
+
+        queue_handler = BoundedQueueHandler(Queue(options.get('maxsize', 0)),
+                                            overflow=options.get('overflow', 'block'))
+        queue_handler.start_listener(handler)
+
+        if options.get('flush_on_shutdown', True):
+            _queue_listeners.append(queue_handler)
+
+        return queue_handler
+
+
+class LoggerFactory(BaseLoggingFactory):
+    """
+    Logger factory.
+    """
+
+    def __call__(self, name, propagate=True, level=logging.DEBUG, handlers=None, filters=None, async_queue=None):
+        logger = logging.getLogger(name)
+        logger.propagate = propagate
+        logger.setLevel(level)
+
+        for handler in self.iter_loaded_item_list(handlers, logging.Handler, path='handlers'):
+            if async_queue and not isinstance(handler, logging.handlers.QueueHandler):
+                handler = self.build_queue_handler(handler, async_queue)
+            logger.addHandler(handler)
+
+        self.add_filters(logger, filters)
+
+        return logger
+
+
+class LoggingHandlerFactory(BaseLoggingFactory):
+    """
+    Logger handle factory. Handlers could be wrapped behind a queue handler using ``async_queue`` option.
+    """
+
+    def __call__(self, formatter=None, filters=None, *args, async_queue=None, **kwargs):
+        handler = self.klass(*args, **kwargs)
+
+        if formatter:
+            handler.setFormatter(self.load_item(formatter, logging.Formatter, path='formatter'))
+
+        self.add_filters(handler, filters)
+
+        if async_queue:
+            return self.build_queue_handler(handler, async_queue)
+
+        return handler
+
+
+def register_logging_factories(loader):
+    """
+    Registers default factories for logging standard package.
+
+    :param loader: Loader where you want register default logging factories
+    """
+    loader.register_factory(logging.Logger, LoggerFactory)
+    loader.register_factory(logging.Handler, LoggingHandlerFactory)
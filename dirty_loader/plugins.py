@@ -0,0 +1,135 @@
+"""
+Plugin discovery using entry points of installed distributions.
+
+Scanning distributions metadata is slow in large environments, so entry point index could be cached on disk.
+Cached index is keyed by a stamp of environment, built from modification times of import path directories,
+which change when distributions are installed or removed.
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+
+from . import AlreadyRegisteredError
+
+try:
+    from importlib import metadata
+except ImportError:  # pragma: no cover
+    metadata = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_environment_stamp(paths=None):
+    """
+    Returns a stamp of installed distributions.
+
+    :param paths: Import paths. By default ``sys.path``.
+    :type paths: list
+    :rtype: str
+    """
+    items = [sys.version]
+    for path in (paths if paths is not None else sys.path):
+        try:
+            items.append([path, os.stat(path or '.').st_mtime_ns])
+        except OSError:
+            pass
+    return hashlib.sha1(json.dumps(items).encode('utf-8')).hexdigest()
+
+
+def scan_entry_points(group):
+    """
+    Scans installed distributions looking for entry points.
+
+    :param group: Entry point group.
+    :type group: str
+    :return: List of entry point name and value pairs.
+    :rtype: list
+    """
+    if metadata is None:  # pragma: no cover
+        import pkg_resources
+        return [[ep.name, '{0}:{1}'.format(ep.module_name, '.'.join(ep.attrs)) if ep.attrs else ep.module_name]
+                for ep in pkg_resources.iter_entry_points(group)]
+
+    try:
+        entry_points = metadata.entry_points(group=group)
+    except TypeError:  # pragma: no cover
+        entry_points = metadata.entry_points().get(group, [])
+
+    return [[ep.name, ep.value] for ep in entry_points]
+
+
+def get_entry_points(group, cache_path=None):
+    """
+    Returns entry points of a group. If a cache path is given, index is read from it when environment
+    did not change. Otherwise, distributions are scanned and index is stored. Cache file should not be placed
+    in an import path directory, because it would change environment stamp.
+
+    :param group: Entry point group.
+    :type group: str
+    :param cache_path: Path of index cache file.
+    :type cache_path: str
+    :return: List of entry point name and value pairs.
+    :rtype: list
+    """
+    if cache_path is None:
+        return scan_entry_points(group)
+
+    stamp = get_environment_stamp()
+    index = _read_index(cache_path)
+    if index.get('stamp') != stamp:
+        index = {'stamp': stamp, 'groups': {}}
+
+    try:
+        return index['groups'][group]
+    except KeyError:
+        pass
+
+    entry_points = index['groups'][group] = scan_entry_points(group)
+
+    tmp_path = '{0}.{1}.tmp'.format(cache_path, os.getpid())
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+    return entry_points
+
+
+def _read_index(cache_path):
+    try:
+        with open(cache_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or not isinstance(index.get('groups'), dict):
+        return {}
+    return index
+
+
+def register_entry_points(loader, group, cache_path=None):
+    """
+    Registers modules declared as entry points on a loader. Modules are registered by name, so they are not
+    imported until a class is requested. On namespace loaders, entry point name is used as namespace tag.
+
+    Entry points whose module (or namespace tag, on namespace loaders) is already registered are skipped
+    with a warning, so first one wins.
+
+    :param loader: Loader where you want to register modules.
+    :param group: Entry point group.
+    :type group: str
+    :param cache_path: Path of index cache file.
+    :type cache_path: str
+    """
+    for name, value in get_entry_points(group, cache_path=cache_path):
+        module = value.split(':', 1)[0].strip()
+        try:
+            if hasattr(loader, 'register_namespace'):
+                loader.register_namespace(name, module)
+            else:
+                loader.register_module(module)
+        except AlreadyRegisteredError as ex:
+            logger.warning("Entry point '%s' of group '%s' is skipped: %s", name, group, ex)
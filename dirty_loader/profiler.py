@@ -0,0 +1,203 @@
+"""
+Resolution profiler. It measures time spent importing registered modules, looking for classes and building
+objects from descriptors, and number of modules probed without success.
+
+It also provides a concurrency benchmark, which measures lookup throughput of a loader shared by several threads.
+"""
+import sys
+import threading
+import time
+
+from . import restore_instance_attrs, set_instance_attrs
+from .factories import copy_instance_params
+
+
+class ResolutionProfiler:
+
+    """
+    Profiles a loader while it resolves and builds descriptors.
+    """
+
+    def __init__(self, loader, clock=time.perf_counter):
+        self.loader = loader
+        self.clock = clock
+        self.imports = {}
+        self.lookups = {}
+        self.constructors = {}
+        self.errors = {}
+
+    def profile_imports(self):
+        """
+        Imports every registered module, measuring time spent on each one.
+        """
+        from . import get_module_name, import_registered_module
+
+        for module in self.loader.get_registered_modules():
+            name = get_module_name(module)
+            start = self.clock()
+            try:
+                import_registered_module(module)
+            except ImportError as ex:
+                self.errors[name] = str(ex)
+            self.imports[name] = self.clock() - start
+
+    def profile_descriptors(self, descriptors, instantiate=False):
+        """
+        Resolves, and optionally builds, descriptors.
+
+        :param descriptors: Iterable of descriptor path and descriptor pairs.
+        :param instantiate: Whether to build objects.
+        :type instantiate: bool
+        """
+        loader = self.loader
+        load_class = loader.load_class
+        may_export = loader._may_export
+        lookup_stack = []
+
+        def profiled_may_export(module, classname):
+            result = may_export(module, classname)
+            if result and lookup_stack:
+                lookup_stack[-1][1] += 1
+            return result
+
+        def profiled_load_class(classname, *args, **kwargs):
+            if lookup_stack:
+                # Nested call of same lookup (namespace loaders).
+                return load_class(classname, *args, **kwargs)
+
+            lookup = [classname, 0]
+            lookup_stack.append(lookup)
+            found = 0
+            start = self.clock()
+            try:
+                klass = load_class(classname, *args, **kwargs)
+                found = 1
+            finally:
+                elapsed = self.clock() - start
+                lookup_stack.pop()
+                stats = self.lookups.setdefault(classname, {'time': 0.0, 'count': 0, 'misses': 0})
+                stats['time'] += elapsed
+                stats['count'] += 1
+                stats['misses'] += max(lookup[1] - found, 0)
+            return klass
+
+        saved = set_instance_attrs(loader, load_class=profiled_load_class, _may_export=profiled_may_export)
+        try:
+            for path, desc in descriptors:
+                try:
+                    classname, params = copy_instance_params(desc)
+                    klass = loader.load_class(classname)
+                    if instantiate:
+                        self._profile_constructor(path, klass, params)
+                except Exception as ex:
+                    self.errors[path] = '{0}: {1}'.format(type(ex).__name__, ex)
+        finally:
+            restore_instance_attrs(loader, saved)
+
+    def _profile_constructor(self, path, klass, params):
+        lookups_time = sum(stats['time'] for stats in self.lookups.values())
+        start = self.clock()
+        self.loader.get_factory_by_class(klass)(**params)
+        elapsed = self.clock() - start
+        nested_lookups_time = sum(stats['time'] for stats in self.lookups.values()) - lookups_time
+        self.constructors[path] = max(elapsed - nested_lookups_time, 0.0)
+
+    def report(self, top=None):
+        """
+        Returns a text report, ranked by time.
+
+        :param top: Maximum number of entries on each section.
+        :type top: int
+        :rtype: str
+        """
+        lines = []
+
+        def section(title, rows):
+            rows = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+            lines.append(title)
+            lines.append('-' * len(title))
+            lines.extend('{0:>10.3f} ms  {1}{2}'.format(elapsed * 1000, name, extra) for name, elapsed, extra in rows)
+            lines.append('')
+
+        section('Imports', [(name, elapsed, '') for name, elapsed in self.imports.items()])
+        section('Lookups', [(name, stats['time'],
+                             '  (calls: {0}, probe misses: {1})'.format(stats['count'], stats['misses']))
+                            for name, stats in self.lookups.items()])
+        if self.constructors:
+            section('Constructors', [(name, elapsed, '') for name, elapsed in self.constructors.items()])
+
+        lines.append('Total probe misses: {0}'.format(sum(stats['misses'] for stats in self.lookups.values())))
+        if self.errors:
+            lines.append('')
+            lines.append('Errors')
+            lines.append('------')
+            lines.extend('{0}: {1}'.format(name, error) for name, error in sorted(self.errors.items()))
+
+        return '\n'.join(lines) + '\n'
+
+
+def benchmark_threads(loader, classnames, thread_counts=(1, 2, 4, 8), lookups=100000, clock=time.perf_counter):
+    """
+    Measures throughput of a loader shared by several threads, which look for classes concurrently. On
+    free-threaded Python builds, throughput should scale with number of threads.
+
+    :param loader: Loader
+    :param classnames: Class names to look for. Each thread looks for them cyclically.
+    :type classnames: list
+    :param thread_counts: Number of threads of each run.
+    :type thread_counts: iterable
+    :param lookups: Number of lookups of each run, split between its threads.
+    :type lookups: int
+    :return: List of dicts with ``threads``, ``elapsed`` (seconds) and ``throughput`` (lookups per second).
+    :rtype: list
+    """
+    classnames = list(classnames)
+    for classname in classnames:
+        loader.load_class(classname)
+
+    results = []
+    for count in thread_counts:
+        barrier = threading.Barrier(count + 1)
+        errors = []
+
+        def run(iterations):
+            barrier.wait()
+            try:
+                for i in range(iterations):
+                    loader.load_class(classnames[i % len(classnames)])
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=run, args=(lookups // count,)) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = clock()
+        for thread in threads:
+            thread.join()
+        elapsed = clock() - start
+
+        if errors:
+            raise errors[0]
+
+        total = (lookups // count) * count
+        results.append({'threads': count,
+                        'elapsed': elapsed,
+                        'throughput': total / elapsed if elapsed > 0 else float('inf')})
+    return results
+
+
+def format_benchmark(results):
+    """
+    Returns a text report of a concurrency benchmark.
+
+    :rtype: str
+    """
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    title = 'Threads benchmark (GIL {0})'.format('enabled' if gil_enabled else 'disabled')
+    lines = [title, '-' * len(title)]
+    base = results[0]['throughput'] if results else None
+    for result in results:
+        lines.append('{0:>4} threads  {1:>12.0f} lookups/s  x{2:.2f}'.format(
+            result['threads'], result['throughput'], result['throughput'] / base))
+    return '\n'.join(lines) + '\n'
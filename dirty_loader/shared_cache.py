@@ -0,0 +1,364 @@
+"""
+Resolution cache shared between processes on same host.
+
+Each process still imports modules by itself, but it skips looking for classes in registered modules when
+another process already found them.
+"""
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+
+from . import CacheLoaderMixin, CacheLoaderNamespaceMixin, Loader, LoaderNamespace, LoaderNamespaceReversed, \
+    LoaderReversed, get_module_name, import_class
+
+logger = logging.getLogger(__name__)
+
+
+def open_store_file(path):
+    """
+    Opens a store file in append mode, creating it if it does not exist. Existing files must be regular files
+    owned by current user and not writable by other users. Otherwise, another local user could have created
+    it in order to inject resolutions.
+
+    :param path: File path.
+    :type path: str
+    :return: File descriptor.
+    :rtype: int
+    :raises PermissionError: If file exists and it is not safe to use.
+    """
+    flags = os.O_RDWR | os.O_APPEND | getattr(os, 'O_NOFOLLOW', 0)
+    try:
+        return os.open(path, flags | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+
+    fd = os.open(path, flags)
+    try:
+        check_private_file(fd, path)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd
+
+
+def check_private_file(fd, path):
+    """
+    Checks that an open file is a regular file owned by current user and not writable by other users.
+
+    :param fd: File descriptor.
+    :type fd: int
+    :param path: File path, used on error message.
+    :type path: str
+    :raises PermissionError: If file is not safe to use.
+    """
+    st = os.fstat(fd)
+    owned = not hasattr(os, 'geteuid') or st.st_uid == os.geteuid()
+    if not stat.S_ISREG(st.st_mode) or not owned or st.st_mode & 0o022:
+        raise PermissionError("File '{0}' must be a regular file owned by current user and not writable by "
+                              "other users.".format(path))
+
+
+def get_default_cache_dir():
+    """
+    Returns default directory for shared caches. It uses shared memory filesystem if it exists.
+    """
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+class SharedResolutionStore:
+
+    """
+    Store of class name to module name resolutions, backed by a file. Writers append complete lines using a
+    single ``write`` on a file opened in append mode, so no locks are needed between processes. Readers only
+    parse complete lines, and last line for a class name wins. Threads of same process share file descriptor,
+    read position and entries, so file operations are locked (refreshes until new lines are merged).
+
+    When file grows over ``max_size`` bytes, it is compacted: it is replaced atomically by a new file with one
+    line per class name, and other stores reopen it on their next refresh.
+    """
+
+    max_size = 1 << 20
+    """Default maximum size of store file, in bytes."""
+
+    def __init__(self, path, max_size=None):
+        """
+        SharedResolutionStore initialitzer.
+
+        :param path: File path. It should be placed in a shared memory filesystem.
+        :type path: str
+        :param max_size: Maximum size of store file, in bytes.
+        :type max_size: int
+        :raises PermissionError: If file exists and it is not safe to use (see :func:`open_store_file`).
+        """
+        self.path = path
+        if max_size is not None:
+            self.max_size = max_size
+        self._fd = None
+        self._fd = open_store_file(path)
+        self._offset = 0
+        self._pending = b''
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __del__(self):
+        self.close()
+
+    def refresh(self):
+        """
+        Reads resolutions appended since last refresh. If file was replaced by a compacted one, it is reopened.
+        """
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        self._reopen_if_replaced()
+
+        size = os.fstat(self._fd).st_size
+        if size <= self._offset:
+            return
+
+        data = self._pending + os.pread(self._fd, size - self._offset, self._offset)
+        self._offset = size
+        lines = data.split(b'\n')
+        self._pending = lines.pop()
+
+        # Lines are merged while lock is held, so concurrent refreshes never merge older lines after newer.
+        for line in lines:
+            try:
+                classname, module_name = json.loads(line.decode('utf-8'))
+            except ValueError:
+                continue
+            self._entries[classname] = module_name
+
+    def _reopen_if_replaced(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        current = os.fstat(self._fd)
+        if (st.st_dev, st.st_ino) == (current.st_dev, current.st_ino):
+            return
+
+        try:
+            fd = open_store_file(self.path)
+        except OSError as ex:
+            logger.warning("Shared cache file could not be reopened: %s", ex)
+            return
+        os.close(self._fd)
+        self._fd = fd
+        self._offset = 0
+        self._pending = b''
+        self._entries = {}
+
+    def get(self, classname):
+        """
+        Returns name of module where class was found.
+
+        :param classname: Class name
+        :type classname: str
+        :return: Module name or None if it is unknown.
+        :rtype: str
+        """
+        try:
+            return self._entries[classname]
+        except KeyError:
+            pass
+        self.refresh()
+        return self._entries.get(classname)
+
+    def put(self, classname, module_name):
+        """
+        Stores name of module where class was found. Store file is compacted if it grows too much.
+
+        :param classname: Class name
+        :type classname: str
+        :param module_name: Module name
+        :type module_name: str
+        """
+        with self._lock:
+            self._entries[classname] = module_name
+            os.write(self._fd, json.dumps([classname, module_name]).encode('utf-8') + b'\n')
+            if os.fstat(self._fd).st_size > self.max_size:
+                self._compact()
+
+    def compact(self):
+        """
+        Replaces store file by a new one with a line per class name. Resolutions appended by other processes
+        while it is compacted could be lost, so they are looked for again. If there are still too many
+        resolutions, new file is empty.
+        """
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        self._refresh()
+        data = b''.join(json.dumps([classname, module_name]).encode('utf-8') + b'\n'
+                        for classname, module_name in self._entries.items())
+        if len(data) > self.max_size // 2:
+            data = b''
+
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.',
+                                        dir=os.path.dirname(self.path) or None)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as ex:
+            logger.warning("Shared cache file could not be compacted: %s", ex)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        self._refresh()
+
+
+class SharedCacheMixin:
+
+    """
+    Mixin to share resolutions between processes. It must be placed before CacheLoaderMixin.
+
+    Store file name is built from current user id and a version stamp of registry (loader type and registered
+    modules), so when registry changes processes use a new store and old resolutions are never read. When a new
+    store file is created, store files of same user which were not modified for ``stale_store_age`` seconds are
+    removed. If store file is not safe to use (see :func:`open_store_file`), resolutions are not shared.
+    """
+
+    stale_store_age = 600
+    """Seconds a store file of another registry could be unmodified before it is removed."""
+
+    def __init__(self, *args, shared_cache_dir=None, shared_cache_max_size=None, **kwargs):
+        super(SharedCacheMixin, self).__init__(*args, **kwargs)
+        self._shared_cache_dir = shared_cache_dir or get_default_cache_dir()
+        self._shared_cache_max_size = shared_cache_max_size
+        self._shared_store = None
+
+    def get_registry_stamp(self):
+        """
+        Returns version stamp of registry.
+
+        :rtype: str
+        """
+        modules = [get_module_name(module) for module in self.get_registered_modules()]
+        data = json.dumps([type(self).__name__, modules]).encode('utf-8')
+        return hashlib.sha1(data).hexdigest()
+
+    def get_shared_store(self):
+        """
+        Returns shared store for current registry.
+
+        :rtype: SharedResolutionStore
+        """
+        if not self._shared_store:
+            path = os.path.join(self._shared_cache_dir,
+                                '{0}{1}.cache'.format(self._get_store_prefix(), self.get_registry_stamp()))
+            created = not os.path.exists(path)
+            self._shared_store = SharedResolutionStore(path, max_size=self._shared_cache_max_size)
+            if created:
+                self._remove_stale_stores(path)
+        return self._shared_store
+
+    @staticmethod
+    def _get_store_prefix():
+        return 'dirty-loader-{0}-'.format(os.geteuid() if hasattr(os, 'geteuid') else 0)
+
+    def _remove_stale_stores(self, path):
+        """
+        Removes store files of current user, for other registries, which were not modified recently. Processes
+        which still use them keep their open file, but new processes create it again.
+        """
+        prefix = self._get_store_prefix()
+        limit = time.time() - self.stale_store_age
+        try:
+            entries = list(os.scandir(self._shared_cache_dir))
+        except OSError:
+            return
+
+        for entry in entries:
+            if not entry.name.startswith(prefix) or not entry.name.endswith('.cache') or entry.path == path:
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+                owned = not hasattr(os, 'geteuid') or st.st_uid == os.geteuid()
+                if stat.S_ISREG(st.st_mode) and owned and st.st_mtime < limit:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+
+    def invalidate_cache(self):
+        super(SharedCacheMixin, self).invalidate_cache()
+        # Store is not closed, because other threads could be using it. It is closed when it is released.
+        self._shared_store = None
+
+    def _is_registered_module_name(self, module_name):
+        """
+        Checks whether a shared resolution points to a registered module, so entries written by other
+        processes never import other modules. It uses registry index, so it takes constant time.
+        """
+        return self._get_registry().has_module(module_name)
+
+    def _lookup(self, classname):
+        if self._shared_store is False:
+            return super(SharedCacheMixin, self)._lookup(classname)
+
+        try:
+            store = self.get_shared_store()
+        except OSError as ex:
+            logger.warning("Resolutions will not be shared: %s", ex)
+            self._shared_store = False
+            return super(SharedCacheMixin, self)._lookup(classname)
+
+        module_name = store.get(classname)
+        if module_name is not None and self._is_registered_module_name(module_name):
+            try:
+                return module_name, import_class(classname, module_name)
+            except (AttributeError, ImportError):
+                pass
+
+        module_name, klass = super(SharedCacheMixin, self)._lookup(classname)
+        store.put(classname, module_name)
+        return module_name, klass
+
+
+class LoaderSharedCached(SharedCacheMixin, CacheLoaderMixin, Loader):
+
+    """
+    A version of LoaderCached which shares resolutions with other processes.
+    """
+    pass
+
+
+class LoaderReversedSharedCached(SharedCacheMixin, CacheLoaderMixin, LoaderReversed):
+
+    """
+    A version of LoaderReversedCached which shares resolutions with other processes.
+    """
+    pass
+
+
+class LoaderNamespaceSharedCached(SharedCacheMixin, CacheLoaderNamespaceMixin, LoaderNamespace):
+
+    """
+    A version of LoaderNamespaceCached which shares resolutions with other processes.
+    """
+    pass
+
+
+class LoaderNamespaceReversedSharedCached(SharedCacheMixin, CacheLoaderNamespaceMixin, LoaderNamespaceReversed):
+
+    """
+    A version of LoaderNamespaceReversedCached which shares resolutions with other processes.
+    """
+    pass
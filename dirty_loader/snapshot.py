@@ -0,0 +1,162 @@
+"""
+Snapshots of built object graphs, for warm restarts. Objects built from a descriptor tree are pickled to disk,
+along with classes resolved while building them and their versions. Later, if descriptor tree is same and
+loader still resolves same class versions, objects are restored from snapshot instead of being built again.
+
+Snapshot files have a JSON header line with resolved classes, followed by pickled objects. Files are only read
+when they are regular files owned by current user and not writable by other users, and objects are only unpickled
+after classes are checked. Even so, they should be stored on a directory only writable by trusted users. They
+should only be used for objects which could be pickled and whose construction has no side effects outside them.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+
+from . import NoRegisteredError, ResolutionRecorder
+from .graph import ObjectGraph
+from .shared_cache import check_private_file
+
+logger = logging.getLogger(__name__)
+
+
+def get_tree_hash(tree):
+    """
+    Returns a hash of a descriptor tree. Dictionaries are hashed in a canonical order.
+
+    :param tree: Dictionary of named descriptors or list of descriptors.
+    :rtype: str
+    """
+    data = json.dumps(tree, sort_keys=True, default=repr).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+def get_class_version(klass):
+    """
+    Returns a version stamp of a class: its module, qualified name, and size and modification time of its
+    module source file.
+
+    :param klass: Class type.
+    :type klass: type
+    :rtype: list
+    """
+    module_name = getattr(klass, '__module__', None)
+    version = [module_name, getattr(klass, '__qualname__', None)]
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    if path:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            pass
+        else:
+            version.extend([stat.st_size, stat.st_mtime_ns])
+    return version
+
+
+def get_snapshot_path(snapshot_dir, tree):
+    """
+    Returns path of snapshot file of a descriptor tree.
+
+    :rtype: str
+    """
+    return os.path.join(snapshot_dir, 'dirty-loader-{0}.snapshot'.format(get_tree_hash(tree)))
+
+
+def save_snapshot(path, items, resolutions):
+    """
+    Writes a snapshot file, readable only by current user. File is replaced atomically.
+
+    :param path: Snapshot file path.
+    :type path: str
+    :param items: Built objects.
+    :param resolutions: Dict with class name as key and class as value.
+    :type resolutions: dict
+    :return: Whether snapshot was written. Objects which could not be pickled are not written.
+    :rtype: bool
+    """
+    header = {'resolutions': [[classname, get_class_version(klass)] for classname, klass in resolutions.items()]}
+    try:
+        data = json.dumps(header).encode('utf-8') + b'\n' + pickle.dumps(items)
+    except (pickle.PicklingError, TypeError, ValueError, AttributeError) as ex:
+        logger.warning("Snapshot '%s' could not be written: %s", path, ex)
+        return False
+
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as ex:
+        logger.warning("Snapshot '%s' could not be written: %s", path, ex)
+        return False
+    return True
+
+
+def restore_snapshot(path, loader):
+    """
+    Reads objects from a snapshot file, if classes resolved while building them are still resolved by loader
+    to same class versions. Header is JSON, and classes are checked before objects are unpickled. Files which
+    are not regular files owned by current user and not writable by other users are not read.
+
+    :param path: Snapshot file path.
+    :type path: str
+    :param loader: Loader used to resolve classes.
+    :return: Restored objects or None if snapshot does not exist or it is stale.
+    """
+    try:
+        # Non blocking mode avoids waiting on a FIFO before file type is checked.
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0) | getattr(os, 'O_NONBLOCK', 0))
+    except OSError:
+        return None
+
+    try:
+        with os.fdopen(fd, 'rb') as f:
+            try:
+                check_private_file(fd, path)
+            except PermissionError as ex:
+                logger.warning("Snapshot '%s' is not used: %s", path, ex)
+                return None
+            header = json.loads(f.readline().decode('utf-8'))
+            for classname, version in header['resolutions']:
+                try:
+                    klass = loader.load_class(classname)
+                except (ImportError, NoRegisteredError):
+                    return None
+                if get_class_version(klass) != version:
+                    return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, KeyError, TypeError,
+            ValueError):
+        return None
+
+
+def build_items(loader, tree, snapshot_dir):
+    """
+    Builds a descriptor tree, or restores it from a valid snapshot. Built objects are stored on a snapshot.
+
+    **Example**:
+
+    .. code-block:: python
+
+        items = build_items(loader, config, '/var/cache/myapp')
+        items['lookup_table']
+
+    :param loader: Loader used to build objects.
+    :param tree: Dictionary of named descriptors or list of descriptors.
+    :param snapshot_dir: Directory where snapshots are stored.
+    :type snapshot_dir: str
+    :return: Dictionary or list of built objects.
+    """
+    path = get_snapshot_path(snapshot_dir, tree)
+    items = restore_snapshot(path, loader)
+    if items is not None:
+        return items
+
+    with ResolutionRecorder(loader) as recorder:
+        items = ObjectGraph(loader, tree).items
+
+    save_snapshot(path, items, recorder.resolutions)
+    return items
@@ -0,0 +1,195 @@
+"""
+Tracing of class resolution and object construction. A tracer records nested spans for ``load_class``,
+``get_factory_by_class``, factory calls and nested items loaded by factories. Each span carries descriptor
+path of item being built, its timing and whether it was taken from a cache. Traces could be exported as
+Chrome trace event files, which could be opened on ``chrome://tracing`` or Perfetto.
+
+Current span is kept on a context variable, so spans are nested properly on threads and asyncio tasks.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from . import restore_instance_attrs, set_instance_attrs
+from .factories import copy_instance_params
+
+_current_span = ContextVar('dirty_loader_current_span', default=None)
+
+
+def join_path(parent, path):
+    """
+    Joins a descriptor path to its parent path.
+
+    :param parent: Parent path.
+    :type parent: str
+    :param path: Path relative to parent. Index paths (``[3]``) are joined without dot.
+    :type path: str
+    :rtype: str
+    """
+    if not parent:
+        return path
+    if not path:
+        return parent
+    if path.startswith('['):
+        return parent + path
+    return '{0}.{1}'.format(parent, path)
+
+
+class Span:
+
+    """
+    Timed operation. Children spans are operations done while it was active.
+    """
+
+    __slots__ = ('name', 'path', 'args', 'start', 'end', 'thread_id', 'parent')
+
+    def __init__(self, name, path, args, start, parent=None):
+        self.name = name
+        self.path = path
+        self.args = args
+        self.start = start
+        self.end = None
+        self.thread_id = threading.get_ident()
+        self.parent = parent
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    @property
+    def depth(self):
+        depth = 0
+        span = self.parent
+        while span is not None:
+            depth += 1
+            span = span.parent
+        return depth
+
+
+class Tracer:
+
+    """
+    Traces a loader while it is active. It must be used as a context manager.
+
+    **Example**:
+
+    .. code-block:: python
+
+        with Tracer(loader) as tracer:
+            loader.factory('logging:Logger', name='foo', handlers=['logging:NullHandler'])
+
+        tracer.export_chrome_trace('trace.json')
+
+    Factories receive tracer on ``tracer`` attribute of loader, so nested items loaded using ``BaseFactory``
+    methods are traced with their descriptor path.
+    """
+
+    def __init__(self, loader, clock=time.perf_counter):
+        self.loader = loader
+        self.clock = clock
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, path=None, **args):
+        """
+        Records a span while context is active. Spans without path take path of their parent.
+
+        :param name: Span name.
+        :type name: str
+        :param path: Descriptor path, relative to parent span.
+        :type path: str
+        :param args: Extra span data. It could be updated while span is active.
+        """
+        parent = _current_span.get()
+        parent_path = parent.path if parent is not None else ''
+        span = Span(name, join_path(parent_path, path) if path is not None else parent_path,
+                    args, self.clock(), parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.end = self.clock()
+            _current_span.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def build_items(self, tree):
+        """
+        Builds a dictionary of named descriptors or a list of descriptors, tracing each item with its name
+        or index as path.
+
+        :param tree: Dictionary of named descriptors or list of descriptors.
+        :return: Dictionary or list of built objects.
+        """
+        if isinstance(tree, dict):
+            return {name: self._build_item(str(name), desc) for name, desc in tree.items()}
+        return [self._build_item('[{0}]'.format(i), desc) for i, desc in enumerate(tree)]
+
+    def _build_item(self, path, desc):
+        classname, params = copy_instance_params(desc)
+        with self.span('item', path=path, classname=classname):
+            return self.loader.factory(classname, **params)
+
+    def __enter__(self):
+        loader = self.loader
+        load_class = loader.load_class
+        get_factory_by_class = loader.get_factory_by_class
+        factory = loader.factory
+
+        def traced_load_class(classname, *args, **kwargs):
+            cache = getattr(loader, '_cache', None)
+            with self.span('load_class', classname=classname, cache_hit=cache is not None and classname in cache):
+                return load_class(classname, *args, **kwargs)
+
+        def traced_get_factory_by_class(klass, *args, **kwargs):
+            cache = getattr(loader, '_cache_factories', None)
+            with self.span('get_factory_by_class', classname=getattr(klass, '__qualname__', repr(klass)),
+                           cache_hit=cache is not None and klass in cache):
+                return get_factory_by_class(klass, *args, **kwargs)
+
+        def traced_factory(classname, *args, **kwargs):
+            with self.span('factory', classname=classname):
+                return factory(classname, *args, **kwargs)
+
+        self._saved = set_instance_attrs(loader, load_class=traced_load_class,
+                                         get_factory_by_class=traced_get_factory_by_class,
+                                         factory=traced_factory, tracer=self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        restore_instance_attrs(self.loader, self._saved)
+
+    def to_chrome_trace(self):
+        """
+        Returns trace using Chrome trace event format (complete events, in microseconds).
+
+        :rtype: dict
+        """
+        pid = os.getpid()
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start):
+            args = dict(span.args)
+            args['path'] = span.path
+            events.append({'name': span.name,
+                           'cat': 'dirty_loader',
+                           'ph': 'X',
+                           'ts': span.start * 1e6,
+                           'dur': span.duration * 1e6,
+                           'pid': pid,
+                           'tid': span.thread_id,
+                           'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        """
+        Writes trace to a Chrome trace event JSON file.
+
+        :param path: File path.
+        :type path: str
+        """
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f, default=repr)
@@ -0,0 +1,233 @@
+"""
+Dry-run validation of configuration files. Each descriptor is checked without building any object: its class
+must be resolved by loader, its factory must be selected and its parameter names must match signature of
+factory (or class constructor, when factory forwards parameters to it).
+
+Many configuration files could be validated using a process pool. Each worker process builds its own loader
+once, so classes are resolved once per worker instead of once per file.
+"""
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import iter_descriptors, load_config
+from .factories import copy_instance_params
+
+_worker_loader = None
+
+
+def get_signature(func):
+    """
+    Returns signature of a callable, or None if it could not be inspected (some builtin types).
+
+    :rtype: inspect.Signature
+    """
+    try:
+        return inspect.signature(func)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_params(factory, klass, params):
+    """
+    Checks parameters of a descriptor against signature of factory. Parameters which factory forwards to
+    class using variable keyword arguments are checked against class constructor signature. Values are not
+    checked.
+
+    :param factory: Factory selected by loader. It could be class itself.
+    :param klass: Class type.
+    :type klass: type
+    :param params: Descriptor parameters.
+    :type params: dict
+    :return: List of error messages.
+    :rtype: list
+    """
+    if not isinstance(params, dict):
+        return ["Parameters must be a dictionary, not {0}.".format(type(params).__name__)]
+
+    signature = get_signature(factory)
+    if signature is None:
+        return []
+
+    kinds = {param.kind for param in signature.parameters.values()}
+    forwards = factory is not klass and inspect.Parameter.VAR_KEYWORD in kinds
+    if forwards and kinds <= {inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD}:
+        # Factory forwards every parameter, so class constructor is checked.
+        signature = get_signature(klass)
+        if signature is None:
+            return []
+        forwards = False
+
+    try:
+        bound = signature.bind(**params)
+    except TypeError as ex:
+        return [str(ex)]
+
+    if not forwards:
+        return []
+
+    klass_signature = get_signature(klass)
+    if klass_signature is None:
+        return []
+    forwarded = [name for name, param in signature.parameters.items()
+                 if param.kind == inspect.Parameter.VAR_KEYWORD]
+    forwarded = bound.arguments.get(forwarded[0], {}) if forwarded else {}
+    try:
+        klass_signature.bind_partial(**forwarded)
+    except TypeError as ex:
+        return [str(ex)]
+    return []
+
+
+def validate_descriptor(loader, desc):
+    """
+    Validates a descriptor without building it.
+
+    :param loader: Loader used to resolve classes.
+    :param desc: Descriptor.
+    :return: Dict with ``classname``, ``factory`` (its name, or None if it was not selected) and ``errors``
+        (list of error messages).
+    :rtype: dict
+    """
+    result = {'classname': None, 'factory': None, 'errors': []}
+    try:
+        classname, params = copy_instance_params(desc)
+    except (AttributeError, IndexError, KeyError, TypeError) as ex:
+        result['errors'].append("Invalid descriptor: {0}: {1}".format(type(ex).__name__, ex))
+        return result
+
+    result['classname'] = classname
+    try:
+        klass = loader.load_class(classname)
+    except Exception as ex:
+        # Registered modules could fail on import with any exception.
+        result['errors'].append("Class '{0}' could not be resolved: {1}: {2}".format(classname,
+                                                                                     type(ex).__name__, ex))
+        return result
+
+    try:
+        factory = loader.get_factory_by_class(klass)
+    except Exception as ex:
+        result['errors'].append("Factory could not be selected: {0}: {1}".format(type(ex).__name__, ex))
+        return result
+
+    result['factory'] = getattr(factory if factory is klass else type(factory), '__qualname__', repr(factory))
+    result['errors'].extend(check_params(factory, klass, params))
+    return result
+
+
+def validate_config(loader, path):
+    """
+    Validates every descriptor of a configuration file.
+
+    :param loader: Loader used to resolve classes.
+    :param path: Configuration file path.
+    :type path: str
+    :return: Dict with ``path``, ``error`` (file error message or None) and ``items`` (list of descriptor
+        reports, see :func:`validate_descriptor`, with their ``path``).
+    :rtype: dict
+    """
+    report = {'path': path, 'error': None, 'items': []}
+    try:
+        descriptors = list(iter_descriptors(load_config(path)))
+    except Exception as ex:
+        # File errors, JSON or YAML errors and ConfigError.
+        report['error'] = '{0}: {1}'.format(type(ex).__name__, ex)
+        return report
+
+    for name, desc in descriptors:
+        item = validate_descriptor(loader, desc)
+        item['path'] = name
+        report['items'].append(item)
+    return report
+
+
+def is_valid(report):
+    """
+    Returns whether a configuration file report has no errors.
+
+    :rtype: bool
+    """
+    return report['error'] is None and not any(item['errors'] for item in report['items'])
+
+
+def _init_worker(make_loader):
+    global _worker_loader
+    _worker_loader = make_loader()
+
+
+def _validate_path(path):
+    return validate_config(_worker_loader, path)
+
+
+def validate_files(make_loader, paths, processes=None):
+    """
+    Validates configuration files using a process pool.
+
+    **Example**:
+
+    .. code-block:: python
+
+        def make_loader():
+            loader = LoaderCached()
+            loader.register_module('myapp.plugins')
+            return loader
+
+        reports = validate_files(make_loader, glob('tenants/*.yaml'))
+        failed = [report['path'] for report in reports if not is_valid(report)]
+
+    :param make_loader: Callable without arguments which builds a loader. It is called once on each worker
+        process, so it must be picklable (a module level function or a ``functools.partial`` of one).
+    :param paths: Configuration file paths.
+    :type paths: iterable
+    :param processes: Number of worker processes. By default, number of CPUs. If it is 1, files are
+        validated on current process.
+    :type processes: int
+    :return: List of configuration file reports (see :func:`validate_config`), in same order as paths.
+    :rtype: list
+    """
+    paths = list(paths)
+    if processes == 1 or len(paths) <= 1:
+        loader = make_loader()
+        return [validate_config(loader, path) for path in paths]
+
+    processes = min(processes or os.cpu_count() or 1, len(paths))
+    chunksize = max(1, len(paths) // (processes * 4))
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(make_loader,)) as executor:
+        return list(executor.map(_validate_path, paths, chunksize=chunksize))
+
+
+def format_validation(reports, errors_only=False):
+    """
+    Returns a text report of validated configuration files.
+
+    :param reports: Configuration file reports.
+    :type reports: list
+    :param errors_only: Whether to show only items with errors.
+    :type errors_only: bool
+    :rtype: str
+    """
+    lines = []
+    items_count = 0
+    errors_count = 0
+    for report in reports:
+        items_count += len(report['items'])
+        if report['error'] is not None:
+            errors_count += 1
+            lines.append('{0}: ERROR {1}'.format(report['path'], report['error']))
+            continue
+
+        failed = [item for item in report['items'] if item['errors']]
+        errors_count += len(failed)
+        if errors_only and not failed:
+            continue
+        lines.append('{0}: {1}'.format(report['path'], 'ERROR' if failed else 'OK'))
+        for item in report['items']:
+            if item['errors']:
+                lines.extend('  {0}: {1}'.format(item['path'], error) for error in item['errors'])
+            elif not errors_only:
+                lines.append('  {0}: {1} ({2})'.format(item['path'], item['classname'], item['factory']))
+
+    lines.append('')
+    lines.append('Files: {0}, items: {1}, errors: {2}'.format(len(reports), items_count, errors_count))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,156 @@
+"""
+Watcher of source files of modules registered on a loader. When a file changes, its module is reloaded and
+only cache entries which came from it are evicted.
+
+It uses ``inotify_simple`` package, when it is installed, in order to wake up on file changes. Otherwise,
+it polls files modification times.
+"""
+import importlib
+import logging
+import os
+import sys
+import threading
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+logger = logging.getLogger(__name__)
+
+
+class ModuleWatcher:
+
+    """
+    Watches source files of registered modules and their already imported submodules.
+    """
+
+    def __init__(self, loader, interval=1.0, use_inotify=True):
+        """
+        ModuleWatcher initialitzer.
+
+        :param loader: Loader whose modules must be watched.
+        :param interval: Seconds between checks.
+        :type interval: float
+        :param use_inotify: Whether to use inotify, if it is available.
+        :type use_inotify: bool
+        """
+        self.loader = loader
+        self.interval = interval
+        self.use_inotify = use_inotify and INotify is not None
+        self._mtimes = {}
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def get_watched_modules(self):
+        """
+        Returns imported modules which belong to registered modules.
+
+        :return: Dict with module name as key and module object as value.
+        :rtype: dict
+        """
+        names = [module if isinstance(module, str) else module.__name__
+                 for module in self.loader.get_registered_modules()]
+        prefixes = tuple('{0}.'.format(name) for name in names)
+
+        return {name: module for name, module in list(sys.modules.items())
+                if module is not None and getattr(module, '__file__', None) and
+                (name in names or name.startswith(prefixes))}
+
+    def check(self):
+        """
+        Checks watched files once and reloads modules whose files changed.
+
+        :return: Names of reloaded modules.
+        :rtype: list
+        """
+        reloaded = []
+        for name, module in self.get_watched_modules().items():
+            try:
+                mtime = os.stat(module.__file__).st_mtime_ns
+            except OSError:
+                continue
+
+            previous = self._mtimes.get(name)
+            self._mtimes[name] = mtime
+            if previous is None or previous == mtime:
+                continue
+
+            try:
+                self.reload_module(module)
+            except Exception:
+                logger.exception("Module '%s' could not be reloaded.", name)
+            else:
+                reloaded.append(name)
+
+        return reloaded
+
+    def reload_module(self, module):
+        """
+        Reloads a module and evicts from loader cache classes and factories which came from it. Listed
+        submodule names are forgotten too, because files could have been added to packages.
+
+        :param module: Module object.
+        """
+        old_values = list(vars(module).values())
+        old_ids = {id(value) for value in old_values}
+
+        importlib.reload(module)
+
+        invalidate_submodule_names = getattr(self.loader, 'invalidate_submodule_names', None)
+        if invalidate_submodule_names is not None:
+            invalidate_submodule_names()
+
+        cache = getattr(self.loader, '_cache', {})
+        for classname, klass in list(cache.items()):
+            if id(klass) in old_ids:
+                cache.pop(classname, None)
+
+        cache_factories = getattr(self.loader, '_cache_factories', {})
+        for klass in list(cache_factories.keys()):
+            if id(klass) in old_ids:
+                cache_factories.pop(klass, None)
+
+    def start(self):
+        """
+        Starts watching in a background thread.
+        """
+        if self._thread is not None:
+            return
+        self.check()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='dirty-loader-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops background thread.
+        """
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        if self.use_inotify:
+            return self._run_inotify()
+
+        while not self._stop_event.wait(self.interval):
+            self.check()
+
+    def _run_inotify(self):
+        inotify = INotify()
+        watched_dirs = set()
+        try:
+            while not self._stop_event.is_set():
+                for module in self.get_watched_modules().values():
+                    directory = os.path.dirname(module.__file__)
+                    if directory not in watched_dirs:
+                        inotify.add_watch(directory, flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO)
+                        watched_dirs.add(directory)
+
+                if inotify.read(timeout=int(self.interval * 1000)):
+                    self.check()
+        finally:
+            inotify.close()
@@ -5,16 +5,17 @@ setup(
     name='dirty-loader',
     url='https://github.com/alfred82santa/dirty-loader',
     author='alfred82santa',
-    version='0.2.2',
+    version='0.3.0',
     license='LGPLv2.1',
     author_email='alfred82santa@gmail.com',
     classifiers=[
         'Intended Audience :: Developers',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5'],
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9'],
     packages=['dirty_loader'],
+    python_requires='>=3.7',
     include_package_data=False,
     install_requires=[],
     description="Dirty loader for python 3",
@@ -0,0 +1,3 @@
+__author__ = 'alfred'
+
+raise RuntimeError('Broken module')
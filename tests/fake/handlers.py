@@ -0,0 +1,13 @@
+from logging import Handler
+
+__author__ = 'alfred'
+
+
+class ListHandler(Handler):
+
+    def __init__(self, *args, **kwargs):
+        super(ListHandler, self).__init__(*args, **kwargs)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+from tempfile import TemporaryDirectory
+from unittest.case import TestCase
+from dirty_loader import LoaderCached, LoaderNamespace, AlreadyRegisteredError
+from dirty_loader.archive import build_archive, get_exported_names, register_archive, PluginArchive
+
+__author__ = 'alfred'
+
+SOURCES = {
+    'dirty_loader_archived_a.py': 'class ArchivedClassA:\n    pass\n',
+    'dirty_loader_archived_pkg/__init__.py': 'from .models import ArchivedModel\n\nclass ArchivedClassB:\n    pass\n',
+    'dirty_loader_archived_pkg/models.py': 'class ArchivedModel:\n    pass\n\nclass _Private:\n    pass\n',
+    'dirty_loader_archived_slow.py': 'import time\n\ntime.sleep(0.05)\n\nclass ArchivedSlow:\n    pass\n',
+}
+
+
+class GetExportedNamesTest(TestCase):
+
+    def test_names(self):
+        source = 'import os\nfrom a import b as c\nX = 1\ny: int = 2\n_z = 3\n' \
+                 'class K:\n    attr = 1\ndef f():\n    pass\n'
+        self.assertEqual(get_exported_names(source), ['os', 'c', 'X', 'y', 'K', 'f'])
+
+    def test_all(self):
+        self.assertEqual(get_exported_names('__all__ = ["A"]\nclass A:\n    pass\nclass B:\n    pass\n'), ['A'])
+
+
+class PluginArchiveTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        source_dir = os.path.join(self.tmp_dir.name, 'src')
+        for filename, source in SOURCES.items():
+            path = os.path.join(source_dir, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(source)
+
+        self.path = os.path.join(self.tmp_dir.name, 'plugins.zip')
+        self.index = build_archive(self.path, source_dir)
+
+    def tearDown(self):
+        if self.path in sys.path:
+            sys.path.remove(self.path)
+        for name in list(sys.modules):
+            if name.startswith(('dirty_loader_archived_', 'dirty_loader_archive_')):
+                del sys.modules[name]
+        self.tmp_dir.cleanup()
+
+    def test_index(self):
+        self.assertEqual(self.index, {'dirty_loader_archived_a': ['ArchivedClassA'],
+                                      'dirty_loader_archived_pkg': ['ArchivedModel', 'ArchivedClassB'],
+                                      'dirty_loader_archived_pkg.models': ['ArchivedModel'],
+                                      'dirty_loader_archived_slow': ['time', 'ArchivedSlow']})
+
+        archive = PluginArchive(self.path)
+        self.assertEqual(archive.index, self.index)
+        self.assertEqual(archive.get_module_name('ArchivedModel'), 'dirty_loader_archived_pkg')
+        self.assertIsNone(archive.get_module_name('_Private'))
+
+    def test_register(self):
+        loader = LoaderCached()
+        loader.register_module('tests.fake.namespace1')
+        module = register_archive(loader, self.path)
+
+        self.assertEqual(module.__name__, 'dirty_loader_archive_plugins')
+        self.assertNotIn(self.path, sys.path)
+
+        klass = loader.load_class('ArchivedClassA')
+
+        self.assertEqual(klass.__name__, 'ArchivedClassA')
+        self.assertIn('plugins.zip', sys.modules['dirty_loader_archived_a'].__file__)
+        self.assertNotIn('dirty_loader_archived_pkg', sys.modules)
+
+        self.assertEqual(loader.load_class('ArchivedModel').__module__, 'dirty_loader_archived_pkg.models')
+
+        with self.assertRaises(ImportError):
+            loader.load_class('NotArchived')
+
+        with self.assertRaises(AlreadyRegisteredError):
+            register_archive(loader, self.path)
+
+    def test_not_shadowed(self):
+        shadow_dir = os.path.join(self.tmp_dir.name, 'shadow')
+        os.makedirs(os.path.join(shadow_dir, 'dirty_loader_archived_pkg'))
+        with open(os.path.join(shadow_dir, 'dirty_loader_archived_a.py'), 'w') as f:
+            f.write('class ArchivedClassA:\n    shadow = True\n')
+        with open(os.path.join(shadow_dir, 'dirty_loader_archived_pkg', '__init__.py'), 'w') as f:
+            f.write('class ArchivedModel:\n    shadow = True\n')
+
+        PluginArchive(self.path).install()
+        sys.path.insert(0, shadow_dir)
+        try:
+            loader = LoaderCached()
+            register_archive(loader, self.path)
+
+            self.assertFalse(hasattr(loader.load_class('ArchivedClassA'), 'shadow'))
+            self.assertFalse(hasattr(loader.load_class('ArchivedModel'), 'shadow'))
+            self.assertIn('plugins.zip', sys.modules['dirty_loader_archived_pkg.models'].__file__)
+        finally:
+            sys.path.remove(shadow_dir)
+
+    def test_already_imported(self):
+        sys.modules['dirty_loader_archived_a'] = module = type(sys)('dirty_loader_archived_a')
+        module.ArchivedClassA = object
+
+        loader = LoaderCached()
+        register_archive(loader, self.path)
+
+        with self.assertRaises(ImportError):
+            loader.load_class('ArchivedClassA')
+
+    def test_import_threads(self):
+        archive = PluginArchive(self.path)
+        barrier = threading.Barrier(8)
+        modules = []
+
+        def run():
+            barrier.wait()
+            modules.append(archive.import_module('dirty_loader_archived_slow'))
+
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(modules), 8)
+        self.assertTrue(all(module is sys.modules['dirty_loader_archived_slow'] for module in modules))
+
+    def test_register_namespace(self):
+        loader = LoaderNamespace()
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+        register_archive(loader, self.path, namespace='plugins')
+
+        self.assertEqual(loader.load_class('plugins:ArchivedClassB').__name__, 'ArchivedClassB')
+        self.assertEqual(loader.load_class('ArchivedClassA').__name__, 'ArchivedClassA')
@@ -0,0 +1,108 @@
+import types
+from logging import Logger, NullHandler, Formatter, getLogger
+from unittest.case import TestCase
+from dirty_loader import LoaderNamespace, ResolutionRecorder
+from dirty_loader.codegen import generate_module, verify_module, CodegenError
+from dirty_loader.logging_factories import register_logging_factories
+
+__author__ = 'alfred'
+
+
+def exec_module(source):
+    module = types.ModuleType('generated')
+    exec(compile(source, '<generated>', 'exec'), vars(module))
+    return module
+
+
+class ResolutionRecorderTest(TestCase):
+
+    def test_record(self):
+        loader = LoaderNamespace()
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+        loader.register_namespace('fake2', 'tests.fake.namespace2')
+
+        from tests.fake.namespace1 import FakeClass3
+        from tests.fake.namespace2 import FakeClass1
+
+        with ResolutionRecorder(loader) as recorder:
+            loader.load_class('fake2:FakeClass1')
+            loader.load_class('FakeClass3')
+
+        self.assertEqual(dict(recorder.resolutions), {'fake2:FakeClass1': FakeClass1, 'FakeClass3': FakeClass3})
+        self.assertNotIn('load_class', vars(loader))
+
+    def test_nested(self):
+        loader = LoaderNamespace()
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+
+        with ResolutionRecorder(loader) as outer:
+            outer_load_class = loader.load_class
+            with ResolutionRecorder(loader) as inner:
+                loader.load_class('FakeClass1')
+            self.assertIs(loader.load_class, outer_load_class)
+            loader.load_class('FakeClass2')
+
+        self.assertEqual(list(inner.resolutions), ['FakeClass1'])
+        self.assertEqual(list(outer.resolutions), ['FakeClass1', 'FakeClass2'])
+        self.assertNotIn('load_class', vars(loader))
+
+
+class GenerateModuleTest(TestCase):
+
+    def setUp(self):
+        self.loader = LoaderNamespace()
+        self.loader.register_namespace('logging', 'logging')
+        self.loader.register_namespace('fake1', 'tests.fake.namespace1')
+        register_logging_factories(self.loader)
+
+        self.descriptors = {'obj': {'type': 'FakeClass1', 'params': {'var1': 'a', 'var2': [1, {'b': 2}]}},
+                            'handler': {'logging:NullHandler': {'formatter': {'type': 'logging:Formatter',
+                                                                              'params': {'fmt': '%(message)s'}}}},
+                            'logger': {'type': 'logging:Logger',
+                                       'params': {'name': 'foo.codegen', 'handlers': ['logging:NullHandler']}}}
+
+    def tearDown(self):
+        getLogger('foo.codegen').handlers = []
+
+    def test_generate(self):
+        source = generate_module(self.loader, self.descriptors, verify=False)
+        self.assertNotIn('load_class', source)
+        self.assertIn('import tests.fake.namespace1 as ', source)
+
+        module = exec_module(source)
+
+        from tests.fake.namespace1 import FakeClass1
+
+        self.assertIsInstance(module.obj, FakeClass1)
+        self.assertEqual(module.obj.var2, [1, {'b': 2}])
+        self.assertIsInstance(module.handler, NullHandler)
+        self.assertIsInstance(module.handler.formatter, Formatter)
+        self.assertEqual(module.handler.formatter._fmt, '%(message)s')
+        self.assertIsInstance(module.logger, Logger)
+        self.assertEqual(len(module.logger.handlers), 1)
+        self.assertIsInstance(module.logger.handlers[0], NullHandler)
+        self.assertEqual(module.RESOLUTIONS['logging:Formatter'], Formatter)
+
+        self.assertEqual(verify_module(module, self.loader, self.descriptors), [])
+
+    def test_generate_builds_once(self):
+        generate_module(self.loader, self.descriptors)
+
+        self.assertEqual(len(getLogger('foo.codegen').handlers), 1)
+
+    def test_verify_mismatch(self):
+        module = exec_module(generate_module(self.loader, self.descriptors))
+
+        self.loader.unregister_namespace('fake1')
+        self.loader.register_namespace('fake2', 'tests.fake.namespace2')
+
+        errors = verify_module(module, self.loader, self.descriptors)
+        self.assertEqual(len(errors), 2)
+
+    def test_invalid_name(self):
+        with self.assertRaises(CodegenError):
+            generate_module(self.loader, {'not valid': 'FakeClass2'})
+
+    def test_invalid_param(self):
+        with self.assertRaises(CodegenError):
+            generate_module(self.loader, {'obj': {'type': 'FakeClass2', 'params': {'var1': object()}}})
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+from unittest.case import TestCase
+from dirty_loader import LoaderNamespace
+from dirty_loader.facade import make_facade_module
+
+__author__ = 'alfred'
+
+
+class FacadeModuleTest(TestCase):
+
+    def setUp(self):
+        self.loader = LoaderNamespace()
+        self.loader.register_namespace('fake2', 'tests.fake.namespace2')
+        self.loader.register_namespace('fake1', 'tests.fake.namespace1')
+
+    def tearDown(self):
+        sys.modules.pop('tests.fake_facade', None)
+
+    def test_import_from(self):
+        module = make_facade_module(self.loader, 'tests.fake_facade')
+
+        from tests.fake_facade import FakeClass1, FakeClass3
+        from tests.fake.namespace1 import FakeClass3 as OriginalFakeClass3
+        from tests.fake.namespace2 import FakeClass1 as OriginalFakeClass1
+
+        self.assertEqual(FakeClass1, OriginalFakeClass1)
+        self.assertEqual(FakeClass3, OriginalFakeClass3)
+        self.assertEqual(vars(module)['FakeClass1'], OriginalFakeClass1)
+
+    def test_missing_attribute(self):
+        module = make_facade_module(self.loader, 'tests.fake_facade', install=False)
+
+        self.assertNotIn('tests.fake_facade', sys.modules)
+        with self.assertRaises(AttributeError):
+            module.FakeClass6
+        with self.assertRaises(ImportError):
+            from tests.fake_facade import FakeClass6  # noqa
+
+    def test_namespace_attribute(self):
+        module = make_facade_module(self.loader, 'tests.fake_facade')
+
+        from tests.fake.namespace1 import FakeClass1
+
+        self.assertEqual(getattr(module, 'fake1:FakeClass1'), FakeClass1)
+
+
+class LazyImportTest(TestCase):
+
+    def test_logging_not_imported(self):
+        code = 'import sys, dirty_loader, dirty_loader.factories; print("logging" in sys.modules)'
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(output.strip(), b'False')
+
+    def test_inspect_not_imported(self):
+        code = 'import sys, dirty_loader, dirty_loader.factories; print("inspect" in sys.modules)'
+        output = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(output.strip(), b'False')
@@ -1,7 +1,13 @@
-from logging import NullHandler, Filter, Formatter, getLogger
+from logging import NullHandler, Filter, Formatter, getLogger, LogRecord, INFO
+from logging.handlers import QueueHandler
+import asyncio
+import time
+from queue import Queue
 from unittest.case import TestCase
-from dirty_loader import LoaderNamespace
-from dirty_loader.factories import register_logging_factories, instance_params, BaseFactory
+from unittest.mock import patch
+from dirty_loader import LoaderNamespace, LoaderCached, LoaderMemoized
+from dirty_loader.factories import register_logging_factories, instance_params, copy_instance_params, BaseFactory, \
+    BoundedQueueHandler, stop_queue_listeners, AsyncFactory, PooledFactory
 
 __author__ = 'alfred'
 
@@ -50,6 +56,68 @@ class LoggingHandlerFactoryTests(TestCase):
         self.assertIsInstance(handler.formatter, Formatter)
         self.assertEqual(handler.formatter.datefmt, 'foo.bar')
 
+    def test_queued_handler(self):
+        handler = self.loader.factory('logging:NullHandler', formatter='logging:Formatter',
+                                      async_queue={'maxsize': 10, 'overflow': 'drop_count'})
+        self.assertIsInstance(handler, BoundedQueueHandler)
+        self.assertEqual(handler.queue.maxsize, 10)
+        self.assertEqual(handler.overflow, 'drop_count')
+        self.assertIsInstance(handler.listener.handlers[0], NullHandler)
+        self.assertIsInstance(handler.listener.handlers[0].formatter, Formatter)
+        stop_queue_listeners()
+
+    def test_queued_handler_flush_on_shutdown(self):
+        self.loader.register_namespace('fake', 'tests.fake.handlers')
+
+        handler = self.loader.factory('fake:ListHandler', async_queue=True)
+        for i in range(100):
+            handler.handle(LogRecord('foo', INFO, __file__, 1, 'message %d', (i,), None))
+        stop_queue_listeners()
+
+        self.assertEqual(handler.listener.handlers[0].records, ['message %d' % i for i in range(100)])
+
+    def test_queued_handler_closed(self):
+        for flush_on_shutdown in (True, False):
+            handler = self.loader.factory('logging:NullHandler',
+                                          async_queue={'flush_on_shutdown': flush_on_shutdown})
+            thread = handler.listener._thread
+            self.assertTrue(thread.is_alive())
+
+            handler.close()
+            self.assertFalse(thread.is_alive())
+            handler.close()
+
+        stop_queue_listeners()
+
+    def test_queued_handler_closed_after_shutdown(self):
+        handler = self.loader.factory('logging:NullHandler', async_queue=True)
+        stop_queue_listeners()
+        handler.close()
+
+    def test_stdlib_queue_handler(self):
+        queue = Queue()
+        handler = self.loader.factory('logging:handlers.QueueHandler', queue=queue)
+
+        self.assertIsInstance(handler, QueueHandler)
+        self.assertIs(handler.queue, queue)
+
+    def test_queued_handler_overflow(self):
+        handler = BoundedQueueHandler(Queue(1), overflow='drop_count')
+        record = LogRecord('foo', INFO, __file__, 1, 'message', None, None)
+        handler.handle(record)
+        handler.handle(record)
+        handler.handle(record)
+        self.assertEqual(handler.queue.qsize(), 1)
+        self.assertEqual(handler.dropped, 2)
+
+        handler = BoundedQueueHandler(Queue(1), overflow='drop')
+        handler.handle(record)
+        handler.handle(record)
+        self.assertEqual(handler.dropped, 0)
+
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(Queue(1), overflow='foo')
+
 
 class LoggerFactoryTests(TestCase):
 
@@ -68,6 +136,18 @@ class LoggerFactoryTests(TestCase):
         self.assertEqual(len(logger.handlers), 1)
         self.assertIsInstance(logger.handlers[0], NullHandler)
 
+    def test_simple_logger_with_queued_handlers(self):
+        logger = self.loader.factory('logging:Logger', name='foo.bar.test.3',
+                                     handlers=['logging:NullHandler',
+                                               {'type': 'logging:NullHandler', 'params': {'async_queue': True}}],
+                                     async_queue={'maxsize': 5})
+        self.assertEqual(len(logger.handlers), 2)
+        self.assertIsInstance(logger.handlers[0], QueueHandler)
+        self.assertEqual(logger.handlers[0].queue.maxsize, 5)
+        self.assertIsInstance(logger.handlers[1], QueueHandler)
+        self.assertEqual(logger.handlers[1].queue.maxsize, 0)
+        stop_queue_listeners()
+
 
 class InstanceParamsTests(TestCase):
 
@@ -89,6 +169,18 @@ class InstanceParamsTests(TestCase):
         self.assertEqual(klass, 'fakeclass')
         self.assertEqual(params, {'param1': 'value1', 'param2': 2})
 
+    def test_copy(self):
+        handler = NullHandler()
+        desc = {'logging:Logger': {'name': 'foo', 'handlers': [{'logging:NullHandler': {}}, handler]}}
+
+        klass, params = copy_instance_params(desc)
+        instance_params(params['handlers'][0])
+
+        self.assertEqual(klass, 'logging:Logger')
+        self.assertIs(params['handlers'][1], handler)
+        self.assertEqual(desc, {'logging:Logger': {'name': 'foo',
+                                                   'handlers': [{'logging:NullHandler': {}}, handler]}})
+
 
 class BaseFactoryTests(TestCase):
 
@@ -127,3 +219,204 @@ class BaseFactoryTests(TestCase):
         factory = BaseFactory(self.loader, self.__class__)
 
         self.assertEqual(factory.load_item('foobar', str), 'foobar')
+
+
+class FakeAsyncFactory(AsyncFactory):
+
+    running = 0
+    max_running = 0
+
+    async def __call__(self, var1=None, var2=None):
+        FakeAsyncFactory.running += 1
+        FakeAsyncFactory.max_running = max(FakeAsyncFactory.max_running, FakeAsyncFactory.running)
+        await asyncio.sleep(0.01)
+        FakeAsyncFactory.running -= 1
+        return await super(FakeAsyncFactory, self).__call__(var1=var1, var2=var2)
+
+
+class AsyncFactoryTests(TestCase):
+
+    def setUp(self):
+        from tests.fake.namespace1 import FakeClass2
+
+        self.loader = LoaderCached()
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.register_factory(FakeClass2, FakeAsyncFactory)
+        FakeAsyncFactory.running = 0
+        FakeAsyncFactory.max_running = 0
+
+    def test_afactory(self):
+        from tests.fake.namespace1 import FakeClass2, FakeClass3
+
+        obj = asyncio.run(self.loader.afactory('FakeClass2', var1='a'))
+        self.assertIsInstance(obj, FakeClass2)
+        self.assertEqual(obj.var1, 'a')
+
+        obj = asyncio.run(self.loader.afactory('FakeClass3', var1='a'))
+        self.assertIsInstance(obj, FakeClass3)
+
+    def test_afactory_sync_factory_awaitable(self):
+        from tests.fake.namespace1 import FakeClass3
+
+        class AwaitableFactory(BaseFactory):
+
+            def __call__(self, *args, **kwargs):
+                return asyncio.sleep(0, result='awaited')
+
+        self.loader.register_factory(FakeClass3, AwaitableFactory)
+
+        async def build():
+            obj = await self.loader.afactory('FakeClass3')
+            self.assertTrue(asyncio.iscoroutine(obj))
+            return await obj
+
+        self.assertEqual(asyncio.run(build()), 'awaited')
+
+    def test_afactory_coroutine_function(self):
+        from tests.fake.namespace1 import FakeClass3
+
+        async def factory(**kwargs):
+            return 'built'
+
+        self.loader.register_factory(FakeClass3, lambda loader, klass: factory)
+
+        self.assertEqual(asyncio.run(self.loader.afactory('FakeClass3')), 'built')
+
+    def test_afactory_resolves_once(self):
+        from tests.fake.namespace1 import FakeClass2
+
+        with patch.object(self.loader, 'load_class', wraps=self.loader.load_class) as load_mock, \
+                patch.object(self.loader, 'get_factory_by_class',
+                             wraps=self.loader.get_factory_by_class) as factory_mock:
+            obj = asyncio.run(self.loader.afactory('FakeClass2', var1='a'))
+
+        self.assertIsInstance(obj, FakeClass2)
+        self.assertEqual(load_mock.call_count, 1)
+        self.assertEqual(factory_mock.call_count, 1)
+
+    def test_afactory_memoized(self):
+        from tests.fake.namespace1 import FakeClass3
+
+        loader = LoaderMemoized(memoize_default=True)
+        loader.register_module('tests.fake.namespace1')
+
+        obj = asyncio.run(loader.afactory('FakeClass3'))
+        self.assertIsInstance(obj, FakeClass3)
+        self.assertIs(loader.factory('FakeClass3'), obj)
+
+    def test_afactory_frozen(self):
+        from tests.fake.namespace1 import FakeClass2
+
+        obj = asyncio.run(self.loader.freeze().afactory('FakeClass2', var1='a'))
+        self.assertIsInstance(obj, FakeClass2)
+
+    def test_aload_item_list(self):
+        from tests.fake.namespace1 import FakeClass2, FakeClass3
+
+        factory = BaseFactory(self.loader, self.__class__)
+        factory.concurrency = 3
+
+        existing = FakeClass3()
+        result = asyncio.run(factory.aload_item_list(['FakeClass2'] * 6 +
+                                                     [{'type': 'FakeClass2', 'params': {'var1': 'b'}},
+                                                      'FakeClass3', existing], FakeClass3))
+
+        self.assertEqual(len(result), 9)
+        self.assertTrue(all(isinstance(obj, FakeClass2) for obj in result[:7]))
+        self.assertEqual(result[6].var1, 'b')
+        self.assertIsInstance(result[7], FakeClass3)
+        self.assertIs(result[8], existing)
+        self.assertEqual(FakeAsyncFactory.max_running, 3)
+
+    def test_aload_item_list_none(self):
+        factory = BaseFactory(self.loader, self.__class__)
+
+        self.assertEqual(asyncio.run(factory.aload_item_list(None)), [])
+        self.assertEqual(asyncio.run(factory.aload_named_item_list(None)), {})
+
+    def test_aload_named_item_list(self):
+        from tests.fake.namespace1 import FakeClass2
+
+        factory = BaseFactory(self.loader, self.__class__)
+        result = asyncio.run(factory.aload_named_item_list({'a': 'FakeClass2',
+                                                            'b': {'FakeClass2': {'var1': 'b'}}}))
+
+        self.assertEqual(sorted(result), ['a', 'b'])
+        self.assertIsInstance(result['a'], FakeClass2)
+        self.assertEqual(result['b'].var1, 'b')
+        self.assertEqual(FakeAsyncFactory.max_running, 2)
+
+
+class PooledFactoryTests(TestCase):
+
+    def setUp(self):
+        from tests.fake.namespace1 import FakeClass2
+
+        self.loader = LoaderCached()
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.register_factory(FakeClass2, PooledFactory.configure(max_size=2))
+        self.factory = self.loader.get_factory_by_class(FakeClass2)
+
+    def test_configure(self):
+        self.assertIsInstance(self.factory, PooledFactory)
+        self.assertEqual(self.factory.max_size, 2)
+        self.assertEqual(PooledFactory.max_size, 8)
+
+    def test_reuse(self):
+        with self.factory.acquire(var1='a', var2={'b': [1, 2]}) as obj1:
+            self.assertEqual(obj1.var1, 'a')
+
+        self.assertEqual(self.factory.get_idle_count(), 1)
+
+        with self.factory.acquire(var1='a', var2={'b': [1, 2]}) as obj2:
+            self.assertIs(obj2, obj1)
+            self.assertEqual(self.factory.get_idle_count(), 0)
+            with self.factory.acquire(var1='a', var2={'b': [1, 2]}) as obj3:
+                self.assertIsNot(obj3, obj1)
+
+        with self.factory.acquire(var1='a', var2={'b': (1, 2)}) as obj4:
+            self.assertIsNot(obj4, obj1)
+            self.assertIsNot(obj4, obj3)
+
+    def test_loader_factory(self):
+        obj1 = self.loader.factory('FakeClass2', var1='a')
+        self.factory.release(obj1)
+        self.assertEqual(self.factory.get_idle_count(), 0)
+        self.assertEqual(self.factory._acquired, {})
+
+        obj2 = self.factory.take(var1='a')
+        self.factory.release(obj2)
+        self.assertIsNot(self.loader.factory('FakeClass2', var1='a'), obj2)
+
+        obj3 = self.factory.load_item({'type': 'FakeClass2', 'params': {'var1': 'a'}})
+        self.assertIsNot(obj3, obj2)
+        self.assertEqual(self.factory.get_idle_count(), 1)
+
+    def test_take(self):
+        obj1 = self.factory.take(var1='a')
+        self.factory.release(obj1)
+        self.assertIs(self.factory.take(var1='a'), obj1)
+
+    def test_max_size(self):
+        objs = [self.factory.take(var1=i) for i in range(4)]
+        for obj in objs:
+            self.factory.release(obj)
+        self.factory.release(objs[0])
+
+        self.assertEqual(self.factory.get_idle_count(), 2)
+        self.assertIs(self.factory.take(var1=3), objs[3])
+        self.assertIsNot(self.factory.take(var1=0), objs[0])
+
+    def test_idle_timeout(self):
+        self.factory.idle_timeout = 0.01
+        self.factory.release(self.factory.take(var1='a'))
+        self.assertEqual(self.factory.get_idle_count(), 1)
+
+        time.sleep(0.02)
+        self.factory.evict_idle()
+        self.assertEqual(self.factory.get_idle_count(), 0)
+
+    def test_unhashable_params(self):
+        obj1 = self.factory.take(var1=bytearray(b'a'))
+        self.factory.release(obj1)
+        self.assertEqual(self.factory.get_idle_count(), 0)
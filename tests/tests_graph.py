@@ -0,0 +1,158 @@
+from copy import deepcopy
+from logging import Logger, NullHandler, StreamHandler
+from unittest.case import TestCase
+from dirty_loader import LoaderNamespace, LoaderNamespaceCached
+from dirty_loader.factories import BaseFactory
+from dirty_loader.graph import ObjectGraph
+from dirty_loader.logging_factories import register_logging_factories
+
+__author__ = 'alfred'
+
+
+class ObjectGraphTest(TestCase):
+
+    def setUp(self):
+        self.loader = LoaderNamespace()
+        self.loader.register_namespace('logging', 'logging')
+        self.loader.register_namespace('fake1', 'tests.fake.namespace1')
+        self.loader.register_namespace('fake2', 'tests.fake.namespace2')
+        register_logging_factories(self.loader)
+
+        self.tree = {'logger': {'type': 'logging:Logger',
+                                'params': {'name': 'test_graph',
+                                           'handlers': [{'type': 'logging:NullHandler',
+                                                         'params': {'formatter': {'type': 'logging:Formatter',
+                                                                                  'params': {'fmt': '%(message)s'}}}},
+                                                        {'type': 'logging:NullHandler',
+                                                         'params': {'level': 'ERROR'}}]}},
+                     'fake': {'type': 'fake1:FakeClass1', 'params': {'var1': 1, 'var2': 2}}}
+
+    def test_build(self):
+        graph = ObjectGraph(self.loader, self.tree)
+
+        self.assertIsInstance(graph.items['logger'], Logger)
+        self.assertEqual(len(graph.items['logger'].handlers), 2)
+        self.assertEqual(graph.items['fake'].var1, 1)
+        self.assertEqual(graph.reused, 0)
+        self.assertNotIn('factory', vars(self.loader))
+
+    def test_build_keeps_outer_wrapper(self):
+        calls = []
+        factory = self.loader.factory
+
+        def outer_factory(classname, *args, **kwargs):
+            calls.append(classname)
+            return factory(classname, *args, **kwargs)
+
+        self.loader.factory = outer_factory
+        ObjectGraph(self.loader, {'fake': self.tree['fake']})
+
+        self.assertIs(self.loader.factory, outer_factory)
+        self.assertEqual(calls, [])
+
+    def test_build_does_not_patch_loader(self):
+        from tests.fake.namespace1 import FakeClass1
+
+        seen = []
+
+        class RecordingFactory(BaseFactory):
+
+            def __call__(factory, *args, **kwargs):
+                seen.append('factory' in vars(self.loader))
+                self.loader.factory('fake1:FakeClass2')
+                return super(RecordingFactory, factory).__call__(*args, **kwargs)
+
+        self.loader.register_factory(FakeClass1, RecordingFactory)
+        graph = ObjectGraph(self.loader, {'fake': self.tree['fake']})
+
+        self.assertEqual(graph.built, 1)
+        self.assertEqual(len(list(graph.iter_nodes())), 1)
+        self.assertEqual(seen, [False])
+
+    def test_build_keeps_built_objects(self):
+        handler = StreamHandler()
+        null_handler = NullHandler()
+        graph = ObjectGraph(self.loader, {'logger': {'type': 'logging:Logger',
+                                                     'params': {'name': 'test_graph_built',
+                                                                'handlers': [handler, null_handler]}}})
+
+        logger = graph.items['logger']
+        self.assertIs(logger.handlers[-2], handler)
+        self.assertIs(logger.handlers[-1], null_handler)
+        self.assertIs(graph.tree['logger']['params']['handlers'][0], handler)
+        for item in (handler, null_handler):
+            logger.removeHandler(item)
+
+    def test_build_list(self):
+        graph = ObjectGraph(self.loader, [self.tree['fake'], 'fake1:FakeClass2'])
+
+        self.assertEqual(graph.items[0].var1, 1)
+        self.assertEqual(type(graph.items[1]).__name__, 'FakeClass2')
+
+    def test_rebuild_unchanged(self):
+        graph = ObjectGraph(self.loader, self.tree)
+        new_graph = graph.rebuild(self.tree)
+
+        self.assertIs(new_graph.items['logger'], graph.items['logger'])
+        self.assertIs(new_graph.items['fake'], graph.items['fake'])
+        self.assertEqual(new_graph.reused, 2)
+
+    def test_rebuild_changed_subtree(self):
+        self.tree['handler'] = {'type': 'logging:NullHandler',
+                                'params': {'level': 'ERROR',
+                                           'formatter': {'type': 'logging:Formatter',
+                                                         'params': {'fmt': '%(message)s'}}}}
+        graph = ObjectGraph(self.loader, self.tree)
+
+        self.tree['handler']['params']['level'] = 'DEBUG'
+        new_graph = graph.rebuild(self.tree)
+
+        self.assertIs(new_graph.items['fake'], graph.items['fake'])
+        self.assertIs(new_graph.items['logger'], graph.items['logger'])
+        self.assertIsNot(new_graph.items['handler'], graph.items['handler'])
+        self.assertEqual(new_graph.items['handler'].level, 10)
+        self.assertIs(new_graph.items['handler'].formatter, graph.items['handler'].formatter)
+        self.assertEqual(new_graph.reused, 3)
+
+    def test_rebuild_changed_class(self):
+        graph = ObjectGraph(self.loader, self.tree)
+
+        self.loader.unregister_namespace('fake1')
+        self.loader.register_namespace('fake1', 'tests.fake.namespace2')
+        new_graph = graph.rebuild(self.tree)
+
+        self.assertIsNot(new_graph.items['fake'], graph.items['fake'])
+        self.assertEqual(type(new_graph.items['fake']).__module__, 'tests.fake.namespace2')
+        self.assertIs(new_graph.items['logger'], graph.items['logger'])
+
+    def test_rebuild_duplicated_descriptors(self):
+        graph = ObjectGraph(self.loader, [self.tree['fake']])
+        new_graph = graph.rebuild([self.tree['fake'], self.tree['fake']])
+
+        self.assertIs(new_graph.items[0], graph.items[0])
+        self.assertIsNot(new_graph.items[1], graph.items[0])
+        self.assertEqual(new_graph.reused, 1)
+
+    def test_rebuild_unhashable_params(self):
+        loader = LoaderNamespaceCached()
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+        tree = [{'type': 'fake1:FakeClass1', 'params': {'var1': [bytearray(b'a')], 'var2': {'a': bytearray(b'b')}}}]
+
+        graph = ObjectGraph(loader, tree)
+        new_graph = graph.rebuild(tree)
+
+        self.assertEqual(new_graph.reused, 0)
+        self.assertIsNot(new_graph.items[0], graph.items[0])
+
+    def test_rebuild_does_not_share_nested_objects(self):
+        handler = {'type': 'logging:NullHandler',
+                   'params': {'formatter': {'type': 'logging:Formatter', 'params': {'fmt': '%(message)s'}}}}
+        graph = ObjectGraph(self.loader, [handler, deepcopy(handler)])
+
+        handler['params']['level'] = 'DEBUG'
+        new_graph = graph.rebuild([handler, graph.tree[1]])
+
+        self.assertIs(new_graph.items[1], graph.items[1])
+        self.assertIsNot(new_graph.items[0], graph.items[0])
+        self.assertIs(new_graph.items[0].formatter, graph.items[0].formatter)
+        self.assertEqual(new_graph.built, 1)
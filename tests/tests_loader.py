@@ -1,7 +1,19 @@
 from collections import OrderedDict
+import gc
+import importlib
+import os
+import sys
+import threading
+import weakref
+from tempfile import TemporaryDirectory
 from unittest.case import TestCase
+from unittest.mock import patch
+import dirty_loader
 from dirty_loader import Loader, NoRegisteredError, AlreadyRegisteredError, LoaderReversed, LoaderNamespace, \
-    LoaderNamespaceReversed, LoaderCached, LoaderReversedCached, LoaderNamespaceReversedCached, LoaderNamespaceCached
+    LoaderNamespaceReversed, LoaderCached, LoaderReversedCached, LoaderNamespaceReversedCached, LoaderNamespaceCached, \
+    FrozenLoader, LoaderAdaptive, LoaderNamespaceAdaptive, LoaderMemoized, LoaderNamespaceMemoized
+from dirty_loader import may_export, get_submodule_names, make_params_key, is_current, get_origin, \
+    ModuleRegistry
 from dirty_loader.factories import BaseFactory
 
 __author__ = 'alfred'
@@ -86,6 +98,16 @@ class LoaderTest(TestCase):
         with self.assertRaises(NoRegisteredError):
             self.loader.unregister_module('tests.fake.namespace2')
 
+    def test_module_identity(self):
+        import tests.fake.namespace1
+        self.loader.register_module('tests.fake.namespace1')
+
+        with self.assertRaises(AlreadyRegisteredError):
+            self.loader.register_module(tests.fake.namespace1)
+
+        self.loader.unregister_module(tests.fake.namespace1)
+        self.assertEqual(self.loader.get_registered_modules(), [])
+
     def test_register_fail(self):
         self.loader.register_module('tests.fake.namespace1')
         self.loader.register_module('tests.fake.namespace2', idx=0)
@@ -97,6 +119,43 @@ class LoaderTest(TestCase):
         with self.assertRaises(ImportError):
             self.loader.load_class('FakeClass3')
 
+    def test_lazy_import(self):
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.register_module('tests.fake.not_existing_module')
+
+        from tests.fake.namespace1 import FakeClass1
+
+        self.assertEquals(self.loader.load_class('FakeClass1'), FakeClass1)
+        self.assertNotIn('tests.fake.not_existing_module', sys.modules)
+
+    def test_skip_modules(self):
+        self.loader.register_module('tests.fake.namespace2')
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.register_module('tests.fake.namespace3')
+
+        from tests.fake.namespace1 import FakeClass3
+        from tests.fake.namespace3.subsubnamespace.subnamespace import FakeClass4
+
+        with patch('dirty_loader.import_class', wraps=dirty_loader.import_class) as import_mock:
+            self.assertEquals(self.loader.load_class('FakeClass3'), FakeClass3)
+            self.assertEquals(self.loader.load_class('subsubnamespace.subnamespace.FakeClass4'), FakeClass4)
+            with self.assertRaises(ImportError):
+                self.loader.load_class('FakeClass6')
+
+        self.assertEquals(import_mock.call_count, 2)
+
+    def test_memory_report(self):
+        sys.modules.pop('colorsys', None)
+        self.loader.register_module('colorsys')
+        self.loader.register_module('tests.fake.namespace1')
+
+        self.loader.load_class('FakeClass1')
+
+        report = self.loader.memory_report()
+        self.assertEqual(list(report['imported_modules'].keys()), ['colorsys'])
+        self.assertGreater(report['imported_modules']['colorsys'], 0)
+        self.assertEqual(report['imported_modules_size'], report['imported_modules']['colorsys'])
+
     def test_factory(self):
         self.loader.register_module('tests.fake.namespace1')
         self.loader.register_module('tests.fake.namespace2', idx=0)
@@ -223,6 +282,18 @@ class LoaderCachedTest(LoaderTest):
     def setUp(self):
         self.loader = LoaderCached()
 
+    def test_released_without_gc(self):
+        loader = LoaderCached(modules=['tests.fake.namespace1'])
+        loader.load_class('FakeClass1')
+        ref = weakref.ref(loader)
+
+        gc.disable()
+        try:
+            del loader
+            self.assertIsNone(ref())
+        finally:
+            gc.enable()
+
     def test_load_class_cached(self):
         self.loader.register_module('tests.fake.namespace1')
         self.loader.register_module('tests.fake.namespace2')
@@ -250,6 +321,61 @@ class LoaderCachedTest(LoaderTest):
 
         self.assertEquals(self.loader._cache, {})
 
+    def test_memory_report_cache(self):
+        self.loader.register_module('tests.fake.namespace1')
+
+        report = self.loader.memory_report()
+        self.assertEqual(report['cache_entries'], 0)
+        self.assertEqual(report['factory_cache_entries'], 0)
+
+        self.loader.register_factory(self.loader.load_class('FakeClass3'), BaseFactory)
+        self.loader.factory('FakeClass1', var1='a', var2=2)
+        self.loader.factory('FakeClass3')
+
+        report = self.loader.memory_report()
+        self.assertEqual(report['cache_entries'], 2)
+        self.assertGreater(report['cache_size'], 0)
+        self.assertEqual(report['factory_cache_entries'], 2)
+        self.assertGreater(report['factory_cache_size'], 0)
+
+    def test_preload_for_fork(self):
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.register_module('tests.fake.namespace2')
+
+        from tests.fake.namespace1 import FakeClass1, FakeClass3
+
+        try:
+            self.loader.preload_for_fork(classnames=['FakeClass1', 'FakeClass3'])
+            if hasattr(gc, 'get_freeze_count'):
+                self.assertGreater(gc.get_freeze_count(), 0)
+        finally:
+            if hasattr(gc, 'unfreeze'):
+                gc.unfreeze()
+
+        self.assertEquals(self.loader._cache, {'FakeClass1': FakeClass1, 'FakeClass3': FakeClass3})
+        self.assertEquals(self.loader._cache_factories, {FakeClass1: FakeClass1, FakeClass3: FakeClass3})
+
+    def test_preload_for_fork_gc_order(self):
+        self.loader.register_module('tests.fake.namespace1')
+
+        with patch('dirty_loader.gc') as gc_mock:
+            gc_mock.isenabled.return_value = True
+            gc_mock.disable.side_effect = lambda: self.assertEqual(self.loader._cache, {})
+            self.loader.preload_for_fork(classnames=['FakeClass1'])
+
+        self.assertEqual([name for name, _, _ in gc_mock.mock_calls], ['isenabled', 'disable', 'freeze', 'enable'])
+        gc_mock.collect.assert_not_called()
+
+    def test_preload_for_fork_gc_disabled(self):
+        self.loader.register_module('tests.fake.namespace1')
+
+        with patch('dirty_loader.gc') as gc_mock:
+            gc_mock.isenabled.return_value = False
+            self.loader.preload_for_fork(classnames=['FakeClass1'])
+
+        gc_mock.freeze.assert_called_once_with()
+        gc_mock.enable.assert_not_called()
+
     def test_custom_factories(self):
         self.loader.register_module('tests.fake.namespace1')
         self.loader.register_module('tests.fake.namespace2', idx=0)
@@ -312,6 +438,220 @@ class LoaderCachedTest(LoaderTest):
         self.assertEquals(obj.var2, 3)
 
 
+class LoaderCachedWeakTest(LoaderCachedTest):
+
+    def setUp(self):
+        self.loader = LoaderCached(weak_cache=True)
+
+    def test_preload_for_fork(self):
+        self.loader.register_module('tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass1
+
+        self.loader.preload_for_fork(classnames=['FakeClass1'], freeze_gc=False)
+
+        self.assertEquals(self.loader._cache, {'FakeClass1': FakeClass1})
+        self.assertEquals(dict(self.loader._cache_factories), {FakeClass1: None})
+        self.assertIs(self.loader.get_factory_by_class(FakeClass1), FakeClass1)
+
+    def test_classes_garbage_collected(self):
+        self.loader.register_module(__name__)
+
+        globals()['TempClass'] = type('TempClass', (object,), {})
+        klass = self.loader.load_class('TempClass')
+        self.assertIs(self.loader.get_factory_by_class(klass), klass)
+        self.assertEqual(len(self.loader._cache), 1)
+        self.assertEqual(len(self.loader._cache_factories), 1)
+
+        del globals()['TempClass']
+        del klass
+        gc.collect()
+
+        self.assertEqual(len(self.loader._cache), 0)
+        self.assertEqual(len(self.loader._cache_factories), 0)
+
+    def test_factory_without_cycles(self):
+        self.loader.register_module('tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass3
+
+        self.loader.register_factory(FakeClass3, BaseFactory)
+        factory = self.loader.get_factory_by_class(FakeClass3)
+        self.assertIs(self.loader.get_factory_by_class(FakeClass3), factory)
+
+        loader_ref = weakref.ref(self.loader)
+        gc.disable()
+        try:
+            del self.loader
+            self.assertIsNone(loader_ref())
+        finally:
+            gc.enable()
+
+    def test_not_weak_referenceable(self):
+        self.loader.register_module('tests.fake.namespace3')
+
+        self.assertEqual(self.loader.load_class('__author__'), 'alfred')
+        self.assertEqual(len(self.loader._cache), 0)
+
+
+class LoaderAdaptiveTest(LoaderTest):
+
+    def setUp(self):
+        self.loader = LoaderAdaptive()
+        self.loader.adapt_interval = 1
+
+    def test_module_hits(self):
+        self.loader.register_module('tests.fake.namespace2')
+        self.loader.register_module('tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass3
+        from tests.fake.namespace2 import FakeClass1
+
+        for _ in range(3):
+            self.assertEquals(self.loader.load_class('FakeClass3'), FakeClass3)
+
+        self.assertEquals(self.loader.get_module_hits(), {'tests.fake.namespace1': 3})
+
+        self.assertEquals(self.loader.load_class('FakeClass1'), FakeClass1)
+        self.assertEquals(self.loader.get_module_hits(), {'tests.fake.namespace1': 3,
+                                                          'tests.fake.namespace2': 1})
+
+    def test_shadowing_dotted(self):
+        self.loader.register_module('tests.fake.namespace3')
+        self.loader.register_module('tests.fake.namespace3.subsubnamespace')
+
+        from tests.fake.namespace3.subnamespace import FakeClass4
+        from tests.fake.namespace3.subsubnamespace.subnamespace import FakeClass4 as SubFakeClass4
+
+        self.loader._module_hits = {'tests.fake.namespace3.subsubnamespace': 10}
+        self.assertEquals(self.loader.load_class('subnamespace.FakeClass4'), FakeClass4)
+        self.assertEquals(self.loader.load_class('subnamespace.FakeClass4'), FakeClass4)
+        self.assertEquals(self.loader.load_class('subsubnamespace.subnamespace.FakeClass4'), SubFakeClass4)
+
+    def test_order_reused(self):
+        self.loader.adapt_interval = 3
+        self.loader.register_module('tests.fake.namespace2')
+        self.loader.register_module('tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass3
+        from tests.fake.namespace2 import FakeClass1
+
+        self.assertEquals(self.loader.load_class('FakeClass3'), FakeClass3)
+        order = self.loader._order
+        self.assertEquals(self.loader.load_class('FakeClass1'), FakeClass1)
+        self.assertIs(self.loader._order, order)
+
+        self.assertEquals(self.loader.load_class('FakeClass3'), FakeClass3)
+        self.assertIsNot(self.loader._order, order)
+        self.assertEquals(self.loader._order[3], [1, 0])
+
+        order = self.loader._order
+        self.loader.register_module('tests.fake.namespace3')
+        self.assertEquals(self.loader.load_class('FakeClass3'), FakeClass3)
+        self.assertIsNot(self.loader._order, order)
+        self.assertEquals(len(self.loader._order[2]), 3)
+
+
+class LoaderNamespaceAdaptiveTest(TestCase):
+
+    def test_load_class(self):
+        loader = LoaderNamespaceAdaptive()
+        loader.register_namespace('fake2', 'tests.fake.namespace2')
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass3
+        from tests.fake.namespace2 import FakeClass1
+
+        self.assertEquals(loader.load_class('FakeClass3'), FakeClass3)
+        self.assertEquals(loader.load_class('fake1:FakeClass3'), FakeClass3)
+        self.assertEquals(loader.load_class('FakeClass1'), FakeClass1)
+
+
+class LoaderMemoizedTest(LoaderCachedTest):
+
+    def setUp(self):
+        self.loader = LoaderMemoized(memoize_default=False)
+
+    def test_memoize(self):
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.memoize_default = True
+
+        obj1 = self.loader.factory('FakeClass1', var1={'a': [1, 2]}, var2=2)
+        obj2 = self.loader.factory('FakeClass1', var2=2, var1={'a': [1, 2]})
+        obj3 = self.loader.factory('FakeClass1', var1={'a': [1, 2]}, var2=3)
+        obj4 = self.loader.factory('FakeClass1', 'a', 2)
+
+        self.assertIs(obj1, obj2)
+        self.assertIsNot(obj1, obj3)
+        self.assertIsNot(obj1, obj4)
+        self.assertIs(self.loader.factory('FakeClass1', 'a', 2), obj4)
+
+    def test_memoize_lru(self):
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.memoize_default = True
+        self.loader.memoize_maxsize = 2
+
+        obj1 = self.loader.factory('FakeClass2', var1=1)
+        obj2 = self.loader.factory('FakeClass2', var1=2)
+        self.assertIs(self.loader.factory('FakeClass2', var1=1), obj1)
+        self.loader.factory('FakeClass2', var1=3)
+
+        self.assertIs(self.loader.factory('FakeClass2', var1=1), obj1)
+        self.assertIsNot(self.loader.factory('FakeClass2', var1=2), obj2)
+
+    def test_memoize_disabled_by_default(self):
+        loader = LoaderMemoized(modules=['tests.fake.namespace1'])
+
+        self.assertIsNot(loader.factory('FakeClass2', var1=1), loader.factory('FakeClass2', var1=1))
+
+    def test_memoize_register_factory(self):
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.memoize_default = True
+
+        from tests.fake.namespace1 import FakeClass2
+
+        obj1 = self.loader.factory('FakeClass2', var1=1)
+        self.loader.register_factory(FakeClass2, BaseFactory)
+        obj2 = self.loader.factory('FakeClass2', var1=1)
+        self.assertIsNot(obj2, obj1)
+        self.assertIs(self.loader.factory('FakeClass2', var1=1), obj2)
+
+        self.loader.unregister_factory(FakeClass2)
+        self.assertIsNot(self.loader.factory('FakeClass2', var1=1), obj2)
+
+    def test_memoize_by_class(self):
+        self.loader.register_module('tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass3, FakeClass5
+
+        self.loader.set_memoization(FakeClass3)
+        self.loader.set_memoization(FakeClass5, False)
+
+        self.assertIs(self.loader.factory('FakeClass4'), self.loader.factory('FakeClass4'))
+        self.assertIsNot(self.loader.factory('FakeClass5'), self.loader.factory('FakeClass5'))
+        self.assertIsNot(self.loader.factory('FakeClass2'), self.loader.factory('FakeClass2'))
+        self.assertIsNot(self.loader.factory('FakeClass4', var1=bytearray()),
+                         self.loader.factory('FakeClass4', var1=bytearray()))
+
+
+class LoaderNamespaceMemoizedTest(TestCase):
+
+    def test_logging_formatters(self):
+        from dirty_loader.logging_factories import register_logging_factories
+
+        loader = LoaderNamespaceMemoized(memoize_default=False)
+        loader.register_namespace('logging', 'logging')
+        register_logging_factories(loader)
+        loader.set_memoization(loader.load_class('logging:Formatter'))
+
+        formatter = {'type': 'logging:Formatter', 'params': {'fmt': '%(message)s'}}
+        handler1 = loader.factory('logging:NullHandler', formatter=formatter)
+        handler2 = loader.factory('logging:NullHandler', formatter=formatter)
+
+        self.assertIsNot(handler1, handler2)
+        self.assertIs(handler1.formatter, handler2.formatter)
+
+
 class LoaderReversedCachedTest(LoaderReversedTest):
 
     def setUp(self):
@@ -447,6 +787,14 @@ class LoaderNamespaceTest(TestCase):
         with self.assertRaises(ImportError):
             self.loader.load_class('fake2:FakeClass3')
 
+    def test_memory_report(self):
+        sys.modules.pop('colorsys', None)
+        self.loader.register_namespace('colorsys', 'colorsys')
+
+        self.loader.load_class('colorsys:rgb_to_hsv')
+
+        self.assertEqual(list(self.loader.memory_report()['imported_modules'].keys()), ['colorsys'])
+
     def test_load_fail_3(self):
         self.loader.register_namespace('fake1', 'tests.fake.namespace1')
         self.loader.register_namespace('fake2', 'tests.fake.namespace2')
@@ -475,6 +823,67 @@ class LoaderNamespaceTest(TestCase):
         self.assertEquals(obj.var1, 'a')
         self.assertEquals(obj.var2, 2)
 
+    def test_load_class_nested_namespace(self):
+        self.loader.register_namespace('org', 'tests.fake.namespace1')
+        self.loader.register_namespace('org.team', 'tests.fake.namespace2')
+        self.loader.register_namespace('org.team.app.product', 'tests.fake.namespace3')
+
+        import tests.fake.namespace1
+        import tests.fake.namespace2
+        import tests.fake.namespace3
+
+        self.assertEqual(self.loader.load_class('org.team:FakeClass1'), tests.fake.namespace2.FakeClass1)
+        self.assertEqual(self.loader.load_class('org.team:FakeClass3'), tests.fake.namespace1.FakeClass3)
+        self.assertEqual(self.loader.load_class('FakeClass4', namespace='org.team'), tests.fake.namespace1.FakeClass4)
+        self.assertEqual(self.loader.load_class('org.team.app.product:FakeClass4'),
+                         tests.fake.namespace1.FakeClass4)
+        self.assertEqual(self.loader.load_class('org.team.app.product:subnamespace.FakeClass4'),
+                         tests.fake.namespace3.subnamespace.FakeClass4)
+        self.assertEqual(self.loader.load_class('org:FakeClass1'), tests.fake.namespace1.FakeClass1)
+
+        with self.assertRaises(ImportError):
+            self.loader.load_class('org.team:FakeClassNotExist')
+
+        with self.assertRaises(NoRegisteredError):
+            self.loader.load_class('org.team.app:FakeClass1')
+
+    def test_nested_namespace_unregister_parent(self):
+        self.loader.register_namespace('org', 'tests.fake.namespace1')
+        self.loader.register_namespace('org.team', 'tests.fake.namespace2')
+
+        import tests.fake.namespace1
+
+        self.assertEqual(self.loader.load_class('org.team:FakeClass3'), tests.fake.namespace1.FakeClass3)
+
+        self.loader.unregister_namespace('org')
+
+        with self.assertRaises(ImportError):
+            self.loader.load_class('org.team:FakeClass3')
+
+    def test_namespace_table(self):
+        self.loader.register_namespace('org', 'tests.fake.namespace1')
+        self.loader.register_namespace('org.team', 'tests.fake.namespace2')
+        self.loader.load_class('FakeClass3', namespace='org.team')
+
+        with patch('importlib.import_module') as import_mock:
+            self.loader.load_class('FakeClass3', namespace='org.team')
+            self.loader.load_class('FakeClass1', namespace='org.team')
+
+        import_mock.assert_not_called()
+
+    def test_freeze_nested_namespace(self):
+        self.loader.register_namespace('org', 'tests.fake.namespace1')
+        self.loader.register_namespace('org.team', 'tests.fake.namespace2')
+
+        import tests.fake.namespace1
+        import tests.fake.namespace2
+
+        frozen = self.loader.freeze()
+
+        self.assertEqual(frozen.load_class('org.team:FakeClass1'), tests.fake.namespace2.FakeClass1)
+        self.assertEqual(frozen.load_class('org.team:FakeClass3'), tests.fake.namespace1.FakeClass3)
+        self.assertEqual(frozen.load_class('org.team:FakeClass5'), tests.fake.namespace1.FakeClass5)
+
 
 class LoaderNamespaceReversedTest(TestCase):
 
@@ -556,8 +965,538 @@ class LoaderNamespaceCachedTest(LoaderNamespaceTest):
 
         self.assertEquals(self.loader._cache, {})
 
+    def test_preload_for_fork(self):
+        self.loader.register_namespace('fake1', 'tests.fake.namespace1')
+        self.loader.register_namespace('fake2', 'tests.fake.namespace2')
+
+        from tests.fake.namespace2 import FakeClass1
+
+        self.loader.preload_for_fork(classnames=['fake2:FakeClass1'], freeze_gc=False)
+
+        self.assertEquals(self.loader._cache, {'fake2:FakeClass1': FakeClass1})
+        self.assertEquals(self.loader._cache_factories, {FakeClass1: FakeClass1})
+
 
 class LoaderNamespaceReversedCachedTest(LoaderNamespaceReversedTest):
 
     def setUp(self):
         self.loader = LoaderNamespaceReversedCached()
+
+
+class FrozenLoaderTest(TestCase):
+
+    def setUp(self):
+        self.loader = LoaderCached()
+        self.loader.register_module('tests.fake.namespace1')
+        self.loader.register_module('tests.fake.namespace2', idx=0)
+
+    def test_load_class(self):
+        frozen = self.loader.freeze()
+        self.assertIsInstance(frozen, FrozenLoader)
+
+        from tests.fake.namespace1 import FakeClass3
+        from tests.fake.namespace2 import FakeClass1, FakeClass2
+
+        self.assertEquals(frozen.load_class('FakeClass1'), FakeClass1)
+        self.assertEquals(frozen.load_class('FakeClass2'), FakeClass2)
+        self.assertEquals(frozen.load_class('FakeClass3'), FakeClass3)
+
+    def test_load_class_reversed(self):
+        loader = LoaderReversed()
+        loader.register_module('tests.fake.namespace1')
+        loader.register_module('tests.fake.namespace2')
+        frozen = loader.freeze()
+
+        from tests.fake.namespace2 import FakeClass1
+
+        self.assertEquals(frozen.load_class('FakeClass1'), FakeClass1)
+
+    def test_load_class_not_in_table(self):
+        loader = Loader()
+        loader.register_module('tests.fake.namespace3')
+        frozen = loader.freeze()
+
+        from tests.fake.namespace3.subsubnamespace.subnamespace import FakeClass4
+
+        self.assertEquals(frozen.load_class('subsubnamespace.subnamespace.FakeClass4'), FakeClass4)
+        self.assertNotIn('subsubnamespace.subnamespace.FakeClass4', frozen._classes)
+
+    def test_load_class_extra_classnames(self):
+        loader = Loader()
+        loader.register_module('tests.fake.namespace3')
+        frozen = loader.freeze(classnames=['subnamespace.FakeClass4'])
+
+        from tests.fake.namespace3.subnamespace import FakeClass4
+
+        self.assertEquals(frozen._classes['subnamespace.FakeClass4'], FakeClass4)
+
+    def test_load_fail(self):
+        frozen = self.loader.freeze()
+        with self.assertRaises(ImportError):
+            frozen.load_class('FakeClass6')
+
+    def test_registry_changes_do_not_affect_snapshot(self):
+        frozen = self.loader.freeze()
+        self.loader.unregister_module('tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass3
+
+        self.assertEquals(frozen.load_class('FakeClass3'), FakeClass3)
+
+    def test_immutable(self):
+        frozen = self.loader.freeze()
+        with self.assertRaises(AttributeError):
+            frozen._classes = {}
+        self.assertFalse(hasattr(frozen, 'register_module'))
+        self.assertIs(frozen.freeze(), frozen)
+
+    def test_factory(self):
+        from tests.fake.namespace1 import FakeClass3, FakeClass4
+
+        class FakeClassFactory(BaseFactory):
+
+            def __call__(self, var1, var2):
+                return super(FakeClassFactory, self).__call__(var1=var1 + "b", var2=var2)
+
+        self.loader.register_factory(FakeClass3, FakeClassFactory)
+        frozen = self.loader.freeze()
+
+        obj = frozen.factory('FakeClass4', var1='a', var2=2)
+        self.assertIsInstance(obj, FakeClass4)
+        self.assertEquals(obj.var1, 'ab')
+        self.assertIs(frozen.get_factory_by_class(FakeClass4).loader, frozen)
+        self.assertIs(frozen.get_factory_by_class(FakeClass4), frozen.get_factory_by_class(FakeClass4))
+
+    def test_namespace(self):
+        loader = LoaderNamespaceCached()
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+        loader.register_namespace('fake2', 'tests.fake.namespace2')
+        loader.register_namespace('fake3', 'tests.fake.namespace3')
+        frozen = loader.freeze()
+
+        from tests.fake.namespace1 import FakeClass1
+        from tests.fake.namespace2 import FakeClass1 as FakeClass1Ns2
+        from tests.fake.namespace3.subsubnamespace.subnamespace import FakeClass4
+
+        self.assertEquals(frozen.load_class('FakeClass1'), FakeClass1)
+        self.assertEquals(frozen.load_class('fake2:FakeClass1'), FakeClass1Ns2)
+        self.assertEquals(frozen.load_class('FakeClass1', namespace='fake2'), FakeClass1Ns2)
+        self.assertEquals(frozen.load_class('fake3:subsubnamespace.subnamespace.FakeClass4'), FakeClass4)
+
+        with self.assertRaises(NoRegisteredError):
+            frozen.load_class('fake4:FakeClass1')
+
+        with self.assertRaises(ImportError):
+            frozen.load_class('fake2:FakeClass3')
+
+
+class MayExportTest(TestCase):
+
+    def test_simple_name(self):
+        import tests.fake.namespace1
+
+        self.assertTrue(may_export(tests.fake.namespace1, 'FakeClass1'))
+        self.assertFalse(may_export(tests.fake.namespace1, 'FakeClass6'))
+
+    def test_dotted_name(self):
+        import tests.fake.namespace3
+
+        names = get_submodule_names(tests.fake.namespace3)
+        self.assertEquals(names, frozenset(['subnamespace', 'subsubnamespace']))
+        self.assertTrue(may_export(tests.fake.namespace3, 'subnamespace.FakeClass1', names))
+        self.assertFalse(may_export(tests.fake.namespace3, 'foo.FakeClass1', names))
+        self.assertTrue(may_export(tests.fake.namespace3, 'foo.FakeClass1'))
+
+    def test_not_package(self):
+        import tests.fake.namespace1
+
+        names = get_submodule_names(tests.fake.namespace1)
+        self.assertEquals(names, frozenset())
+        self.assertFalse(may_export(tests.fake.namespace1, 'subnamespace.FakeClass1', names))
+
+
+class SubmoduleNamesTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        sys.path.insert(0, self.tmp_dir.name)
+        self.package_dir = os.path.join(self.tmp_dir.name, 'dirty_loader_listed_pkg')
+        os.makedirs(self.package_dir)
+        self.write_submodule('__init__')
+        self.write_submodule('sub1')
+        import dirty_loader_listed_pkg
+        self.package = dirty_loader_listed_pkg
+
+    def tearDown(self):
+        sys.path.remove(self.tmp_dir.name)
+        for name in list(sys.modules):
+            if name.startswith('dirty_loader_listed_pkg'):
+                del sys.modules[name]
+        self.tmp_dir.cleanup()
+
+    def write_submodule(self, name):
+        with open(os.path.join(self.package_dir, name + '.py'), 'w') as f:
+            f.write('class ListedClass:\n    pass\n')
+        importlib.invalidate_caches()
+
+    def assert_listed(self, loader, classname):
+        self.assertEqual(loader.load_class(classname).__module__, 'dirty_loader_listed_pkg.sub2')
+
+    def test_reload(self):
+        loader = Loader(['dirty_loader_listed_pkg'])
+        loader.load_class('sub1.ListedClass')
+
+        self.write_submodule('sub2')
+        with self.assertRaises(ImportError):
+            loader.load_class('sub2.ListedClass')
+
+        importlib.reload(self.package)
+        self.assert_listed(loader, 'sub2.ListedClass')
+
+    def test_register_again(self):
+        loader = Loader(['dirty_loader_listed_pkg'])
+        loader.load_class('sub1.ListedClass')
+
+        self.write_submodule('sub2')
+        loader.unregister_module('dirty_loader_listed_pkg')
+        loader.register_module('dirty_loader_listed_pkg')
+        self.assert_listed(loader, 'sub2.ListedClass')
+
+    def test_namespace_register_again(self):
+        loader = LoaderNamespace({'listed': 'dirty_loader_listed_pkg'})
+        loader.load_class('sub1.ListedClass')
+
+        self.write_submodule('sub2')
+        loader.unregister_namespace('listed')
+        self.assertEqual(loader._submodule_names, {})
+        loader.register_namespace('listed', 'dirty_loader_listed_pkg')
+        self.assert_listed(loader, 'listed:sub2.ListedClass')
+
+    def test_invalidate(self):
+        loader = Loader(['dirty_loader_listed_pkg'])
+        loader.load_class('sub1.ListedClass')
+
+        self.write_submodule('sub2')
+        loader.invalidate_submodule_names('dirty_loader_listed_pkg')
+        self.assert_listed(loader, 'sub2.ListedClass')
+
+
+class MakeParamsKeyTest(TestCase):
+
+    def test_canonical(self):
+        self.assertEqual(make_params_key(1, a={'b': [1, 2], 'c': {3}}),
+                         make_params_key(1, a={'c': {3}, 'b': [1, 2]}))
+        self.assertEqual(hash(make_params_key(a={'b': [1, 2]})), hash(make_params_key(a={'b': [1, 2]})))
+
+    def test_types(self):
+        self.assertNotEqual(make_params_key(a=1), make_params_key(a=True))
+        self.assertNotEqual(make_params_key(a=[1]), make_params_key(a=(1,)))
+
+    def test_unhashable(self):
+        with self.assertRaises(TypeError):
+            make_params_key(a=bytearray(b'a'))
+
+
+RELOADED_SOURCE = '''
+from collections import namedtuple
+
+
+class ReloadedClass:
+    version = {0}
+
+
+ReloadedPoint = namedtuple('Point{0}', ['x', 'y'])
+'''
+
+
+class CacheRevalidationTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        sys.path.insert(0, self.tmp_dir.name)
+        self.write_source(1)
+
+    def tearDown(self):
+        sys.path.remove(self.tmp_dir.name)
+        sys.modules.pop('dirty_loader_reloaded_plugin', None)
+        self.tmp_dir.cleanup()
+
+    def write_source(self, version):
+        path = os.path.join(self.tmp_dir.name, 'dirty_loader_reloaded_plugin.py')
+        with open(path, 'w') as f:
+            f.write(RELOADED_SOURCE.format(version))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + version * 10 ** 10))
+
+    def test_is_current(self):
+        from tests.fake.namespace1 import FakeClass1
+
+        self.assertTrue(is_current(FakeClass1))
+        self.assertTrue(is_current(LoaderCached.load_class))
+        self.assertTrue(is_current(FakeClass1(1, 2)))
+        self.assertTrue(is_current(type('Local', (), {'__qualname__': 'f.<locals>.Local'})))
+        self.assertFalse(is_current(type('Orphan', (), {'__module__': 'dirty_loader_not_imported'})))
+
+    def test_is_current_origin(self):
+        from tests.fake.namespace1 import FakeClass1
+
+        point = importlib.import_module('dirty_loader_reloaded_plugin').ReloadedPoint
+        self.assertFalse(is_current(point))
+        self.assertTrue(is_current(point, 'dirty_loader_reloaded_plugin', 'ReloadedPoint'))
+        self.assertFalse(is_current(point, 'dirty_loader_reloaded_plugin', 'ReloadedClass'))
+        self.assertTrue(is_current(FakeClass1, 'dirty_loader_reloaded_plugin', 'ReloadedClass'))
+
+    def test_get_origin(self):
+        self.assertEqual(get_origin('pkg', 'Klass'), ('pkg', 'Klass'))
+        self.assertEqual(get_origin('pkg', 'sub.Klass'), ('pkg.sub', 'Klass'))
+        self.assertEqual(get_origin('pkg.sub', '..other.Klass'), ('pkg.other', 'Klass'))
+
+    def test_aliased_cached(self):
+        loader = LoaderCached(weak_cache=True)
+        loader.register_module('dirty_loader_reloaded_plugin')
+        point = loader.load_class('ReloadedPoint')
+
+        self.assertIs(loader._get_cache('ReloadedPoint'), point)
+
+        self.write_source(2)
+        importlib.reload(sys.modules['dirty_loader_reloaded_plugin'])
+
+        with self.assertRaises(KeyError):
+            loader._get_cache('ReloadedPoint')
+        self.assertEqual(loader.load_class('ReloadedPoint').__name__, 'Point2')
+
+    def test_aliased_namespace_cached(self):
+        loader = LoaderNamespaceCached()
+        loader.register_namespace('plugin', 'dirty_loader_reloaded_plugin')
+        point = loader.load_class('plugin:ReloadedPoint')
+
+        self.assertIs(loader._get_cache('plugin:ReloadedPoint'), point)
+        self.assertIs(loader.load_class('ReloadedPoint'), point)
+        self.assertIs(loader._get_cache('ReloadedPoint'), point)
+
+    def test_reload(self):
+        loader = LoaderCached()
+        loader.register_module('dirty_loader_reloaded_plugin')
+        self.assertEqual(loader.load_class('ReloadedClass').version, 1)
+
+        self.write_source(2)
+        importlib.reload(sys.modules['dirty_loader_reloaded_plugin'])
+
+        self.assertEqual(loader.load_class('ReloadedClass').version, 2)
+        self.assertIs(loader._cache['ReloadedClass'], loader.load_class('ReloadedClass'))
+
+    def test_sys_modules_removed(self):
+        loader = LoaderCached(weak_cache=True)
+        loader.register_module('dirty_loader_reloaded_plugin')
+        old_klass = loader.load_class('ReloadedClass')
+
+        del sys.modules['dirty_loader_reloaded_plugin']
+
+        klass = loader.load_class('ReloadedClass')
+        self.assertIsNot(klass, old_klass)
+        self.assertIs(sys.modules['dirty_loader_reloaded_plugin'].ReloadedClass, klass)
+
+    def test_namespace_sys_modules_removed(self):
+        for loader in (LoaderNamespace(), LoaderNamespaceCached()):
+            loader.register_namespace('plugin', 'dirty_loader_reloaded_plugin')
+            old_klass = loader.load_class('plugin:ReloadedClass')
+            self.assertIs(loader.load_class('ReloadedClass', namespace='plugin'), old_klass)
+
+            del sys.modules['dirty_loader_reloaded_plugin']
+
+            klass = loader.load_class('plugin:ReloadedClass')
+            self.assertIsNot(klass, old_klass)
+            self.assertIs(sys.modules['dirty_loader_reloaded_plugin'].ReloadedClass, klass)
+            self.assertIs(loader.load_class('ReloadedClass', namespace='plugin'), klass)
+
+    def test_registry_list_copied(self):
+        from tests.fake.namespace1 import FakeClass1
+        from tests.fake.namespace2 import FakeClass1 as FakeClass1NS2
+
+        modules = ['tests.fake.namespace2']
+        loader = LoaderCached(modules=modules)
+        self.assertEqual(loader.load_class('FakeClass1'), FakeClass1NS2)
+
+        modules.insert(0, 'tests.fake.namespace1')
+        self.assertEqual(loader.get_registered_modules(), ['tests.fake.namespace2'])
+        self.assertEqual(loader.load_class('FakeClass1'), FakeClass1NS2)
+
+        loader.register_module('tests.fake.namespace1', idx=0)
+        self.assertEqual(loader.load_class('FakeClass1'), FakeClass1)
+
+    def test_namespace_registry_copied(self):
+        from tests.fake.namespace1 import FakeClass1
+        from tests.fake.namespace2 import FakeClass1 as FakeClass1NS2
+
+        namespaces = OrderedDict([('fake1', 'tests.fake.namespace1'), ('fake2', 'tests.fake.namespace2')])
+        loader = LoaderNamespaceCached(namespaces=namespaces)
+        self.assertEqual(loader.load_class('FakeClass1'), FakeClass1)
+
+        namespaces.move_to_end('fake1')
+        self.assertEqual(loader.load_class('FakeClass1'), FakeClass1)
+
+        loader.unregister_namespace('fake1')
+        self.assertEqual(list(namespaces), ['fake2', 'fake1'])
+        self.assertEqual(loader.load_class('FakeClass1'), FakeClass1NS2)
+
+
+class ModuleRegistryTest(TestCase):
+
+    def test_add(self):
+        registry = ModuleRegistry([('a', 'a'), ('b', 'b')])
+        registry.add('c', 'c', idx=0)
+        registry.add('d', 'd', idx=2)
+        registry.add('e', 'e')
+
+        self.assertEqual(list(registry.keys()), ['c', 'a', 'd', 'b', 'e'])
+        self.assertEqual(list(registry.values()), ['c', 'a', 'd', 'b', 'e'])
+        self.assertIn('d', registry)
+        self.assertEqual(len(registry), 5)
+
+    def test_remove(self):
+        registry = ModuleRegistry([('a', 'a'), ('b', 'b'), ('c', 'c')])
+        version = registry.version
+        registry.remove('b')
+
+        self.assertEqual(list(registry.keys()), ['a', 'c'])
+        self.assertNotIn('b', registry)
+        self.assertGreater(registry.version, version)
+        with self.assertRaises(KeyError):
+            registry.remove('b')
+
+    def test_snapshot_not_modified(self):
+        registry = ModuleRegistry([('a', 'a'), ('b', 'b')])
+        keys = registry.keys()
+        registry.remove('a')
+        registry.add('c', 'c', idx=0)
+
+        self.assertEqual(list(keys), ['a', 'b'])
+        self.assertEqual(list(registry.keys()), ['c', 'b'])
+
+    def test_module_keys(self):
+        import tests.fake.namespace1
+        registry = ModuleRegistry([('fake1', 'tests.fake.namespace1'), ('fake2', 'tests.fake.namespace2'),
+                                   ('other', tests.fake.namespace1)])
+
+        self.assertEqual(registry.get_module_keys(tests.fake.namespace1), ['fake1', 'other'])
+        registry.remove('fake1')
+        self.assertEqual(registry.get_module_keys('tests.fake.namespace1'), ['other'])
+        self.assertEqual(registry.get_module_keys('tests.fake.namespace3'), [])
+        self.assertTrue(registry.has_module(tests.fake.namespace1))
+        self.assertFalse(registry.has_module('tests.fake.namespace3'))
+
+    def test_insert_same_position(self):
+        registry = ModuleRegistry([('a', 'a'), ('b', 'b')])
+        for i in range(200):
+            registry.add(str(i), str(i), idx=1)
+
+        self.assertEqual(list(registry.keys()), ['a'] + [str(i) for i in reversed(range(200))] + ['b'])
+
+    def test_random_changes(self):
+        import random
+
+        rnd = random.Random(7)
+        registry = ModuleRegistry()
+        model = []
+        for i in range(5000):
+            if model and rnd.random() < 0.4:
+                key = model.pop(rnd.randrange(len(model)))
+                registry.remove(key)
+            else:
+                key = 'module{0}'.format(i)
+                idx = rnd.choice([-1, 0, rnd.randrange(len(model) + 1)])
+                if idx < 0 or idx >= len(model):
+                    model.append(key)
+                else:
+                    model.insert(idx, key)
+                registry.add(key, key, idx=idx)
+
+        self.assertEqual(list(registry.keys()), model)
+        self.assertEqual(list(registry.values()), model)
+        self.assertEqual(len(registry.keys()), len(model))
+
+    def test_large_registry(self):
+        registry = ModuleRegistry()
+        for i in range(50000):
+            registry.add('module{0}'.format(i), 'module{0}'.format(i), idx=0 if i % 2 else -1)
+        for i in range(0, 50000, 3):
+            registry.remove('module{0}'.format(i))
+
+        keys = list(registry.keys())
+        self.assertEqual(len(keys), len(registry))
+        self.assertEqual(keys[0], 'module49999')
+        self.assertEqual(keys[-1], 'module49996')
+
+
+class ConcurrencyTest(TestCase):
+
+    def run_threads(self, *targets):
+        errors = []
+        stop = threading.Event()
+
+        def run(target):
+            try:
+                while not stop.is_set():
+                    target()
+            except Exception as ex:
+                errors.append(ex)
+                stop.set()
+
+        threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        stop.wait(0.1)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+    def test_register_while_loading(self):
+        from tests.fake.namespace1 import FakeClass1
+        from tests.fake.namespace2 import FakeClass1 as FakeClass1NS2
+
+        for loader_class in (Loader, LoaderCached, LoaderReversedCached, LoaderAdaptive, LoaderMemoized):
+            loader = loader_class()
+            loader.register_module('tests.fake.namespace1')
+
+            def register():
+                loader.register_module('tests.fake.namespace2', 0)
+                loader.unregister_module('tests.fake.namespace2')
+
+            def load():
+                self.assertIn(loader.load_class('FakeClass1'), (FakeClass1, FakeClass1NS2))
+                self.assertEqual(loader.load_class('FakeClass3').__name__, 'FakeClass3')
+
+            self.run_threads(register, load, load, load)
+
+            self.assertEqual(loader.get_registered_modules(), ['tests.fake.namespace1'])
+            self.assertIs(loader.load_class('FakeClass1'), FakeClass1)
+
+    def test_register_namespace_while_loading(self):
+        from tests.fake.namespace1 import FakeClass1
+        from tests.fake.namespace2 import FakeClass1 as FakeClass1NS2
+
+        for loader_class in (LoaderNamespace, LoaderNamespaceCached, LoaderNamespaceMemoized):
+            loader = loader_class()
+            loader.register_namespace('org', 'tests.fake.namespace1')
+
+            def register():
+                loader.register_namespace('org.team', 'tests.fake.namespace2')
+                loader.register_factory(FakeClass1, BaseFactory)
+                loader.unregister_namespace('org.team')
+                loader.unregister_factory(FakeClass1)
+
+            def load():
+                self.assertIn(loader.load_class('FakeClass1'), (FakeClass1, FakeClass1NS2))
+                try:
+                    self.assertEqual(loader.load_class('org.team:FakeClass3').__name__, 'FakeClass3')
+                except NoRegisteredError:
+                    pass
+                loader.factory('FakeClass3')
+
+            self.run_threads(register, load, load, load)
+
+            self.assertIs(loader.load_class('FakeClass1'), FakeClass1)
+            with self.assertRaises(NoRegisteredError):
+                loader.load_class('org.team:FakeClass3')
@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+from tempfile import TemporaryDirectory
+from unittest.case import TestCase
+from unittest.mock import patch
+from dirty_loader import Loader, LoaderNamespace
+from dirty_loader.plugins import get_entry_points, register_entry_points
+
+__author__ = 'alfred'
+
+
+class EntryPointsTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        dist_info = os.path.join(self.tmp_dir.name, 'fake_plugins-1.0.dist-info')
+        os.mkdir(dist_info)
+        with open(os.path.join(dist_info, 'METADATA'), 'w') as f:
+            f.write('Metadata-Version: 2.1\nName: fake-plugins\nVersion: 1.0\n')
+        with open(os.path.join(dist_info, 'entry_points.txt'), 'w') as f:
+            f.write('[dirty_loader.tests]\n'
+                    'fake1 = tests.fake.namespace1\n'
+                    'fake2 = tests.fake.namespace2:FakeClass1\n')
+        sys.path.append(self.tmp_dir.name)
+        self.cache_dir = TemporaryDirectory()
+        self.cache_path = os.path.join(self.cache_dir.name, 'index.json')
+
+    def tearDown(self):
+        sys.path.remove(self.tmp_dir.name)
+        self.tmp_dir.cleanup()
+        self.cache_dir.cleanup()
+
+    def test_get_entry_points(self):
+        self.assertEqual(sorted(get_entry_points('dirty_loader.tests')),
+                         [['fake1', 'tests.fake.namespace1'],
+                          ['fake2', 'tests.fake.namespace2:FakeClass1']])
+
+    def test_get_entry_points_cached(self):
+        entry_points = get_entry_points('dirty_loader.tests', cache_path=self.cache_path)
+
+        with open(self.cache_path) as f:
+            self.assertEqual(json.load(f)['groups']['dirty_loader.tests'], entry_points)
+
+        with patch('dirty_loader.plugins.scan_entry_points') as scan_mock:
+            self.assertEqual(get_entry_points('dirty_loader.tests', cache_path=self.cache_path), entry_points)
+            self.assertFalse(scan_mock.called)
+
+    def test_get_entry_points_environment_changed(self):
+        get_entry_points('dirty_loader.tests', cache_path=self.cache_path)
+
+        with patch('dirty_loader.plugins.get_environment_stamp', return_value='other'), \
+                patch('dirty_loader.plugins.scan_entry_points', return_value=[]) as scan_mock:
+            self.assertEqual(get_entry_points('dirty_loader.tests', cache_path=self.cache_path), [])
+            scan_mock.assert_called_once_with('dirty_loader.tests')
+
+    def test_register_entry_points(self):
+        loader = Loader()
+        register_entry_points(loader, 'dirty_loader.tests', cache_path=self.cache_path)
+
+        self.assertEqual(sorted(loader.get_registered_modules()), ['tests.fake.namespace1',
+                                                                   'tests.fake.namespace2'])
+
+    def test_register_entry_points_namespace(self):
+        loader = LoaderNamespace()
+        register_entry_points(loader, 'dirty_loader.tests')
+
+        self.assertEqual(dict(loader.get_registered_namespaces()), {'fake1': 'tests.fake.namespace1',
+                                                                    'fake2': 'tests.fake.namespace2'})
+
+        from tests.fake.namespace2 import FakeClass1
+        self.assertEqual(loader.load_class('fake2:FakeClass1'), FakeClass1)
+
+    def test_register_entry_points_duplicated(self):
+        loader = Loader()
+        entry_points = [['fake1', 'tests.fake.namespace1'], ['fake2', 'tests.fake.namespace1:FakeClass1']]
+
+        with patch('dirty_loader.plugins.scan_entry_points', return_value=entry_points), \
+                self.assertLogs('dirty_loader.plugins', level='WARNING') as logs:
+            register_entry_points(loader, 'dirty_loader.tests')
+
+        self.assertEqual(loader.get_registered_modules(), ['tests.fake.namespace1'])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("'fake2'", logs.output[0])
+
+    def test_register_entry_points_namespace_duplicated(self):
+        loader = LoaderNamespace()
+        entry_points = [['fake1', 'tests.fake.namespace1'], ['fake1', 'tests.fake.namespace2']]
+
+        with patch('dirty_loader.plugins.scan_entry_points', return_value=entry_points), \
+                self.assertLogs('dirty_loader.plugins', level='WARNING') as logs:
+            register_entry_points(loader, 'dirty_loader.tests')
+
+        self.assertEqual(dict(loader.get_registered_namespaces()), {'fake1': 'tests.fake.namespace1'})
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("'fake1'", logs.output[0])
@@ -0,0 +1,161 @@
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest.case import TestCase, skipUnless
+from unittest.mock import patch
+from dirty_loader import Loader, LoaderNamespace, ResolutionRecorder
+from dirty_loader.__main__ import main
+from dirty_loader.config import load_config, iter_descriptors, ConfigError
+from dirty_loader.profiler import ResolutionProfiler, benchmark_threads, format_benchmark
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+__author__ = 'alfred'
+
+
+class ConfigTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_json(self):
+        path = os.path.join(self.tmp_dir.name, 'config.json')
+        with open(path, 'w') as f:
+            json.dump({'obj': 'FakeClass2'}, f)
+        self.assertEqual(load_config(path), {'obj': 'FakeClass2'})
+
+    @skipUnless(yaml, 'PyYAML is not installed')
+    def test_load_yaml(self):
+        path = os.path.join(self.tmp_dir.name, 'config.yaml')
+        with open(path, 'w') as f:
+            f.write('- FakeClass2\n- type: FakeClass1\n  params: {var1: a, var2: 2}\n')
+        self.assertEqual(list(iter_descriptors(load_config(path))),
+                         [('[0]', 'FakeClass2'),
+                          ('[1]', {'type': 'FakeClass1', 'params': {'var1': 'a', 'var2': 2}})])
+
+    def test_iter_descriptors_fail(self):
+        with self.assertRaises(ConfigError):
+            iter_descriptors('FakeClass2')
+
+
+class ResolutionProfilerTest(TestCase):
+
+    def test_profile(self):
+        loader = Loader()
+        loader.register_module('tests.fake.namespace2')
+        loader.register_module('tests.fake.namespace3')
+        loader.register_module('tests.fake.namespace1')
+
+        profiler = ResolutionProfiler(loader)
+        profiler.profile_imports()
+        profiler.profile_descriptors([('a', 'FakeClass2'),
+                                      ('b', {'type': 'FakeClass5', 'params': {'var1': 1}}),
+                                      ('c', 'FakeClass6')], instantiate=True)
+
+        self.assertEqual(sorted(profiler.imports), ['tests.fake.namespace1', 'tests.fake.namespace2',
+                                                    'tests.fake.namespace3'])
+        self.assertEqual(profiler.lookups['FakeClass2']['misses'], 0)
+        self.assertEqual(profiler.lookups['FakeClass5']['misses'], 0)
+        self.assertEqual(sorted(profiler.constructors), ['a', 'b'])
+        self.assertEqual(list(profiler.errors), ['c'])
+        self.assertNotIn('load_class', vars(loader))
+
+        report = profiler.report(top=2)
+        self.assertIn('Lookups', report)
+        self.assertIn('Constructors', report)
+        self.assertIn('c: ImportError', report)
+
+    def test_nested_recorder(self):
+        loader = Loader()
+        loader.register_module('tests.fake.namespace1')
+
+        with ResolutionRecorder(loader) as recorder:
+            recorded_load_class = loader.load_class
+            ResolutionProfiler(loader).profile_descriptors([('a', 'FakeClass2')])
+            self.assertIs(loader.load_class, recorded_load_class)
+            self.assertNotIn('_may_export', vars(loader))
+
+        self.assertEqual(list(recorder.resolutions), ['FakeClass2'])
+
+    def test_probe_misses(self):
+        loader = LoaderNamespace()
+        loader.register_namespace('fake3', 'tests.fake.namespace3')
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+
+        profiler = ResolutionProfiler(loader)
+        profiler.profile_descriptors([('a', 'FakeClass1'), ('b', 'fake1:FakeClass5')])
+
+        self.assertEqual(profiler.lookups['FakeClass1'], {'time': profiler.lookups['FakeClass1']['time'],
+                                                          'count': 1, 'misses': 0})
+        self.assertEqual(profiler.lookups['fake1:FakeClass5']['count'], 1)
+
+    def test_probe_misses_dotted(self):
+        loader = Loader()
+        loader.register_module('tests.fake.namespace3.subsubnamespace')
+        loader.register_module('tests.fake.namespace3')
+
+        profiler = ResolutionProfiler(loader)
+        profiler.profile_descriptors([('a', 'subnamespace.FakeClass5'), ('b', 'subnamespace.FakeClass1')])
+        self.assertEqual(profiler.lookups['subnamespace.FakeClass5']['misses'], 2)
+        self.assertEqual(profiler.lookups['subnamespace.FakeClass1']['misses'], 0)
+        self.assertEqual(list(profiler.errors), ['a'])
+
+
+class MainTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'config.json')
+        with open(self.path, 'w') as f:
+            json.dump({'handler': {'type': 'logging:NullHandler', 'params': {'formatter': 'logging:Formatter'}},
+                       'obj': {'FakeClass1': {'var1': 'a', 'var2': 2}}}, f)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_profile(self):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            result = main(['profile', '-n', 'logging', '-n', 'fake=tests.fake.namespace1', '--logging',
+                           '--cached', '--instantiate', self.path])
+
+        self.assertEqual(result, 0)
+        output = stdout.getvalue()
+        self.assertIn('logging:Formatter', output)
+        self.assertIn('{0}:obj'.format(self.path), output)
+
+    def test_profile_errors(self):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            result = main(['profile', '-m', 'tests.fake.namespace2', self.path])
+
+        self.assertEqual(result, 1)
+        self.assertIn('Errors', stdout.getvalue())
+
+    def test_benchmark(self):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            result = main(['benchmark', '-m', 'tests.fake.namespace1', '--cached', '--threads', '1,2',
+                           '--lookups', '100', 'FakeClass1', 'FakeClass3'])
+
+        self.assertEqual(result, 0)
+        output = stdout.getvalue()
+        self.assertIn('Threads benchmark', output)
+        self.assertIn('2 threads', output)
+
+
+class BenchmarkThreadsTest(TestCase):
+
+    def test_benchmark(self):
+        loader = Loader()
+        loader.register_module('tests.fake.namespace1')
+
+        results = benchmark_threads(loader, ['FakeClass1', 'FakeClass2'], thread_counts=(1, 3), lookups=30)
+
+        self.assertEqual([result['threads'] for result in results], [1, 3])
+        self.assertTrue(all(result['throughput'] > 0 for result in results))
+        self.assertIn('x1.00', format_benchmark(results))
@@ -0,0 +1,221 @@
+import os
+import threading
+from tempfile import TemporaryDirectory
+from unittest.case import TestCase
+from dirty_loader.shared_cache import LoaderSharedCached, LoaderNamespaceSharedCached, SharedResolutionStore
+
+__author__ = 'alfred'
+
+
+class SharedResolutionStoreTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'store.cache')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_put_get(self):
+        store1 = SharedResolutionStore(self.path)
+        store2 = SharedResolutionStore(self.path)
+
+        self.assertIsNone(store2.get('FakeClass1'))
+        store1.put('FakeClass1', 'tests.fake.namespace1')
+        self.assertEqual(store2.get('FakeClass1'), 'tests.fake.namespace1')
+
+        store1.put('FakeClass1', 'tests.fake.namespace2')
+        store2.refresh()
+        self.assertEqual(store2.get('FakeClass1'), 'tests.fake.namespace2')
+
+    def test_partial_line(self):
+        store = SharedResolutionStore(self.path)
+        with open(self.path, 'ab') as f:
+            f.write(b'["FakeClass1", "tests.fake.name')
+            f.flush()
+            self.assertIsNone(store.get('FakeClass1'))
+            f.write(b'space1"]\n')
+        self.assertEqual(store.get('FakeClass1'), 'tests.fake.namespace1')
+
+    def test_unsafe_file(self):
+        with open(self.path, 'w') as f:
+            f.write('["FakeClass1", "os"]\n')
+        os.chmod(self.path, 0o666)
+
+        with self.assertRaises(PermissionError):
+            SharedResolutionStore(self.path)
+
+    def test_symlink(self):
+        target = os.path.join(self.tmp_dir.name, 'target')
+        with open(target, 'w'):
+            pass
+        os.symlink(target, self.path)
+
+        with self.assertRaises(OSError):
+            SharedResolutionStore(self.path)
+
+    def test_new_file_mode(self):
+        SharedResolutionStore(self.path)
+
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_compact(self):
+        store1 = SharedResolutionStore(self.path, max_size=400)
+        store2 = SharedResolutionStore(self.path, max_size=400)
+
+        for i in range(20):
+            store1.put('FakeClass{0}'.format(i % 3), 'tests.fake.namespace{0}'.format(i))
+
+        self.assertLessEqual(os.path.getsize(self.path), 400)
+        self.assertEqual(store2.get('FakeClass1'), 'tests.fake.namespace19')
+        self.assertEqual(store2.get('FakeClass2'), 'tests.fake.namespace17')
+
+        store2.put('FakeClass3', 'tests.fake.namespace1')
+        self.assertEqual(store1.get('FakeClass3'), 'tests.fake.namespace1')
+
+    def test_compact_too_many_entries(self):
+        store = SharedResolutionStore(self.path, max_size=200)
+
+        for i in range(20):
+            store.put('FakeClass{0}'.format(i), 'tests.fake.namespace1')
+
+        self.assertLessEqual(os.path.getsize(self.path), 200)
+        self.assertEqual(store.get('FakeClass19'), 'tests.fake.namespace1')
+        self.assertIsNone(store.get('FakeClass0'))
+
+    def test_concurrent_refresh(self):
+        writer = SharedResolutionStore(self.path)
+        reader = SharedResolutionStore(self.path)
+        stop = threading.Event()
+
+        def refresh():
+            while not stop.is_set():
+                reader.refresh()
+
+        threads = [threading.Thread(target=refresh) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        try:
+            for i in range(2000):
+                writer.put('FakeClass1', 'module{0}'.format(i))
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        reader.refresh()
+        self.assertEqual(reader.get('FakeClass1'), 'module1999')
+
+
+class LoaderSharedCachedTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def build_loader(self, *modules):
+        loader = LoaderSharedCached(shared_cache_dir=self.tmp_dir.name)
+        for module in modules:
+            loader.register_module(module)
+        return loader
+
+    def test_shared_resolution(self):
+        loader1 = self.build_loader('tests.fake.namespace2', 'tests.fake.namespace1')
+        loader2 = self.build_loader('tests.fake.namespace2', 'tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass3
+
+        self.assertEqual(loader1.load_class('FakeClass3'), FakeClass3)
+        self.assertEqual(loader2.get_shared_store().get('FakeClass3'), 'tests.fake.namespace1')
+        self.assertEqual(loader2.load_class('FakeClass3'), FakeClass3)
+
+    def test_stale_resolution(self):
+        loader = self.build_loader('tests.fake.namespace2', 'tests.fake.namespace1')
+        loader.get_shared_store().put('FakeClass3', 'tests.fake.namespace2')
+
+        from tests.fake.namespace1 import FakeClass3
+
+        self.assertEqual(loader.load_class('FakeClass3'), FakeClass3)
+        self.assertEqual(loader.get_shared_store().get('FakeClass3'), 'tests.fake.namespace1')
+
+    def test_registry_stamp(self):
+        loader1 = self.build_loader('tests.fake.namespace1')
+        loader2 = self.build_loader('tests.fake.namespace2', 'tests.fake.namespace1')
+
+        self.assertNotEqual(loader1.get_registry_stamp(), loader2.get_registry_stamp())
+        store = loader1.get_shared_store()
+
+        loader1.register_module('tests.fake.namespace2', idx=0)
+
+        self.assertIsNot(loader1.get_shared_store(), store)
+        self.assertEqual(loader1.get_registry_stamp(), loader2.get_registry_stamp())
+        self.assertEqual(loader1.get_shared_store().path, loader2.get_shared_store().path)
+
+    def test_unregistered_module(self):
+        loader = self.build_loader('tests.fake.namespace1')
+        loader.get_shared_store().put('FakeClass1', 'tests.fake.namespace2')
+
+        from tests.fake.namespace1 import FakeClass1
+
+        self.assertEqual(loader.load_class('FakeClass1'), FakeClass1)
+        self.assertEqual(loader.get_shared_store().get('FakeClass1'), 'tests.fake.namespace1')
+
+    def test_stale_stores_removed(self):
+        loader1 = self.build_loader('tests.fake.namespace1')
+        stale_path = loader1.get_shared_store().path
+        loader2 = self.build_loader('tests.fake.namespace2')
+        recent_path = loader2.get_shared_store().path
+        other_path = os.path.join(self.tmp_dir.name, 'other.cache')
+        with open(other_path, 'w'):
+            pass
+        os.utime(stale_path, (0, 0))
+        os.utime(other_path, (0, 0))
+
+        loader3 = self.build_loader('tests.fake.namespace2', 'tests.fake.namespace1')
+        path = loader3.get_shared_store().path
+
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)),
+                         sorted(os.path.basename(p) for p in (path, recent_path, other_path)))
+
+        # Stores opened before keep working.
+        loader1.get_shared_store().put('FakeClass1', 'tests.fake.namespace1')
+        self.assertEqual(loader1.get_shared_store().get('FakeClass1'), 'tests.fake.namespace1')
+
+    def test_registered_module_index(self):
+        loader = self.build_loader('tests.fake.namespace1')
+
+        self.assertTrue(loader._is_registered_module_name('tests.fake.namespace1'))
+        self.assertFalse(loader._is_registered_module_name('tests.fake.namespace2'))
+
+        loader.unregister_module('tests.fake.namespace1')
+        self.assertFalse(loader._is_registered_module_name('tests.fake.namespace1'))
+
+        loader = LoaderNamespaceSharedCached(shared_cache_dir=self.tmp_dir.name)
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+        self.assertTrue(loader._is_registered_module_name('tests.fake.namespace1'))
+        self.assertFalse(loader._is_registered_module_name('fake1'))
+
+    def test_unsafe_store(self):
+        loader = self.build_loader('tests.fake.namespace1')
+        path = loader.get_shared_store().path
+        loader.invalidate_cache()
+        os.chmod(path, 0o666)
+
+        from tests.fake.namespace1 import FakeClass3
+
+        with self.assertLogs('dirty_loader.shared_cache', 'WARNING'):
+            self.assertEqual(loader.load_class('FakeClass3'), FakeClass3)
+        self.assertEqual(loader.load_class('FakeClass1').__name__, 'FakeClass1')
+
+    def test_namespace(self):
+        loader = LoaderNamespaceSharedCached(shared_cache_dir=self.tmp_dir.name)
+        loader.register_namespace('fake2', 'tests.fake.namespace2')
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+
+        from tests.fake.namespace1 import FakeClass3
+
+        self.assertEqual(loader.load_class('FakeClass3'), FakeClass3)
+        self.assertEqual(loader.get_shared_store().get('FakeClass3'), 'tests.fake.namespace1')
+        self.assertEqual(loader.load_class('fake1:FakeClass3'), FakeClass3)
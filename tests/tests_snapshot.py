@@ -0,0 +1,126 @@
+import json
+import os
+import pickle
+from tempfile import TemporaryDirectory
+from unittest.case import TestCase
+from unittest.mock import patch
+from dirty_loader import LoaderNamespaceCached
+from dirty_loader.snapshot import build_items, get_class_version, get_snapshot_path, get_tree_hash, \
+    restore_snapshot, save_snapshot
+
+__author__ = 'alfred'
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.loader = LoaderNamespaceCached()
+        self.loader.register_namespace('fake1', 'tests.fake.namespace1')
+        self.loader.register_namespace('fake2', 'tests.fake.namespace2')
+        self.tree = {'first': {'type': 'fake1:FakeClass1', 'params': {'var1': [1, 2], 'var2': {'a': 'b'}}},
+                     'second': 'FakeClass3'}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_tree_hash(self):
+        self.assertEqual(get_tree_hash({'a': 1, 'b': [1, 2]}), get_tree_hash({'b': [1, 2], 'a': 1}))
+        self.assertNotEqual(get_tree_hash({'a': 1}), get_tree_hash({'a': 2}))
+
+    def test_class_version(self):
+        from tests.fake.namespace1 import FakeClass1
+        import tests.fake.namespace1
+
+        version = get_class_version(FakeClass1)
+        self.assertEqual(version[:2], ['tests.fake.namespace1', 'FakeClass1'])
+        self.assertEqual(version[3], os.stat(tests.fake.namespace1.__file__).st_mtime_ns)
+        self.assertEqual(get_class_version(int), ['builtins', 'int'])
+
+    def test_build_and_restore(self):
+        items = build_items(self.loader, self.tree, self.tmp_dir.name)
+
+        self.assertEqual(items['first'].var1, [1, 2])
+        self.assertTrue(os.path.exists(get_snapshot_path(self.tmp_dir.name, self.tree)))
+
+        with patch.object(self.loader, 'factory') as factory_mock:
+            restored = build_items(self.loader, self.tree, self.tmp_dir.name)
+
+        factory_mock.assert_not_called()
+        self.assertIsNot(restored['first'], items['first'])
+        self.assertEqual(type(restored['first']), type(items['first']))
+        self.assertEqual(restored['first'].var2, {'a': 'b'})
+        self.assertEqual(type(restored['second']).__name__, 'FakeClass3')
+
+    def test_changed_tree(self):
+        build_items(self.loader, self.tree, self.tmp_dir.name)
+
+        self.tree['first']['params']['var1'] = 3
+        items = build_items(self.loader, self.tree, self.tmp_dir.name)
+
+        self.assertEqual(items['first'].var1, 3)
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 2)
+
+    def test_changed_resolution(self):
+        build_items(self.loader, self.tree, self.tmp_dir.name)
+        path = get_snapshot_path(self.tmp_dir.name, self.tree)
+
+        self.assertIsNotNone(restore_snapshot(path, self.loader))
+
+        loader = LoaderNamespaceCached()
+        loader.register_namespace('fake1', 'tests.fake.namespace2')
+        loader.register_namespace('fake3', 'tests.fake.namespace1')
+        self.assertIsNone(restore_snapshot(path, loader))
+
+        loader = LoaderNamespaceCached()
+        loader.register_namespace('fake3', 'tests.fake.namespace1')
+        self.assertIsNone(restore_snapshot(path, loader))
+
+    def test_changed_class_version(self):
+        build_items(self.loader, self.tree, self.tmp_dir.name)
+        path = get_snapshot_path(self.tmp_dir.name, self.tree)
+
+        with patch('dirty_loader.snapshot.get_class_version', return_value=['other']):
+            self.assertIsNone(restore_snapshot(path, self.loader))
+
+    def test_unpicklable(self):
+        tree = [{'type': 'fake1:FakeClass1', 'params': {'var1': 1, 'var2': 2}}]
+        path = get_snapshot_path(self.tmp_dir.name, tree)
+
+        self.assertFalse(save_snapshot(path, [lambda: None], {}))
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(restore_snapshot(path, self.loader))
+
+    def test_json_header(self):
+        build_items(self.loader, self.tree, self.tmp_dir.name)
+        path = get_snapshot_path(self.tmp_dir.name, self.tree)
+
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+        self.assertIn('fake1:FakeClass1', [classname for classname, _ in header['resolutions']])
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    def test_unsafe_file(self):
+        build_items(self.loader, self.tree, self.tmp_dir.name)
+        path = get_snapshot_path(self.tmp_dir.name, self.tree)
+        os.chmod(path, 0o666)
+
+        with patch('dirty_loader.snapshot.pickle.load') as load_mock:
+            self.assertIsNone(restore_snapshot(path, self.loader))
+        load_mock.assert_not_called()
+
+    def test_symlink(self):
+        build_items(self.loader, self.tree, self.tmp_dir.name)
+        path = get_snapshot_path(self.tmp_dir.name, self.tree)
+        link_path = os.path.join(self.tmp_dir.name, 'link.snapshot')
+        os.symlink(path, link_path)
+
+        self.assertIsNone(restore_snapshot(link_path, self.loader))
+
+    def test_corrupted(self):
+        path = get_snapshot_path(self.tmp_dir.name, self.tree)
+        with open(path, 'wb') as f:
+            f.write(b'{"resolutions": []}\n' + pickle.dumps({'a': 1})[:-3])
+
+        items = build_items(self.loader, self.tree, self.tmp_dir.name)
+        self.assertEqual(items['first'].var1, [1, 2])
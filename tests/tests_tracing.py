@@ -0,0 +1,144 @@
+import json
+import os
+from logging import Logger
+from tempfile import TemporaryDirectory
+from unittest.case import TestCase
+from dirty_loader import LoaderNamespace, LoaderNamespaceCached, ResolutionRecorder
+from dirty_loader.graph import ObjectGraph
+from dirty_loader.factories import get_item_path
+from dirty_loader.logging_factories import register_logging_factories
+from dirty_loader.tracing import Tracer, join_path
+
+__author__ = 'alfred'
+
+
+class PathTest(TestCase):
+
+    def test_join_path(self):
+        self.assertEqual(join_path('', 'handlers'), 'handlers')
+        self.assertEqual(join_path('logger', 'handlers'), 'logger.handlers')
+        self.assertEqual(join_path('logger', '[3]'), 'logger[3]')
+        self.assertEqual(join_path('logger', ''), 'logger')
+
+    def test_get_item_path(self):
+        self.assertEqual(get_item_path('handlers', 3), 'handlers[3]')
+        self.assertEqual(get_item_path(None, 3), '[3]')
+        self.assertEqual(get_item_path('filters', 'name'), 'filters.name')
+        self.assertEqual(get_item_path(None, 'name'), 'name')
+
+
+class TracerTest(TestCase):
+
+    def setUp(self):
+        self.loader = LoaderNamespaceCached()
+        self.loader.register_namespace('logging', 'logging')
+        self.loader.register_namespace('fake1', 'tests.fake.namespace1')
+        register_logging_factories(self.loader)
+
+        self.tree = {'logger': {'type': 'logging:Logger',
+                                'params': {'name': 'test_tracing',
+                                           'handlers': ['logging:NullHandler',
+                                                        {'type': 'logging:NullHandler',
+                                                         'params': {'formatter': 'logging:Formatter'}}]}}}
+
+    def test_nested_object_graph(self):
+        with Tracer(self.loader) as tracer:
+            graph = ObjectGraph(self.loader, self.tree)
+            self.loader.factory('fake1:FakeClass2')
+
+        self.assertIsInstance(graph.items['logger'], Logger)
+        self.assertIn('fake1:FakeClass2', [span.args.get('classname') for span in tracer.spans
+                                           if span.name == 'factory'])
+        self.assertIn('logging:Logger', [span.args.get('classname') for span in tracer.spans
+                                         if span.name == 'load_class'])
+        for name in ('load_class', 'get_factory_by_class', 'factory', 'tracer'):
+            self.assertNotIn(name, vars(self.loader))
+
+    def test_nested_recorder(self):
+        with Tracer(self.loader) as tracer:
+            with ResolutionRecorder(self.loader) as recorder:
+                self.loader.load_class('fake1:FakeClass1')
+            self.loader.load_class('fake1:FakeClass2')
+
+        self.assertEqual(list(recorder.resolutions), ['fake1:FakeClass1'])
+        self.assertEqual(len([span for span in tracer.spans if span.name == 'load_class' and span.parent is None]), 2)
+        self.assertNotIn('load_class', vars(self.loader))
+
+    def test_nested_tracers(self):
+        with Tracer(self.loader) as outer:
+            with Tracer(self.loader) as inner:
+                self.loader.load_class('fake1:FakeClass1')
+            self.assertIs(self.loader.tracer, outer)
+
+        self.assertEqual({span.name for span in inner.spans}, {'load_class'})
+        self.assertEqual(len(outer.spans), len(inner.spans))
+        self.assertNotIn('tracer', vars(self.loader))
+
+    def test_build_items(self):
+        with Tracer(self.loader) as tracer:
+            items = tracer.build_items(self.tree)
+
+        self.assertIsInstance(items['logger'], Logger)
+        for attr in ('load_class', 'get_factory_by_class', 'factory', 'tracer'):
+            self.assertNotIn(attr, vars(self.loader))
+
+        paths = {(span.name, span.path) for span in tracer.spans}
+        self.assertIn(('item', 'logger'), paths)
+        self.assertIn(('load_item', 'logger.handlers[0]'), paths)
+        self.assertIn(('load_item', 'logger.handlers[1].formatter'), paths)
+        self.assertIn(('factory', 'logger.handlers[1].formatter'), paths)
+        self.assertIn(('load_class', 'logger.handlers[1].formatter'), paths)
+
+    def test_nesting(self):
+        with Tracer(self.loader) as tracer:
+            tracer.build_items(self.tree)
+
+        formatter = [span for span in tracer.spans
+                     if span.name == 'factory' and span.path == 'logger.handlers[1].formatter'][0]
+        self.assertEqual(formatter.parent.name, 'load_item')
+        self.assertEqual(formatter.depth, 5)
+        for span in tracer.spans:
+            if span.parent is not None:
+                self.assertLessEqual(span.parent.start, span.start)
+                self.assertGreaterEqual(span.parent.end, span.end)
+
+    def test_cache_hits(self):
+        with Tracer(self.loader) as tracer:
+            tracer.build_items(self.tree)
+
+        hits = [span.args['cache_hit'] for span in tracer.spans
+                if span.name == 'load_class' and span.args['classname'] == 'logging:NullHandler']
+        self.assertEqual(hits, [False, True])
+
+        factory_hits = [span.args['cache_hit'] for span in tracer.spans
+                        if span.name == 'get_factory_by_class' and span.args['classname'] == 'NullHandler']
+        self.assertEqual(factory_hits, [False, True])
+
+    def test_no_cache(self):
+        loader = LoaderNamespace()
+        loader.register_namespace('fake1', 'tests.fake.namespace1')
+
+        with Tracer(loader) as tracer:
+            loader.factory('fake1:FakeClass2')
+
+        self.assertFalse(any(span.args.get('cache_hit') for span in tracer.spans))
+        self.assertEqual({span.name for span in tracer.spans}, {'factory', 'load_class', 'get_factory_by_class'})
+        self.assertEqual({span.path for span in tracer.spans}, {''})
+
+    def test_export_chrome_trace(self):
+        with Tracer(self.loader) as tracer:
+            tracer.build_items(self.tree)
+
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'trace.json')
+            tracer.export_chrome_trace(path)
+            with open(path) as f:
+                trace = json.load(f)
+
+        events = trace['traceEvents']
+        self.assertEqual(len(events), len(tracer.spans))
+        self.assertEqual(events[0]['name'], 'item')
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(events[0]['args']['path'], 'logger')
+        self.assertGreaterEqual(events[0]['dur'], 0)
+        self.assertEqual(events, sorted(events, key=lambda event: event['ts']))
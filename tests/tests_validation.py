@@ -0,0 +1,182 @@
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest.case import TestCase
+from unittest.mock import patch
+from dirty_loader import Loader, LoaderCached
+from dirty_loader.__main__ import main
+from dirty_loader.logging_factories import register_logging_factories
+from dirty_loader.validation import check_params, format_validation, is_valid, validate_config, \
+    validate_descriptor, validate_files
+
+__author__ = 'alfred'
+
+
+def make_loader():
+    loader = LoaderCached()
+    loader.register_module('logging')
+    loader.register_module('tests.fake.namespace1')
+    register_logging_factories(loader)
+    return loader
+
+
+class ValidateDescriptorTest(TestCase):
+
+    def setUp(self):
+        self.loader = make_loader()
+
+    def test_valid(self):
+        result = validate_descriptor(self.loader, {'FakeClass1': {'var1': 'a', 'var2': 2}})
+
+        self.assertEqual(result, {'classname': 'FakeClass1', 'factory': 'FakeClass1', 'errors': []})
+
+    def test_string_descriptor(self):
+        self.assertEqual(validate_descriptor(self.loader, 'FakeClass2')['errors'], [])
+
+    def test_not_resolved(self):
+        result = validate_descriptor(self.loader, {'type': 'NotExistingClass'})
+
+        self.assertIsNone(result['factory'])
+        self.assertEqual(len(result['errors']), 1)
+        self.assertIn('NotExistingClass', result['errors'][0])
+
+    def test_unknown_param(self):
+        result = validate_descriptor(self.loader, {'FakeClass2': {'var1': 'a', 'var3': 2}})
+
+        self.assertEqual(len(result['errors']), 1)
+        self.assertIn('var3', result['errors'][0])
+
+    def test_missing_param(self):
+        result = validate_descriptor(self.loader, {'FakeClass1': {'var1': 'a'}})
+
+        self.assertEqual(len(result['errors']), 1)
+        self.assertIn('var2', result['errors'][0])
+
+    def test_invalid_descriptor(self):
+        result = validate_descriptor(self.loader, {})
+
+        self.assertIsNone(result['classname'])
+        self.assertEqual(len(result['errors']), 1)
+
+    def test_factory(self):
+        result = validate_descriptor(self.loader, {'type': 'Logger', 'params': {'name': 'foo', 'level': 10}})
+
+        self.assertEqual(result['factory'], 'LoggerFactory')
+        self.assertEqual(result['errors'], [])
+
+        result = validate_descriptor(self.loader, {'type': 'Logger', 'params': {'name': 'foo', 'color': 10}})
+        self.assertIn('color', result['errors'][0])
+
+    def test_factory_forwarded_params(self):
+        result = validate_descriptor(self.loader, {'type': 'StreamHandler',
+                                                   'params': {'formatter': 'Formatter', 'stream': None}})
+        self.assertEqual(result['factory'], 'LoggingHandlerFactory')
+        self.assertEqual(result['errors'], [])
+
+        result = validate_descriptor(self.loader, {'type': 'StreamHandler', 'params': {'streem': None}})
+        self.assertIn('streem', result['errors'][0])
+
+    def test_module_import_error(self):
+        loader = Loader(modules=['tests.fake.namespace1', 'tests.fake.broken'])
+        result = validate_descriptor(loader, 'NotExistingClass')
+
+        self.assertEqual(len(result['errors']), 1)
+        self.assertIn('RuntimeError', result['errors'][0])
+
+    def test_no_objects_built(self):
+        with patch('tests.fake.namespace1.FakeClass2.__init__', return_value=None) as init_mock:
+            validate_descriptor(self.loader, {'FakeClass2': {'var1': 'a'}})
+
+        init_mock.assert_not_called()
+
+    def test_params_not_dict(self):
+        from tests.fake.namespace1 import FakeClass2
+
+        self.assertEqual(len(check_params(FakeClass2, FakeClass2, ['a'])), 1)
+
+
+class ValidateFilesTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.paths = []
+        for i in range(4):
+            self.paths.append(self.write_config('config{0}.json'.format(i),
+                                                {'obj': {'FakeClass1': {'var1': 'a', 'var2': i}},
+                                                 'logger': {'type': 'Logger', 'params': {'name': 'foo'}}}))
+        self.invalid_path = self.write_config('invalid.json', [{'FakeClass1': {'var1': 'a'}}, 'FakeClass6'])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_config(self, name, config):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w') as f:
+            json.dump(config, f)
+        return path
+
+    def test_validate_config(self):
+        report = validate_config(Loader(modules=['tests.fake.namespace1']), self.invalid_path)
+
+        self.assertFalse(is_valid(report))
+        self.assertEqual([item['path'] for item in report['items']], ['[0]', '[1]'])
+        self.assertTrue(all(item['errors'] for item in report['items']))
+
+    def test_file_error(self):
+        report = validate_config(make_loader(), os.path.join(self.tmp_dir.name, 'not_existing.json'))
+
+        self.assertFalse(is_valid(report))
+        self.assertIn('FileNotFoundError', report['error'])
+
+    def test_validate_files_serial(self):
+        reports = validate_files(make_loader, self.paths + [self.invalid_path], processes=1)
+
+        self.assertEqual([report['path'] for report in reports], self.paths + [self.invalid_path])
+        self.assertEqual([is_valid(report) for report in reports], [True] * 4 + [False])
+
+    def test_validate_files_pool(self):
+        reports = validate_files(make_loader, self.paths + [self.invalid_path], processes=2)
+
+        self.assertEqual(reports, validate_files(make_loader, self.paths + [self.invalid_path], processes=1))
+
+    def test_format(self):
+        reports = validate_files(make_loader, self.paths + [self.invalid_path], processes=1)
+
+        output = format_validation(reports)
+        self.assertIn('{0}: OK'.format(self.paths[0]), output)
+        self.assertIn('{0}: ERROR'.format(self.invalid_path), output)
+        self.assertIn('Files: 5, items: 10, errors: 2', output)
+
+        output = format_validation(reports, errors_only=True)
+        self.assertNotIn(self.paths[0], output)
+        self.assertIn('  [1]: ', output)
+
+    def test_main(self):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            result = main(['validate', '-m', 'tests.fake.namespace1', '-m', 'logging', '--logging', '--cached',
+                           '--jobs', '2'] + self.paths)
+
+        self.assertEqual(result, 0)
+        self.assertIn('Files: 4, items: 8, errors: 0', stdout.getvalue())
+
+    def test_main_module_import_error(self):
+        ok_path = self.write_config('ok.json', {'obj': {'FakeClass1': {'var1': 'a', 'var2': 2}}})
+        bad_path = self.write_config('bad.json', {'obj': 'NotExistingClass'})
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            result = main(['validate', '-m', 'tests.fake.namespace1', '-m', 'tests.fake.broken', '--jobs', '2',
+                           ok_path, bad_path])
+
+        self.assertEqual(result, 1)
+        output = stdout.getvalue()
+        self.assertIn('{0}: OK'.format(ok_path), output)
+        self.assertIn('{0}: ERROR'.format(bad_path), output)
+        self.assertIn('RuntimeError', output)
+
+    def test_main_errors(self):
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            result = main(['validate', '-m', 'tests.fake.namespace1', '--jobs', '1', '--errors-only',
+                           self.invalid_path])
+
+        self.assertEqual(result, 1)
+        self.assertIn(self.invalid_path, stdout.getvalue())
@@ -0,0 +1,97 @@
+import os
+import sys
+from tempfile import TemporaryDirectory
+from unittest.case import TestCase
+from dirty_loader import LoaderCached
+from dirty_loader.watcher import ModuleWatcher
+
+__author__ = 'alfred'
+
+SOURCE = '''
+class PluginClass:
+    version = {0}
+'''
+
+
+class ModuleWatcherTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        sys.path.insert(0, self.tmp_dir.name)
+        self.path = os.path.join(self.tmp_dir.name, 'dirty_loader_watched_plugin.py')
+        self.write_source(1)
+
+        self.loader = LoaderCached()
+        self.loader.register_module('dirty_loader_watched_plugin')
+        self.loader.register_module('tests.fake.namespace1')
+        self.watcher = ModuleWatcher(self.loader, interval=0.01, use_inotify=False)
+
+    def tearDown(self):
+        self.watcher.stop()
+        sys.path.remove(self.tmp_dir.name)
+        sys.modules.pop('dirty_loader_watched_plugin', None)
+        self.tmp_dir.cleanup()
+
+    def write_source(self, version):
+        with open(self.path, 'w') as f:
+            f.write(SOURCE.format(version))
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + version * 10 ** 10))
+
+    def test_check(self):
+        from tests.fake.namespace1 import FakeClass1
+
+        self.assertEqual(self.loader.load_class('PluginClass').version, 1)
+        self.assertEqual(self.loader.load_class('FakeClass1'), FakeClass1)
+        self.loader.get_factory_by_class(self.loader.load_class('PluginClass'))
+
+        self.assertEqual(self.watcher.check(), [])
+
+        self.write_source(2)
+        self.assertEqual(self.watcher.check(), ['dirty_loader_watched_plugin'])
+
+        self.assertEqual(self.loader._cache, {'FakeClass1': FakeClass1})
+        self.assertEqual(self.loader._cache_factories, {})
+        self.assertEqual(self.loader.load_class('PluginClass').version, 2)
+
+        self.assertEqual(self.watcher.check(), [])
+
+    def test_check_forgets_submodule_names(self):
+        self.loader.load_class('PluginClass')
+        self.loader._submodule_names['tests.fake.namespace1'] = (None, frozenset())
+        self.assertEqual(self.watcher.check(), [])
+
+        self.write_source(2)
+        self.assertEqual(self.watcher.check(), ['dirty_loader_watched_plugin'])
+
+        self.assertEqual(self.loader._submodule_names, {})
+
+    def test_watched_modules(self):
+        import tests.fake.namespace1
+
+        self.assertEqual(self.watcher.get_watched_modules(), {'tests.fake.namespace1': tests.fake.namespace1})
+
+    def test_reload_error(self):
+        self.loader.load_class('PluginClass')
+        self.watcher.check()
+
+        with open(self.path, 'a') as f:
+            f.write('class ')
+        os.utime(self.path, ns=(0, os.stat(self.path).st_mtime_ns + 10 ** 11))
+
+        with self.assertLogs('dirty_loader.watcher'):
+            self.assertEqual(self.watcher.check(), [])
+        self.assertEqual(self.loader.load_class('PluginClass').version, 1)
+
+    def test_start_stop(self):
+        self.assertEqual(self.loader.load_class('PluginClass').version, 1)
+        self.watcher.start()
+        self.write_source(2)
+
+        for _ in range(500):
+            if 'PluginClass' not in self.loader._cache:
+                break
+            self.watcher._stop_event.wait(0.01)
+
+        self.watcher.stop()
+        self.assertEqual(self.loader.load_class('PluginClass').version, 2)